@@ -0,0 +1,315 @@
+"""
+End-to-end extraction benchmarks on synthetic videos.
+
+Inputs are generated locally with ffmpeg's `lavfi` sources (`testsrc`,
+`mandelbrot`), so every machine benchmarks the same content. Each
+(input, mode) case runs in its own Python process, so its peak RSS
+(covering the ffmpeg child too) can be read back with `os.wait4`.
+
+    python benchmarks/bench.py run --out baseline.json
+    python benchmarks/bench.py run --quick --baseline baseline.json
+    python benchmarks/bench.py compare results.json baseline.json
+
+A baseline is just an earlier results file, from the same machine.
+`compare` (and `run --baseline`) exits non-zero if any case's frames/sec
+dropped by more than `--tolerance`.
+"""
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+import click
+
+# The benchmarks run against the checkout they live in
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+# =========================================================================== #
+# ______________________        Bench Matrix        _________________________ #
+# =========================================================================== #
+@dataclass(frozen=True)
+class Input:
+    name: str
+    source: str
+    size: str
+    seconds: int
+    rate: int = 30
+
+    @property
+    def frames(self) -> int:
+        return self.seconds * self.rate
+
+    def lavfi(self) -> str:
+        return f"{self.source}=size={self.size}:rate={self.rate}"
+
+
+INPUTS = (
+    Input("testsrc-240p", "testsrc", "320x240", 20),
+    Input("testsrc-720p", "testsrc", "1280x720", 10),
+    Input("testsrc-1080p", "testsrc", "1920x1080", 10),
+    Input("mandelbrot-480p", "mandelbrot", "640x480", 10),
+)
+QUICK_INPUTS = ("testsrc-240p", "mandelbrot-480p")
+
+# `ffmpegCommander` options per extraction mode
+MODES = {
+    "all": {"strategy": "all"},
+    "fps": {"strategy": "fps", "fps": 1.0},
+    "decimate": {"strategy": "decimate"},
+    "scene": {"strategy": "scene"},
+    "keyframes": {"strategy": "keyframes"},
+    "in-memory": {"strategy": "all", "in_memory": True},
+}
+
+
+@dataclass
+class Result:
+    input: str
+    mode: str
+    frames_in: int
+    frames_out: int
+    wall: float
+    fps: float
+    peak_rss_kb: int
+    bytes_written: int
+
+
+def generate(spec: Input, folder: Path) -> Path:
+    """Render `spec` to an H.264 file (once; reused by later runs)."""
+    path = folder.joinpath(f"{spec.name}.mp4")
+    if path.exists():
+        return path
+
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "lavfi",
+        "-i",
+        spec.lavfi(),
+        "-t",
+        str(spec.seconds),
+        "-c:v",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        "-g",
+        str(spec.rate * 2),
+        str(path),
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def _folder_stats(folder: Path, ext="png"):
+    """Count and size the extracted frames, leaving out state files like
+    the resume manifest.
+    """
+    files = [
+        p
+        for p in folder.rglob(f"*.{ext}")
+        if p.is_file() and not p.name.startswith(".")
+    ]
+    return (len(files), sum(p.stat().st_size for p in files))
+
+
+def run_case(spec: Input, mode: str, video: Path, scratch: Path) -> Result:
+    """Run one case in a child process and measure it."""
+    output = Path(tempfile.mkdtemp(prefix=f"{spec.name}-{mode}-", dir=scratch))
+    cmd = [sys.executable, __file__, "case", str(video), str(output), mode]
+
+    start = time.perf_counter()
+    with tempfile.TemporaryFile() as stderr:
+        # A file rather than a pipe: ffmpeg's log can't fill it and stall the
+        # child while we block in `wait4`
+        child = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr)
+        # `wait4` reports the child's own peak RSS, or its largest reaped
+        # descendant's (ffmpeg) if that was bigger
+        (_, status, usage) = os.wait4(child.pid, 0)
+        wall = time.perf_counter() - start
+        child.returncode = (
+            os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        )
+
+        if child.returncode:
+            stderr.seek(0)
+            raise click.ClickException(
+                f"{spec.name}/{mode} failed:\n"
+                f"{stderr.read().decode(errors='replace')}"
+            )
+
+    (frames_out, written) = _folder_stats(output)
+    shutil.rmtree(output, ignore_errors=True)
+    return Result(
+        input=spec.name,
+        mode=mode,
+        frames_in=spec.frames,
+        frames_out=frames_out,
+        wall=round(wall, 3),
+        fps=round(spec.frames / wall, 1),
+        peak_rss_kb=usage.ru_maxrss,
+        bytes_written=written,
+    )
+
+
+def environment() -> dict:
+    version = subprocess.run(
+        ["ffmpeg", "-version"], capture_output=True, text=True
+    ).stdout.split("\n")[0]
+    return {
+        "ffmpeg": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, tolerance) -> list:
+    """Return a line per case whose fps dropped more than `tolerance` (0.1 = 10%)."""
+    base = {(r["input"], r["mode"]): r for r in baseline["results"]}
+
+    regressions = []
+    for r in results["results"]:
+        old = base.get((r["input"], r["mode"]))
+        if old is None or not old["fps"]:
+            continue
+        change = r["fps"] / old["fps"] - 1
+        line = (
+            f"{r['input']:>16} {r['mode']:>10}: "
+            f"{old['fps']:8.1f} -> {r['fps']:8.1f} fps ({change:+.0%})"
+        )
+        click.echo(line)
+        if change < -tolerance:
+            regressions.append(line)
+
+    return regressions
+
+
+# =========================================================================== #
+# _______________________________      CLI       ____________________________ #
+# =========================================================================== #
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option(
+    "--out", "-o", default="bench-results.json", type=click.Path(dir_okay=False)
+)
+@click.option(
+    "--inputs",
+    "input_dir",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Where generated videos are kept (default: a temp folder)",
+)
+@click.option("--quick", is_flag=True, help=f"Only {', '.join(QUICK_INPUTS)}")
+@click.option(
+    "--mode",
+    "modes",
+    multiple=True,
+    type=click.Choice(list(MODES)),
+    help="Modes to run (default: all of them)",
+)
+@click.option("--baseline", default=None, type=click.Path(exists=True, dir_okay=False))
+@click.option("--tolerance", default=0.1, show_default=True)
+def run(out, input_dir, quick, modes, baseline, tolerance):
+    """Generate the inputs, run every (input, mode) case, and write JSON."""
+    specs = [s for s in INPUTS if not quick or s.name in QUICK_INPUTS]
+    modes = modes or tuple(MODES)
+
+    with tempfile.TemporaryDirectory(prefix="screenshooter-bench-") as scratch:
+        scratch = Path(scratch)
+        folder = Path(input_dir) if input_dir else scratch
+        folder.mkdir(parents=True, exist_ok=True)
+
+        results = []
+        for spec in specs:
+            video = generate(spec, folder)
+            for mode in modes:
+                result = run_case(spec, mode, video, scratch)
+                click.echo(
+                    f"{spec.name:>16} {mode:>10}: {result.fps:8.1f} fps "
+                    f"{result.wall:7.2f}s {result.peak_rss_kb / 1024:7.1f} MiB "
+                    f"{result.frames_out:5d} frames "
+                    f"{result.bytes_written / 1e6:8.1f} MB"
+                )
+                results.append(asdict(result))
+
+    report = {"environment": environment(), "results": results}
+    Path(out).write_text(json.dumps(report, indent=2))
+    click.echo(f"Wrote {out}")
+
+    if baseline:
+        _check(report, json.loads(Path(baseline).read_text()), tolerance)
+
+
+@cli.command("compare")
+@click.argument("results", type=click.Path(exists=True, dir_okay=False))
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.option("--tolerance", default=0.1, show_default=True)
+def compare_cmd(results, baseline, tolerance):
+    """Compare a results file against a baseline."""
+    _check(
+        json.loads(Path(results).read_text()),
+        json.loads(Path(baseline).read_text()),
+        tolerance,
+    )
+
+
+def _check(report, baseline, tolerance):
+    regressions = compare(report, baseline, tolerance)
+    if regressions:
+        raise click.ClickException(
+            f"{len(regressions)} cases slower than the baseline "
+            f"by more than {tolerance:.0%}"
+        )
+    click.echo("No regressions")
+
+
+@cli.command(hidden=True)
+@click.argument("video")
+@click.argument("output")
+@click.argument("mode")
+def case(video, output, mode):
+    """Run a single extraction (used by `run`, one process per case)."""
+    from loguru import logger
+
+    from screenshooter.main import ffmpegCommander
+    from screenshooter.tuning import ThreadProfile
+
+    logger.remove()
+    # ffmpeg's own thread defaults, so results don't depend on a local calibration
+    ffmpegCommander(
+        video,
+        Path(output),
+        spinner=False,
+        exit_on_error=False,
+        thread_profile=ThreadProfile(),
+        **MODES[mode],
+    )
+
+
+if __name__ == "__main__":
+    cli()
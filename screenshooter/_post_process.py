@@ -1,131 +1,289 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import cv2
+import numpy as np
 from loguru import logger
-from pathlib import Path
+
+from . import profiler
+from .blur import is_blurry, score_batch
+from .cache import AnalysisCache
+from .sorter import FileSorter
+from .hashing import NearDuplicateIndex, dhash_batch, dhash_thumbnail, hash_to_int
+
+IMAGE_TYPES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def detect_blur_fft(image, size=60, thresh=5, vis=False):
+    """Find blurry images
+
+    Based on code from: https://www.pyimagesearch.com/2020/06/15/opencv-fast-fourier-transform-fft-for-blur-detection-in-images-and-video-streams/?__s=sizjqdkszyoej5pbk9sf
+
+    Args:
+        image ([type]): [description]
+        size (int, optional): [description]. Defaults to 60.
+        thresh (int, optional): [description]. Defaults to 10.
+        vis (bool, optional): [description]. Defaults to False.
+
+    Returns:
+        [type]: [description]
+    """
+
+    # check to see if we are visualizing our output
+    if vis:
+        from matplotlib import pyplot as plt
+
+        # compute the FFT to find the frequency transform, then shift
+        # the zero frequency component (i.e., DC component located at
+        # the top-left corner) to the center where it will be more
+        # easy to analyze, and compute the magnitude spectrum
+        fftShift = np.fft.fftshift(np.fft.fft2(image))
+        magnitude = 20 * np.log(np.abs(fftShift))
+        # display the original input image
+        (fig, ax) = plt.subplots(
+            1,
+            2,
+        )
+        ax[0].imshow(image, cmap="gray")
+        ax[0].set_title("Input")
+        ax[0].set_xticks([])
+        ax[0].set_yticks([])
+        # display the magnitude image
+        ax[1].imshow(magnitude, cmap="gray")
+        ax[1].set_title("Magnitude Spectrum")
+        ax[1].set_xticks([])
+        ax[1].set_yticks([])
+        # show our plots
+        plt.show()
+
+    # zero-out the low frequencies, apply the inverse FFT and take the
+    # mean of the reconstructed magnitudes (see `blur.score_fft`)
+    mean = score_batch([image], metric="fft", radius=size)[0]
+
+    # the image will be considered "blurry" if the mean value of the
+    # magnitudes is less than the threshold value
+    return (mean, mean <= thresh)
+
+
+def list_images(dataset):
+    """Yield the image files directly inside `dataset`.
+
+    Sub-folders (`selects`, `rejects`, ...) hold our own output, so they
+    aren't searched.
+    """
+    with os.scandir(dataset) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_TYPES):
+                yield entry.path
+
+
+def _bounded_map(pool, fn, items, window):
+    """Like `pool.map`, but pulls from `items` lazily, with at most
+    `window` calls in flight. Yields `(item, result)` in input order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, item)))
+        if len(pending) >= window:
+            (done, future) = pending.popleft()
+            yield (done, future.result())
+
+    while pending:
+        (done, future) = pending.popleft()
+        yield (done, future.result())
+
+
+def dhash(image, hash_size=8):
+    # hash a batch of one, and join its words back into a single int
+    # (use `hashing.dhash_batch` directly when there are many images)
+    thumbnail = dhash_thumbnail(image, hash_size)
+    return hash_to_int(dhash_batch(thumbnail[np.newaxis])[0])
 
 
 class FileCleanup:
-    def __init__(self, dataset, dryrun=False, deduplicate=True, remove_blurry=True):
+    def __init__(
+        self,
+        dataset,
+        dryrun=False,
+        deduplicate=True,
+        remove_blurry=True,
+        max_distance=0,
+        blur_metric="fft",
+        blur_thresh=None,
+        analysis_width=None,
+        cache=True,
+        workers=None,
+    ):
         self.dataset = dataset
         self.dryrun = dryrun
+        self.deduplicate = deduplicate
+        self.remove_blurry = remove_blurry
+        self.workers = workers or os.cpu_count() or 1
+
+        # How many bits two hashes may differ by and still count as duplicates
+        self.max_distance = max_distance
+
+        # How blur is scored, see `blur.score_batch`
+        self.blur_metric = blur_metric
+        self.blur_thresh = blur_thresh
+        self.analysis_width = analysis_width
+
+        # Hashes and blur scores from earlier runs, so re-tuning thresholds
+        # doesn't mean re-reading every image
+        self.cache = AnalysisCache.for_dataset(self.dataset) if cache else None
+
+        # Moves files with renames (hardlinks on a dry run), logging each one;
+        # first finish anything an interrupted run left half done
+        self.sorter = FileSorter(self.dataset, preview=self.dryrun, cache=self.cache)
+        self.sorter.resume()
+
+        # Analysis runs on pool threads, so its stages are filed under
+        # whichever stage is open here
+        self._profile_path = profiler.active().path() if profiler.active() else None
+
+        try:
+            # One pass that decodes each image once and computes everything,
+            # then the keep/reject decisions are made from the results
+            logger.info("Analyzing images...")
+            self.analysis = self.analyze()
+            self.image_paths = list(self.analysis)
+
+            with profiler.stage("sort") as counts:
+                if deduplicate:
+                    logger.info("Starting to remove duplicate images...")
+                    self.DeDuplicate()
+
+                if remove_blurry:
+                    logger.info("Starting to remove blurry images...")
+                    self.remove_blurry_images()
+                    # detect_blur_fft()
+
+                if counts is not None:
+                    counts["images"] += len(self.analysis)
+
+            # Done: a later run starts from a clean manifest
+            self.sorter.complete()
+        finally:
+            self.sorter.close()
+            if self.cache is not None:
+                self.cache.close()
+
+    def _cached(self, image_path, kind, compute):
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(image_path, kind, compute)
+
+    def analyze_image(self, image_path):
+        """Hash and blur-score one image, decoding it at most once.
+
+        Values already in the cache are reused, and the image is only read
+        (straight to grayscale, which is all either check needs) if
+        something is missing.
+
+        Returns:
+            Tuple: (dhash or None, blur score or None), both None if the
+            image can't be read
+        """
+        gray = None
+
+        def load():
+            nonlocal gray
+            if gray is None:
+                gray = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+            return gray
+
+        def compute_hash():
+            if load() is None:
+                return None
+            # Stored as hex, since a 64-bit hash overflows SQLite's INTEGER
+            t = time.perf_counter()
+            h = format(self.dhash(gray), "x")
+            profiler.record(
+                "hash", time.perf_counter() - t, parent=self._profile_path, images=1
+            )
+            return h
+
+        def compute_score():
+            if load() is None:
+                return None
+            t = time.perf_counter()
+            score = float(
+                score_batch(
+                    [gray], metric=self.blur_metric, analysis_width=self.analysis_width
+                )[0]
+            )
+            profiler.record(
+                "blur", time.perf_counter() - t, parent=self._profile_path, images=1
+            )
+            return score
+
+        h = None
+        if self.deduplicate:
+            h = self._cached(image_path, "dhash8", compute_hash)
+            h = None if h is None else int(h, 16)
 
-        self.image_paths = list(paths.list_images(self.dataset))
+        score = None
+        if self.remove_blurry:
+            kind = f"blur:{self.blur_metric}:{self.analysis_width or 'full'}"
+            score = self._cached(image_path, kind, compute_score)
 
-        if deduplicate:
-            logger.info("Starting to remove duplicate images...")
-            self.DeDuplicate()
+        return (h, score)
 
-        if remove_blurry:
-            logger.info("Starting to remove blurry images...")
-            self.remove_blurry_images()
-            # detect_blur_fft()
+    def analyze(self):
+        """Run `analyze_image` over every image on a thread pool.
+
+        OpenCV and NumPy release the GIL while decoding and crunching, so
+        the threads really do run in parallel. Paths are streamed from
+        `list_images` with only a bounded number of images in flight.
+
+        Returns:
+            Dict: {image path: (dhash, blur score)}, sorted by path
+        """
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            images = list_images(self.dataset)
+            for (path, result) in _bounded_map(
+                pool, self.analyze_image, images, self.workers * 4
+            ):
+                if result != (None, None):
+                    results[path] = result
+
+        return dict(sorted(results.items()))
 
     def remove_blurry_images(self):
         # loop over our image paths
         for image_path in self.image_paths:
-            # Load image and make grayscale
-            image = cv2.imread(image_path)
+            # The score from the analysis pass
+            (_, mean) = self.analysis[image_path]
 
             # This 'if' statement prevents 'FileNotFoundError's by making sure we have an image
-            if image is not None:
+            if mean is not None:
 
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-                (mean, blurry) = self.detect_blur_fft(gray)
+                blurry = is_blurry(mean, self.blur_metric, self.blur_thresh)
                 text = "Blurry ({:.2f})" if blurry else "Not Blurry ({:.2f})"
                 text = text.format(mean)
 
-                # Not sure why the list is coming through as strings, so here I'm just converting it back to a Path object
-                img_path = Path(image_path)
-                img_name = img_path.name
-
-                logger.debug(f"{img_name} is {text}")
-
-                reject = (
-                    Path(self.dataset)
-                    .joinpath("rejects")
-                    .joinpath("blurry")
-                    .joinpath(img_name)
-                )
-                select = Path(self.dataset).joinpath("selects").joinpath(img_name)
+                logger.debug(f"{Path(image_path).name} is {text}")
 
+                # A rename, not a copy (or a hardlink on a dry run)
                 if blurry:
-                    # Thanks to guidance from https://realpython.com/python-pathlib/
-                    with reject.open(mode="xb") as f:
-                        f.write(img_path.read_bytes())
-                        img_path.unlink()
+                    self.sorter.move(image_path, "rejects/blurry")
                 else:
-                    with select.open(mode="xb") as f:
-                        f.write(img_path.read_bytes())
-                        img_path.unlink()
+                    self.sorter.move(image_path, "selects")
 
     def detect_blur_fft(self, image, size=60, thresh=5, vis=False):
-        """Find blurry images
-
-        Based on code from: https://www.pyimagesearch.com/2020/06/15/opencv-fast-fourier-transform-fft-for-blur-detection-in-images-and-video-streams/?__s=sizjqdkszyoej5pbk9sf
-
-        Args:
-            image ([type]): [description]
-            size (int, optional): [description]. Defaults to 60.
-            thresh (int, optional): [description]. Defaults to 10.
-            vis (bool, optional): [description]. Defaults to False.
-
-        Returns:
-            [type]: [description]
-        """
-
-        # grab the dimensions of the image and use the dimensions to
-        # derive the center (x, y)-coordinates
-        (h, w) = image.shape
-        (cX, cY) = (int(w / 2.0), int(h / 2.0))
-
-        # compute the FFT to find the frequency transform, then shift
-        # the zero frequency component (i.e., DC component located at
-        # the top-left corner) to the center where it will be more
-        # easy to analyze
-        fft = np.fft.fft2(image)
-        fftShift = np.fft.fftshift(fft)
-
-        # check to see if we are visualizing our output
-        if vis:
-            # compute the magnitude spectrum of the transform
-            magnitude = 20 * np.log(np.abs(fftShift))
-            # display the original input image
-            (fig, ax) = plt.subplots(
-                1,
-                2,
-            )
-            ax[0].imshow(image, cmap="gray")
-            ax[0].set_title("Input")
-            ax[0].set_xticks([])
-            ax[0].set_yticks([])
-            # display the magnitude image
-            ax[1].imshow(magnitude, cmap="gray")
-            ax[1].set_title("Magnitude Spectrum")
-            ax[1].set_xticks([])
-            ax[1].set_yticks([])
-            # show our plots
-            plt.show()
-
-        # zero-out the center of the FFT shift (i.e., remove low
-        # frequencies), apply the inverse shift such that the DC
-        # component once again becomes the top-left, and then apply
-        # the inverse FFT
-        fftShift[cY - size : cY + size, cX - size : cX + size] = 0
-        fftShift = np.fft.ifftshift(fftShift)
-        recon = np.fft.ifft2(fftShift)
-
-        # compute the magnitude spectrum of the reconstructed image,
-        # then compute the mean of the magnitude values
-        magnitude = 20 * np.log(np.abs(recon))
-        mean = np.mean(magnitude)
-
-        # the image will be considered "blurry" if the mean value of the
-        # magnitudes is less than the threshold value
-        return (mean, mean <= thresh)
+        return detect_blur_fft(image, size=size, thresh=thresh, vis=vis)
 
     def DeDuplicate(self):
         """Detect duplicate images in the same folder based on Image Hash.
 
+        Images whose hashes are within `max_distance` bits of an earlier
+        image are grouped with it, via a `NearDuplicateIndex`.
+
         Based on code from: https://www.pyimagesearch.com/2020/04/20/detect-and-remove-duplicate-images-from-a-dataset-for-deep-learning/
 
         """
@@ -133,20 +291,27 @@ class FileCleanup:
         # then initialize our hashes dictionary
         logger.debug("Computing image hashes...")
 
+        index = NearDuplicateIndex(self.max_distance)
         hashes = {}
 
         # loop over our image paths
         for image_path in self.image_paths:
-            # load the input image and compute the hash
-            image = cv2.imread(image_path)
-            h = self.dhash(image)
-            # grab all image paths with that hash, add the current image
-            # path to it, and store the list back in the hashes dictionary
-            p = hashes.get(h, [])
+            # the hash from the analysis pass
+            (h, _) = self.analysis[image_path]
+            if h is None:
+                continue
+            # find the group this image belongs to (keyed by the hash of its
+            # first image), add the current image path to it, and store the
+            # list back in the hashes dictionary
+            match = index.find(h)
+            if match is None:
+                index.add(h, h)
+                match = h
+            p = hashes.get(match, [])
             p.append(image_path)
-            hashes[h] = p
+            hashes[match] = p
 
-        imgs_deleted = 0
+        imgs_moved = 0
         # loop over the image hashes
         for (h, hashed_paths) in hashes.items():
             # check to see if there is more than one image with the same hash
@@ -177,25 +342,24 @@ class FileCleanup:
                 else:
                     # loop over all image paths with the same hash *except*
                     # for the first image in the list (since we want to keep
-                    # one, and only one, of the duplicate images)
+                    # one, and only one, of the duplicate images). They're
+                    # moved aside rather than deleted, so a run can be rolled back
 
                     for p in hashed_paths[1:]:
-                        os.remove(p)
-                        imgs_deleted += 1
+                        self.sorter.move(p, "rejects/duplicates")
+                        imgs_moved += 1
+
+        # Later steps only need to look at the images we kept
+        if not self.dryrun:
+            kept = {paths[0] for paths in hashes.values()}
+            self.image_paths = [p for p in self.image_paths if p in kept]
 
-        logger.info(f"DeDuplication complete!\n{imgs_deleted} images deleted")
+        logger.info(
+            f"DeDuplication complete!\n{imgs_moved} images moved to rejects/duplicates"
+        )
 
     def dhash(self, image, hash_size=8):
-        # convert the image to grayscale and resize the grayscale image,
-        # adding a single column (width) so we can compute the horizontal
-        # gradient
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        resized = cv2.resize(gray, (hash_size + 1, hash_size))
-        # compute the (relative) horizontal gradient between adjacent
-        # column pixels
-        diff = resized[:, 1:] > resized[:, :-1]
-        # convert the difference image to a hash and return it
-        return sum([2 ** i for (i, v) in enumerate(diff.flatten()) if v])
+        return dhash(image, hash_size=hash_size)
 
     # def find_blurry_images(self, img):
     #     """
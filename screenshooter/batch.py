@@ -0,0 +1,254 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from . import metrics
+from .get_inputs import walk_order
+from .main import ffmpegCommander
+from .scheduler import Job, default_memory_budget, dispatch, estimate, plan
+from .segments import run_segments
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________        Batch Results       _________________________ #
+# =========================================================================== #
+@dataclass
+class VideoResult:
+    """The outcome of extracting a single video within a batch."""
+
+    video: Path
+    output: Optional[Path] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def output_names(videos: Iterable[Path]) -> Dict[Path, str]:
+    """Give every video its own output folder name.
+
+    Names are handed out as `OutputNames` would while walking the videos'
+    folders with `get_inputs.iter_video_files`, so a list of videos and the
+    same videos found in a folder get the same names, whatever order they
+    come in.
+
+    Args:
+        videos (Iterable[Path]): The videos in the batch.
+
+    Returns:
+        Dict[Path, str]: Output folder name for each video
+    """
+    names = OutputNames()
+    for video in sorted({Path(v) for v in videos}, key=walk_order):
+        names(video)
+    return names.names
+
+
+class OutputNames:
+    """Hands out output folder names one video at a time, for batches
+    whose videos aren't all known up front (a folder still being walked,
+    or watched).
+
+    A video gets its stem, or, if another video already has that, the stem
+    with its extension (`Episode-mp4`), then a number (`Episode-mp4-2`).
+    The same video always gets the same name back, and as
+    `get_inputs.iter_video_files` walks a tree in a fixed order, a folder
+    searched again (e.g. with `--resume`) gets the same names. Thread safe.
+
+    Args:
+        preset (Dict[Path, str], optional): Names already decided, e.g. by
+            `output_names` for a known list of videos.
+    """
+
+    def __init__(self, preset: Optional[Dict[Path, str]] = None):
+        self._names: Dict[Path, str] = dict(preset or {})
+        self._taken = set(self._names.values())
+        self._lock = threading.Lock()
+
+    def __contains__(self, video) -> bool:
+        return Path(video) in self._names
+
+    @property
+    def names(self) -> Dict[Path, str]:
+        """The names handed out so far, by video."""
+        with self._lock:
+            return dict(self._names)
+
+    def __call__(self, video) -> str:
+        video = Path(video)
+        with self._lock:
+            if video in self._names:
+                return self._names[video]
+
+            stem = video.stem
+            name = stem
+            if name in self._taken:
+                name = f"{stem}-{video.suffix.lstrip('.')}"
+            n = 2
+            while name in self._taken:
+                name = f"{stem}-{video.suffix.lstrip('.')}-{n}"
+                n += 1
+
+            self._names[video] = name
+            self._taken.add(name)
+            return name
+
+
+# =========================================================================== #
+# ______________________         Run a Batch        _________________________ #
+# =========================================================================== #
+# Seconds a streamed batch spends finding (and costing) videos before the
+# first starts; a folder searched within it runs fully longest-first
+DISCOVERY_WINDOW = 1.0
+
+
+def extract_video(video, output_dir, name=None, segments=1, **kwargs) -> VideoResult:
+    """Run one `ffmpegCommander` (or, with `segments` > 1, one per time
+    segment, see `segments.run_segments`) and capture the outcome instead
+    of exiting.
+    """
+    result = VideoResult(video=Path(video))
+    start = time.perf_counter()
+
+    try:
+        if segments > 1:
+            result.output = run_segments(
+                video, output_dir, segments, name=name, exit_on_error=False, **kwargs
+            )
+        else:
+            commander = ffmpegCommander(
+                video, output_dir, name=name, exit_on_error=False, **kwargs
+            )
+            result.output = commander.o
+    except Exception as err:
+        result.error = f"{type(err).__name__}: {err}"
+        logger.error(f"🎃 {video}: {result.error}")
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _tracked(video, output_dir, name, **kwargs) -> VideoResult:
+    # `extract_video`, reporting start and finish to the active `metrics`
+    live = metrics.active()
+    if live is not None:
+        live.started(name)
+
+    result = extract_video(video, output_dir, name, **kwargs)
+
+    if live is not None:
+        live.finished(name, result.ok, result.elapsed)
+    return result
+
+
+def run_batch(videos, output_dir, jobs=1, memory_budget=None, **kwargs) -> List[VideoResult]:
+    """Extract screenshots from every video, `jobs` videos at a time.
+
+    Each extraction is an ffmpeg child process, so a thread per job is all
+    we need to keep several of them running at once. Videos are started
+    longest (duration × resolution) first, and high-resolution ones are
+    held back while they'd overrun `memory_budget`, see `scheduler.dispatch`.
+
+    `videos` may be a lazy iterable, such as `get_inputs.iter_video_files`:
+    extraction then starts after at most `DISCOVERY_WINDOW` seconds with
+    the longest video found so far, while the rest of the tree is still
+    being searched.
+
+    Args:
+        videos (Iterable[Path]): Videos to process.
+        output_dir (Path): Parent folder for the per-video output folders.
+        jobs (int, optional): Maximum concurrent extractions. Defaults to 1.
+        memory_budget (int, optional): Bytes of RAM the running extractions
+            may use between them. Defaults to half the machine's RAM.
+        **kwargs: Passed through to `extract_video`.
+
+    Returns:
+        List[VideoResult]: One result per video, in input (or discovery) order
+    """
+    segments = kwargs.get("segments", 1)
+    if isinstance(videos, (list, tuple)):
+        # All known up front: cost them all, and start the longest first
+        videos = [Path(v) for v in videos]
+        names = OutputNames(output_names(videos))
+        total = f"/{len(videos)}"
+        jobs = max(1, min(jobs, len(videos) or 1))
+        planned = plan(videos, segments)
+        window = 0.0
+        if metrics.active() is not None:
+            for video in videos:
+                metrics.active().queued(names(video))
+    else:
+        # Found as we go: start each video as soon as it turns up
+        found = videos
+        videos = []
+        names = OutputNames()
+        total = ""
+        jobs = max(1, jobs)
+        planned = _stream_plan(found, segments, names, videos)
+        window = DISCOVERY_WINDOW
+
+    if memory_budget is None:
+        memory_budget = default_memory_budget()
+
+    # A spinner per thread just garbles the terminal
+    kwargs.setdefault("spinner", jobs == 1)
+
+    def extract(job):
+        return _tracked(job.video, output_dir, names(job.video), **kwargs)
+
+    results: Dict[Path, VideoResult] = {}
+
+    for (job, result) in dispatch(planned, extract, jobs, memory_budget, window):
+        results[job.video] = result
+
+        status = "done" if result.ok else "failed"
+        logger.info(
+            f"[{len(results)}{total}] {result.video.name} {status} "
+            f"in {result.elapsed:0.1f}s"
+        )
+
+    return [results[v] for v in videos]
+
+
+def _stream_plan(found, segments, names, seen) -> Iterator[Job]:
+    # Runs on `dispatch`'s feeder thread, ahead of the extractions
+    for video in found:
+        video = Path(video)
+        if video in names:
+            continue
+        name = names(video)
+        seen.append(video)
+        if metrics.active() is not None:
+            metrics.active().queued(name)
+        yield estimate(video, segments)
+
+
+def log_summary(results: List[VideoResult]) -> None:
+    """Log a single end-of-batch summary."""
+    failed = [r for r in results if not r.ok]
+    total = sum(r.elapsed for r in results)
+
+    logger.info(
+        f"Batch complete: {len(results) - len(failed)} succeeded, "
+        f"{len(failed)} failed ({total:0.1f}s of extraction time)"
+    )
+    for r in failed:
+        logger.error(f"  {r.video}: {r.error}")
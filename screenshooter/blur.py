@@ -0,0 +1,146 @@
+"""Blur scoring for batches of frames, with a choice of metrics.
+
+Every metric scores a stack of frames and returns one float per frame,
+where *higher means sharper*:
+
+    fft        Mean log-magnitude of the image after a high-pass in the
+               frequency domain (the method `detect_blur_fft` has always
+               used), done with a float32 `rfft2` instead of a complex128
+               `fft2` + shifts.
+    laplacian  Variance of the Laplacian.
+    tenengrad  Mean squared Sobel gradient magnitude.
+
+Frames are converted to grayscale and, if `analysis_width` is given,
+downscaled to that width before scoring. That makes every metric much
+cheaper, but it also moves the scores, so thresholds picked at one
+analysis size don't carry over to another.
+"""
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+# Rough starting points, in the units of each metric at full resolution.
+# Tune these against your own material.
+DEFAULT_THRESHOLDS = {
+    "fft": 5.0,
+    "laplacian": 100.0,
+    "tenengrad": 500.0,
+}
+
+
+def _to_gray(image):
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def prepare(image, analysis_width: Optional[int] = None) -> np.ndarray:
+    """Grayscale (and optionally downscale) one frame to float32 for scoring."""
+    gray = _to_gray(image)
+
+    (h, w) = gray.shape
+    if analysis_width and w > analysis_width:
+        height = max(1, round(h * analysis_width / w))
+        gray = cv2.resize(gray, (analysis_width, height), interpolation=cv2.INTER_AREA)
+
+    return gray.astype(np.float32)
+
+
+# =========================================================================== #
+# ______________________          Metrics           _________________________ #
+# =========================================================================== #
+def score_fft(stack: np.ndarray, radius: int = 60) -> np.ndarray:
+    """High-pass FFT score for an `(N, h, w)` float32 stack.
+
+    Zeroes every frequency within `radius` of DC (the same square the
+    shifted-spectrum version zeroes, but in the unshifted `rfft2` layout,
+    where the low frequencies sit in the corners), inverts, and averages
+    `20 * log(|recon|)` over each frame.
+    """
+    (n, h, w) = stack.shape
+    spectrum = np.fft.rfft2(stack, axes=(-2, -1))
+
+    spectrum[:, :radius, :radius] = 0
+    spectrum[:, h - radius :, :radius] = 0
+
+    recon = np.fft.irfft2(spectrum, s=(h, w), axes=(-2, -1))
+
+    # Guard against log(0) on perfectly flat frames
+    magnitude = 20 * np.log(np.maximum(np.abs(recon), 1e-12))
+    return magnitude.reshape(n, -1).mean(axis=1)
+
+
+def score_laplacian(stack: np.ndarray, **kwargs) -> np.ndarray:
+    """Variance of the Laplacian of each frame."""
+    return np.array([cv2.Laplacian(frame, cv2.CV_32F).var() for frame in stack])
+
+
+def score_tenengrad(stack: np.ndarray, **kwargs) -> np.ndarray:
+    """Mean squared Sobel gradient magnitude of each frame."""
+    scores = []
+    for frame in stack:
+        gx = cv2.Sobel(frame, cv2.CV_32F, 1, 0, ksize=3)
+        gy = cv2.Sobel(frame, cv2.CV_32F, 0, 1, ksize=3)
+        scores.append(float(np.mean(gx * gx + gy * gy)))
+
+    return np.array(scores)
+
+
+METRICS: Dict[str, Callable[..., np.ndarray]] = {
+    "fft": score_fft,
+    "laplacian": score_laplacian,
+    "tenengrad": score_tenengrad,
+}
+
+
+# =========================================================================== #
+# ______________________        Batch Scoring       _________________________ #
+# =========================================================================== #
+def score_batch(
+    images, metric="fft", analysis_width: Optional[int] = None, radius=60
+) -> np.ndarray:
+    """Score a batch of frames with the chosen metric.
+
+    Frames of the same (analysis) size are stacked and scored together;
+    mixed sizes are fine, they're just scored in separate stacks.
+
+    Args:
+        images (Iterable[np.ndarray]): BGR or grayscale frames.
+        metric (str, optional): One of `METRICS`. Defaults to "fft".
+        analysis_width (int, optional): Downscale to this width before
+            scoring. Defaults to None (full resolution).
+        radius (int, optional): The FFT high-pass radius, in full
+            resolution pixels (scaled down along with the frame). Defaults to 60.
+
+    Returns:
+        np.ndarray: One score per frame, higher is sharper
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown blur metric {metric!r}, pick from {list(METRICS)}")
+    score = METRICS[metric]
+
+    images = list(images)
+    scores = np.empty(len(images), dtype=np.float64)
+
+    # Group frames by their analysis shape so each group is one stack
+    groups: Dict[tuple, list] = {}
+    for (i, image) in enumerate(images):
+        prepared = prepare(image, analysis_width)
+        scale = prepared.shape[1] / image.shape[1]
+        groups.setdefault((prepared.shape, scale), []).append((i, prepared))
+
+    for ((shape, scale), members) in groups.items():
+        indices = [i for (i, _) in members]
+        stack = np.stack([frame for (_, frame) in members])
+        scores[indices] = score(stack, radius=max(1, round(radius * scale)))
+
+    return scores
+
+
+def is_blurry(scores, metric="fft", thresh=None) -> np.ndarray:
+    """Boolean mask of the frames scoring at or below the threshold."""
+    if thresh is None:
+        thresh = DEFAULT_THRESHOLDS[metric]
+    return np.asarray(scores) <= thresh
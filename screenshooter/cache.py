@@ -0,0 +1,126 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________       Analysis Cache       _________________________ #
+# =========================================================================== #
+class AnalysisCache:
+    """Per-image analysis results (hashes, blur scores) kept in SQLite.
+
+    Every value is stored under the image's path plus a `kind` such as
+    `dhash8` or `blur:fft:640`, along with the file's size and mtime when
+    it was computed. A lookup only hits if the file still has that size
+    and mtime, so edited or replaced images are simply recomputed.
+
+    The cache is safe to share between threads; writes are committed in
+    batches, and on `close()`.
+    """
+
+    FILENAME = ".screenshooter-cache.sqlite"
+
+    def __init__(self, path, commit_every=500):
+        self.path = Path(path)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS analysis (
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                value,
+                PRIMARY KEY (path, kind)
+            )"""
+        )
+        self._db.commit()
+
+    @classmethod
+    def for_dataset(cls, dataset):
+        """Open (or create) the cache file that lives inside a dataset folder."""
+        return cls(Path(dataset).joinpath(cls.FILENAME))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _key(path):
+        stat = os.stat(path)
+        return (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+    def get(self, path, kind):
+        """Return the cached value, or None if missing or stale."""
+        try:
+            (key, size, mtime_ns) = self._key(path)
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, value FROM analysis WHERE path = ? AND kind = ?",
+                (key, kind),
+            ).fetchone()
+
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+        return row[2]
+
+    def put(self, path, kind, value) -> None:
+        (key, size, mtime_ns) = self._key(path)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?)",
+                (key, kind, size, mtime_ns, value),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+
+    def rename(self, src, dst) -> None:
+        """Follow a file that was renamed/moved (which keeps its mtime)."""
+        src_key = str(Path(src).resolve())
+        dst_key = str(Path(dst).resolve())
+
+        with self._lock:
+            self._db.execute(
+                "UPDATE OR REPLACE analysis SET path = ? WHERE path = ?",
+                (dst_key, src_key),
+            )
+            self._pending += 1
+
+    def get_or_compute(self, path, kind, compute):
+        """Return the cached value, computing (and storing) it on a miss."""
+        value = self.get(path, kind)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(path, kind, value)
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+        logger.debug(f"Analysis cache saved to {self.path}")
@@ -8,19 +8,14 @@ import os
 import sys
 from pathlib import Path
 
-# ======            ====== #
-# ======    Local   ====== #
-# ======            ====== #
-from .get_inputs import get_video_file_paths
-from .main import get_video_info, ffmpegCommander
-
 # ======            ====== #
 # ======    PyPi    ====== #
 # ======            ====== #
 import click
-import click_config_file
-from loguru import logger
-from single_source import get_version, VersionNotFoundError
+
+# Everything else (cv2, numpy, pymediainfo, loguru, ...) is imported inside
+# the command, so `--help` and `--version` don't pay for it; see
+# tests/test_cli.py for the import budget.
 
 # =========================================================================== #
 # ______________________________ Logging setup  _____________________________ #
@@ -36,22 +31,73 @@ config = {
         {
             "sink": "screenshooter.log",
             "format": "{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}",
+            # Only create the file once there's something to log
+            "delay": True,
         },
     ],
     "extra": {"user": "someone"},
 }
-logger.configure(**config)
+
+
+def setup_logging():
+    from loguru import logger
+
+    logger.configure(**config)
+    return logger
 
 
 # ====== Used for getting the Package Version from Poetry's    ====== #
 # ====== PyProject.toml file                                   ====== #
 # ======                                                       ====== #
 path_to_pyproject_dir = Path(__file__).parent.parent
-try:
-    __version__ = get_version(__name__, path_to_pyproject_dir, fail=True)
-except VersionNotFoundError as v:
-    logger.error(v)
-    raise
+
+
+def get_version():
+    from single_source import get_version, VersionNotFoundError
+
+    try:
+        return get_version(__name__, path_to_pyproject_dir, fail=True)
+    except VersionNotFoundError as v:
+        setup_logging().error(v)
+        raise
+
+
+def __getattr__(name):
+    # `cli.__version__`, looked up only when asked for
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def print_version(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    click.echo(f"Screenshooter Vers: {get_version()}")
+    ctx.exit()
+
+
+def read_config(ctx, param, value):
+    """Apply a `click_config_file` configuration file as option defaults.
+
+    Stands in for `click_config_file.configuration_option`, whose module
+    (and configobj) is only imported once there's a file to read. Without
+    `--config`, the file is looked for in the app folder, as before.
+    """
+    path = value or os.path.join(click.get_app_dir(ctx.info_name), "config")
+    if not os.path.isfile(path):
+        return value
+
+    from click_config_file import configobj_provider
+
+    try:
+        options = configobj_provider()(path, ctx.info_name)
+    except Exception as e:
+        raise click.BadOptionUsage(param.name, f"Error reading configuration file: {e}", ctx)
+
+    ctx.default_map = ctx.default_map or {}
+    ctx.default_map.update(options)
+    return value
+
 
 # =========================================================================== #
 # _______________________________      CLI       ____________________________ #
@@ -71,7 +117,9 @@ except VersionNotFoundError as v:
     default="output",
     help="The folder to output to",
 )
-@click.option("--fps", "-f", default=1.0, help="⏰  Frames per second (float)...")
+@click.option(
+    "--fps", "-f", default=1.0, help="⏰  Frames per second (float), for `--strategy fps`"
+)
 @click.option(
     "--overwrite",
     "-o",
@@ -84,10 +132,19 @@ except VersionNotFoundError as v:
     is_flag=True,
     help="Run post-processing to eliminate duplicates, blurry, etc.",
 )
+@click.option(
+    "--rollback",
+    is_flag=True,
+    help="Undo post-processing's sorting in the output folder and each video's "
+    "folder in it, putting every moved image back, then exit",
+)
 @click.option(
     "--version",
     "-v",
     is_flag=True,
+    is_eager=True,
+    expose_value=False,
+    callback=print_version,
     help="Print the Screenshooter version number",
 )
 @click.option(
@@ -109,20 +166,234 @@ except VersionNotFoundError as v:
 @click.option(
     "--decimate",
     is_flag=True,
-    help="Decimate the video",
+    help="Decimate the video (same as `--strategy decimate`)",
+)
+@click.option(
+    "--strategy",
+    default=None,
+    type=click.Choice(["all", "fps", "decimate", "scene", "keyframes"]),
+    help="How to pick frames [default: all]",
+)
+@click.option(
+    "--scene-threshold",
+    default=0.3,
+    type=click.FloatRange(0.0, 1.0),
+    help="Scene-change score (0-1) a frame must beat, for `--strategy scene`",
+)
+@click.option(
+    "--min-gap",
+    default=0.0,
+    type=click.FloatRange(min=0.0),
+    help="Minimum seconds between scene picks, for `--strategy scene`",
+)
+@click.option(
+    "--keyframe-step",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Keep every Nth keyframe, for `--strategy keyframes`",
+)
+@click.option(
+    "--in-memory",
+    is_flag=True,
+    help="Filter duplicate and blurry frames in memory, and only write the keepers",
+)
+@click.option(
+    "--max-distance",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Frames whose hashes differ by at most this many bits are duplicates",
+)
+@click.option(
+    "--dedup",
+    default="global",
+    type=click.Choice(["global", "temporal"]),
+    help="Duplicates are frames close to any frame kept so far (global, with "
+    "--in-memory), or to the last frame kept (temporal: constant memory, and drops "
+    "static stretches before they're written, even without --in-memory)",
+)
+@click.option(
+    "--best-per-shot",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Group frames into shots (frames within --max-distance bits of the shot's "
+    "first frame) and keep only the N sharpest of each; pair with --strategy fps "
+    "and a --max-distance of a few bits",
+)
+@click.option(
+    "--blur-metric",
+    default="fft",
+    type=click.Choice(["fft", "laplacian", "tenengrad"]),
+    help="How to score blur when filtering frames",
+)
+@click.option(
+    "--blur-thresh",
+    default=None,
+    type=float,
+    help="Frames scoring at or below this are blurry (default: a full-resolution "
+    "guess per --blur-metric); scores move with --analysis-width, so set one to "
+    "match it",
+)
+@click.option(
+    "--analysis-width",
+    default=None,
+    type=click.IntRange(min=16),
+    help="Downscale frames to this width before scoring blur",
+)
+@click.option(
+    "--format",
+    "image_format",
+    default="png",
+    type=click.Choice(["png", "jpg", "webp", "npy"]),
+    help="Image format for the extracted frames",
+)
+@click.option(
+    "--quality",
+    default=None,
+    type=click.IntRange(1, 100),
+    help="JPEG/WebP quality (1-100) [default: 90 for JPEG, 75 for WebP]",
+)
+@click.option(
+    "--png-compression",
+    default=None,
+    type=click.IntRange(0, 9),
+    help="PNG compression level (0 = fastest, 9 = smallest)",
+)
+@click.option(
+    "--lossless",
+    is_flag=True,
+    help="Write lossless WebP",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of videos to extract at the same time (default: from --calibrate, or 1)",
+)
+@click.option(
+    "--segments",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Split each video into this many time segments, extracted in parallel",
+)
+@click.option(
+    "--memory-budget",
+    default=None,
+    type=click.IntRange(min=1),
+    help="MiB of RAM concurrent extractions may use; high-resolution videos wait "
+    "their turn beyond it (default: half the machine's RAM)",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip videos already extracted, and continue partly extracted ones "
+    "after their last frame (the interrupted run needs --resume too)",
+)
+@click.option(
+    "--recursive/--no-recursive",
+    default=False,
+    help="Also look for videos in the input folder's sub-folders",
+)
+@click.option(
+    "--include",
+    multiple=True,
+    help="Only take videos matching this glob (e.g. 'cam*/*.mp4'); repeatable",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Skip videos, and sub-folders, matching this glob; repeatable",
+)
+@click.option(
+    "--sniff",
+    is_flag=True,
+    help="Check each file's header really is a video container, not just its extension",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running, and extract each new video that lands in the input folder",
+)
+@click.option(
+    "--settle",
+    default=2.0,
+    type=click.FloatRange(min=0),
+    help="With --watch, seconds a new file must stop growing before it's picked up",
+)
+@click.option(
+    "--profile",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Time each stage (probe, extract, hash, blur, sort, write) per video, and "
+    "write a JSON summary to FILE and a Chrome trace next to it (FILE.trace.json)",
+)
+@click.option(
+    "--metrics-textfile",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Keep a Prometheus textfile-collector file (e.g. .../textfile/screenshooter.prom) "
+    "of per-video frames, fps, speed, bytes, kept/rejected frames and queue depth",
+)
+@click.option(
+    "--metrics-jsonl",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Append the same metrics, as JSON lines, to FILE as the run progresses",
+)
+@click.option(
+    "--calibrate",
+    is_flag=True,
+    help="Time short trial runs on the largest input video, then save the best "
+    "worker/thread counts for this machine and use them from then on",
+)
+@click.option(
+    "--config",
+    type=click.Path(dir_okay=False),
+    is_eager=True,
+    expose_value=False,
+    callback=read_config,
+    help="Read configuration from FILE.",
 )
-@click_config_file.configuration_option()
 def CLI(
     input,
     output,
     fps,
     overwrite,
     postprocess,
-    version,
+    rollback,
     debug,
     video_info,
     audio_info,
     decimate,
+    strategy,
+    scene_threshold,
+    min_gap,
+    keyframe_step,
+    in_memory,
+    max_distance,
+    dedup,
+    best_per_shot,
+    blur_metric,
+    blur_thresh,
+    analysis_width,
+    image_format,
+    quality,
+    png_compression,
+    lossless,
+    jobs,
+    segments,
+    memory_budget,
+    resume,
+    recursive,
+    include,
+    exclude,
+    sniff,
+    watch,
+    settle,
+    profile,
+    metrics_textfile,
+    metrics_jsonl,
+    calibrate,
 ):
     """
     The main function for parsing out the initial click (CLI) inputs.
@@ -130,11 +401,59 @@ def CLI(
     Click gets the file folder and desired output options for the
     screenshooter command, then sends it on its way.
     """
-    # Display Version
-    if version:
-        # get_video_info(input)
-        click.echo(f"Screenshooter Vers: {__version__}")
-        sys.exit()
+    logger = setup_logging()
+
+    from .get_inputs import iter_video_files
+    from .main import get_video_info
+    from .batch import run_batch, log_summary
+    from .formats import OutputFormat
+    from .tuning import calibrate as tuning_calibrate, load_profile
+    from .watch import watch as watch_folder
+
+    # Watch mode only watches the folder itself, one video per worker
+    if watch and (recursive or memory_budget):
+        raise click.UsageError("--watch doesn't support --recursive or --memory-budget")
+
+    # Rollback
+    if rollback:
+        from .sorter import FileSorter
+
+        output_dir = Path(output)
+        if not output_dir.is_dir():
+            print("The specified output directory doesn't exist")
+            sys.exit()
+
+        datasets = [output_dir, *sorted(p for p in output_dir.iterdir() if p.is_dir())]
+        undone = sum(
+            FileSorter(d).rollback()
+            for d in datasets
+            if d.joinpath(FileSorter.MANIFEST).exists()
+            or d.joinpath(FileSorter.DONE).exists()
+        )
+        logger.info(f"Put back {undone} images")
+        return
+
+    # Profile
+    if profile:
+        from . import profiler
+
+        stage_profiler = profiler.enable()
+        summary_path = Path(profile)
+
+        def save_profile():
+            summary = stage_profiler.save_json(summary_path)
+            trace = stage_profiler.save_trace(summary_path.with_suffix(".trace.json"))
+            logger.info(f"Stage profile written to {summary} and {trace}")
+
+        # Runs however the command ends, Ctrl+C in watch mode included
+        click.get_current_context().call_on_close(save_profile)
+
+    # Metrics
+    if metrics_textfile or metrics_jsonl:
+        from . import metrics
+
+        live = metrics.enable(metrics.Metrics(metrics_textfile, metrics_jsonl))
+        click.get_current_context().call_on_close(live.close)
 
     # Directory
     root_dir = Path(input)
@@ -147,8 +466,65 @@ def CLI(
         print("The specified root directory doesn't exist")
         sys.exit()
 
-    # Get the video files
-    videos = get_video_file_paths(root_dir)
+    # Find the video files, lazily: extraction starts with the first one found
+    videos = iter_video_files(
+        root_dir, recursive=recursive, include=include, exclude=exclude, sniff=sniff
+    )
+
+    output_format = OutputFormat(image_format, quality, png_compression, lossless)
+    extract_options = dict(
+        decimate=decimate,
+        strategy=strategy,
+        fps=fps,
+        scene_threshold=scene_threshold,
+        min_gap=min_gap,
+        keyframe_step=keyframe_step,
+        in_memory=in_memory,
+        max_distance=max_distance,
+        dedup=dedup,
+        best_per_shot=best_per_shot,
+        blur_metric=blur_metric,
+        blur_thresh=blur_thresh,
+        analysis_width=analysis_width,
+        output_format=output_format,
+    )
+
+    # Calibrate
+    if calibrate:
+        videos = list(videos)
+        if not videos:
+            print("No videos to calibrate with")
+            sys.exit()
+        sample = max(videos, key=lambda v: Path(v).stat().st_size)
+        logger.info(f"Calibrating with {sample}...")
+        tuned = tuning_calibrate(sample, **extract_options)
+        path = tuned.save()
+        logger.info(
+            f"Saved {path}: {tuned.workers} workers, {tuned.threads} threads, "
+            f"{tuned.filter_threads} filter threads ({tuned.speed:0.1f}x realtime)"
+        )
+        return
+
+    # Jobs default to the calibrated worker count
+    if jobs is None:
+        tuned = load_profile()
+        jobs = tuned.workers if tuned else 1
+
+    # Watch mode
+    if watch:
+        watch_folder(
+            root_dir,
+            output_dir,
+            jobs=jobs,
+            settle=settle,
+            include=include,
+            exclude=exclude,
+            sniff=sniff,
+            segments=segments,
+            overwrite=overwrite,
+            **extract_options,
+        )
+        return
 
     # Request to send
     request = {
@@ -156,20 +532,45 @@ def CLI(
         "fps": {fps},
         "overwrite": {overwrite},
         "post-process": {postprocess},
+        "jobs": {jobs},
+        "segments": {segments},
+        "resume": {resume},
+        "profile": {profile},
+        "recursive": {recursive},
+        "include": {include},
+        "exclude": {exclude},
     }
 
     # Debug
     if debug:
         logger.debug(f"Debug Mode is ON")
         logger.debug(f"Request: {request}")
-        logger.debug(f"Video File List: {videos}")
+        videos = _log_found(videos)
+
+    # Video Info
+    if video_info:
+        for v in videos:
+            get_video_info(v, audio_info)
+        return
 
     # Send the request
     # ProcessVideo(input, fps, overwrite, postprocess)
-    for v in videos:
+    results = run_batch(
+        videos,
+        output_dir,
+        jobs=jobs,
+        segments=segments,
+        resume=resume,
+        overwrite=overwrite,
+        memory_budget=memory_budget * 2**20 if memory_budget else None,
+        **extract_options,
+    )
+    log_summary(results)
 
-        # Video Info
-        if video_info:
-            get_video_info(v, audio_info)
-        else:
-            ffmpegCommander(v, output_dir, decimate=decimate)
+
+def _log_found(videos):
+    from loguru import logger
+
+    for video in videos:
+        logger.debug(f"Found video: {video}")
+        yield video
@@ -9,6 +9,7 @@
 # ======            ====== #
 # ======    Local   ====== #
 # ======            ====== #
+from .probe import probe
 
 # ======            ====== #
 # ======    PyPi    ====== #
@@ -67,18 +68,17 @@ def get_thumbnail():
 
 
 # Get FPS
-# From here: 
-# https://stackoverflow.com/questions/27792934/get-video-fps-using-ffprobe
-# ffprobe -v error -select_streams v -of default=noprint_wrappers=1:nokey=1 -show_entries stream=r_frame_rate file.mp4
+# Cached, see `probe.py`
 
 
-def get_fps():
-    cmd = f"ffprobe -v error -select_streams v -of default=noprint_wrappers=1:nokey=1 -show_entries stream=r_frame_rate ../input/FBIAgent.m4v"
-    subprocess.check_output(cmd, shell=True)
+def get_fps(video):
+    return probe(video).fps
 
 
 if __name__ == "__main__":
     # get_codecs()
     # get_formats()
     # get_thumbnail()
-    get_fps()
+    import sys
+
+    print(get_fps(sys.argv[1]))
@@ -0,0 +1,112 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# =========================================================================== #
+# ______________________       Output Formats       _________________________ #
+# =========================================================================== #
+FORMATS = ("png", "jpg", "webp", "npy")
+
+
+@dataclass
+class OutputFormat:
+    """How extracted frames are encoded, for both ffmpeg and the in-memory
+    pipeline (which encodes with OpenCV).
+
+    Attributes:
+        name: One of `FORMATS`.
+        quality: JPEG/WebP quality, 1 (smallest) to 100 (best). Defaults
+            to 90 for JPEG and 75 for WebP.
+        compression: PNG compression level, 0 (fastest) to 9 (smallest).
+            Defaults to the encoder's own default.
+        lossless: Lossless WebP.
+
+    `npy` writes each frame as a raw `(height, width, 3)` uint8 array in
+    OpenCV's BGR channel order. ffmpeg can't write those, so `npy` always
+    goes through the raw-frame pipe.
+    """
+
+    name: str = "png"
+    quality: Optional[int] = None
+    compression: Optional[int] = None
+    lossless: bool = False
+
+    def __post_init__(self):
+        if self.name == "jpeg":
+            self.name = "jpg"
+        if self.name not in FORMATS:
+            raise ValueError(f"Unknown output format {self.name!r}, pick from {FORMATS}")
+
+    @property
+    def ext(self) -> str:
+        return self.name
+
+    @property
+    def needs_pipe(self) -> bool:
+        return self.name == "npy"
+
+    def _quality(self) -> int:
+        if self.quality is not None:
+            return self.quality
+        return 90 if self.name == "jpg" else 75
+
+    def ffmpeg_args(self) -> List[str]:
+        """Encoder options to put before ffmpeg's output path."""
+        if self.name == "png":
+            args = ["-c:v", "png"]
+            if self.compression is not None:
+                args += ["-compression_level", str(self.compression)]
+            return args
+
+        if self.name == "jpg":
+            # mjpeg's qscale runs from 2 (best) to 31 (worst)
+            qscale = round(2 + (100 - self._quality()) * 29 / 99)
+            return ["-c:v", "mjpeg", "-q:v", str(qscale)]
+
+        if self.name == "webp":
+            return [
+                "-c:v",
+                "libwebp",
+                "-lossless",
+                "1" if self.lossless else "0",
+                "-quality",
+                str(self._quality()),
+            ]
+
+        raise ValueError(f"ffmpeg can't write {self.name!r} frames")
+
+    def cv2_params(self) -> List[int]:
+        import cv2
+
+        if self.name == "png":
+            if self.compression is None:
+                return []
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.compression]
+
+        if self.name == "jpg":
+            return [cv2.IMWRITE_JPEG_QUALITY, self._quality()]
+
+        if self.name == "webp":
+            # OpenCV treats a quality above 100 as lossless
+            return [cv2.IMWRITE_WEBP_QUALITY, 101 if self.lossless else self._quality()]
+
+        return []
+
+    def write(self, path, frame) -> None:
+        """Encode one BGR frame to `path` (which should end in `.ext`)."""
+        # OpenCV and numpy are only needed once frames pass through Python
+        import cv2
+        import numpy as np
+
+        if self.name == "npy":
+            np.save(str(path), frame)
+            return
+
+        if not cv2.imwrite(str(path), frame, self.cv2_params()):
+            raise OSError(f"Couldn't write {path}")
@@ -0,0 +1,360 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import heapq
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from . import profiler
+from ._post_process import dhash
+from .blur import is_blurry, score_batch
+from .formats import OutputFormat
+from .hashing import NearDuplicateIndex, TemporalIndex, hamming_int
+from .runner import FFmpegError
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+import numpy as np
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________      Raw Frame Reader      _________________________ #
+# =========================================================================== #
+def raw_output_args() -> List[str]:
+    """ffmpeg output options for streaming packed BGR frames to stdout.
+
+    BGR keeps the frames in OpenCV's native channel order, so nothing has
+    to be converted before hashing or encoding.
+    """
+    return ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+
+def _drain(stream, tail):
+    for line in iter(stream.readline, b""):
+        tail.append(line.decode("utf-8", "replace").rstrip())
+
+
+def read_frames(
+    cmd: List[str], size: Tuple[int, int], tail_lines=50
+) -> Iterator[np.ndarray]:
+    """Run ffmpeg and yield each raw frame as a `(height, width, 3)` array.
+
+    Every frame is read straight into one reusable buffer, and the array
+    yielded is a view over that buffer rather than a copy. That means a
+    frame is only valid until the next one is read, so callers that want
+    to keep one must `.copy()` it.
+
+    Args:
+        cmd (List[str]): ffmpeg command ending in `raw_output_args()`.
+        size (Tuple[int, int]): The (width, height) of the decoded frames.
+        tail_lines (int, optional): How much stderr to keep. Defaults to 50.
+
+    Raises:
+        FFmpegError: ffmpeg exited with a non-zero return code
+
+    Yields:
+        np.ndarray: The current frame (a view, see above)
+    """
+    (w, h) = size
+    frame_size = w * h * 3
+
+    buf = bytearray(frame_size)
+    view = memoryview(buf)
+    frame = np.frombuffer(buf, dtype=np.uint8).reshape(h, w, 3)
+
+    # Without `-nostats` the `\r`-separated stats line would grow forever
+    # as a single "line" in the stderr tail
+    cmd = [cmd[0], "-hide_banner", "-nostats", *cmd[1:]]
+    tail = deque(maxlen=tail_lines)
+
+    logger.debug(f"Starting ffmpeg: {cmd}")
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
+    )
+    drain = threading.Thread(target=_drain, args=(proc.stderr, tail), daemon=True)
+    drain.start()
+
+    eof = False
+    try:
+        while not eof:
+            # `readinto` may come back short on a pipe, so keep going
+            # until the frame is full (or ffmpeg is done)
+            filled = 0
+            while filled < frame_size:
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    eof = True
+                    break
+                filled += n
+
+            if not eof:
+                yield frame
+    finally:
+        if not eof:
+            # The consumer stopped early, so there's no need to finish decoding
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+        drain.join()
+
+    if eof and returncode != 0:
+        raise FFmpegError(returncode, cmd, tail)
+
+
+# =========================================================================== #
+# ______________________     In-Memory Filtering    _________________________ #
+# =========================================================================== #
+@dataclass
+class FrameStats:
+    read: int = 0
+    duplicates: int = 0
+    blurry: int = 0
+    written: int = 0
+    bytes: int = 0
+    shots: int = 0
+
+
+class ShotSelector:
+    """Keeps the `k` sharpest frames of each shot in a frame stream.
+
+    A shot runs for as long as frames stay within `max_distance` bits of
+    its first frame's dhash. Frames are blur-scored in batches of up to
+    `batch_size` (one `score_batch` call per batch, and only one decode
+    of the video), and only the best `k` so far are held on to. So
+    memory is bounded by `k + batch_size` frames, however long a shot is.
+
+    `push` and `flush` return a finished shot's picks as
+    `(index, frame, score)`, in stream order.
+    """
+
+    def __init__(
+        self, k=1, max_distance=0, blur_metric="fft", analysis_width=None, batch_size=16
+    ):
+        self.k = k
+        self.max_distance = max_distance
+        self.blur_metric = blur_metric
+        self.analysis_width = analysis_width
+        self.batch_size = batch_size
+
+        self.shots = 0
+        self.scoring_seconds = 0.0
+        self._anchor = None
+        self._pending: List[Tuple[int, np.ndarray]] = []
+        self._best: List[Tuple[float, int, np.ndarray]] = []
+
+    def push(self, index, frame, h) -> List[Tuple[int, np.ndarray, float]]:
+        """Add a frame (`h` being its dhash as an int); `frame` is copied."""
+        done = []
+        if self._anchor is None or hamming_int(h, self._anchor) > self.max_distance:
+            done = self.flush()
+            self._anchor = h
+            self.shots += 1
+
+        self._pending.append((index, frame.copy()))
+        if len(self._pending) >= self.batch_size:
+            self._score()
+        return done
+
+    def flush(self) -> List[Tuple[int, np.ndarray, float]]:
+        """End the current shot, returning its picks."""
+        self._score()
+        picks = sorted(self._best, key=lambda b: b[1])
+        self._best = []
+        return [(index, frame, score) for (score, index, frame) in picks]
+
+    def _score(self) -> None:
+        if not self._pending:
+            return
+
+        t = time.perf_counter()
+        scores = score_batch(
+            [frame for (_, frame) in self._pending], self.blur_metric, self.analysis_width
+        )
+        self.scoring_seconds += time.perf_counter() - t
+
+        candidates = self._best + [
+            (float(score), index, frame)
+            for (score, (index, frame)) in zip(scores, self._pending)
+        ]
+        # Sharpest first; the earlier frame wins a tie
+        self._best = heapq.nsmallest(self.k, candidates, key=lambda c: (-c[0], c[1]))
+        self._pending = []
+
+
+def extract_frames(
+    cmd,
+    size,
+    output_dir,
+    file_name,
+    deduplicate=True,
+    remove_blurry=True,
+    blur_thresh=None,
+    max_distance=0,
+    dedup="global",
+    blur_metric="fft",
+    analysis_width=None,
+    output_format=None,
+    best_per_shot=None,
+    on_progress=None,
+    progress_interval=0.5,
+) -> FrameStats:
+    """Decode a video to memory and only encode the frames worth keeping.
+
+    This is the in-memory counterpart of running ffmpeg to PNGs and then
+    `FileCleanup`: each frame is hashed and blur-checked as it comes off
+    the pipe, and only the survivors are ever encoded and written.
+    Written frames are numbered `{file_name}-0001.png` (or whichever
+    extension) onwards, exactly like ffmpeg's own `%04d` output.
+
+    Args:
+        cmd (List[str]): ffmpeg command ending in `raw_output_args()`.
+        size (Tuple[int, int]): The (width, height) of the decoded frames.
+        output_dir (Path): Folder the kept frames are written to.
+        file_name (str): Prefix for the written frames.
+        deduplicate (bool, optional): Drop frames whose dhash was already seen.
+        max_distance (int, optional): Hamming distance within which two
+            dhashes count as the same frame. Defaults to 0 (exact match).
+        dedup (str, optional): Compare each frame with every frame kept so
+            far ("global"), or only with the last one written ("temporal",
+            see `hashing.TemporalIndex`). Defaults to "global".
+        blur_metric (str, optional): One of `blur.METRICS`. Defaults to "fft".
+        analysis_width (int, optional): Downscale to this width before
+            scoring blur. Defaults to None (full resolution).
+        output_format (OutputFormat, optional): How to encode kept frames.
+            Defaults to PNG.
+        best_per_shot (int, optional): Instead of dropping duplicates, group
+            frames into shots and keep the sharpest `best_per_shot` of each
+            (see `ShotSelector`, which uses `max_distance` and the blur
+            settings). `remove_blurry` then only drops picks that are
+            still blurry. Defaults to None (off).
+        remove_blurry (bool, optional): Drop frames that score as blurry.
+        blur_thresh (float, optional): Scores at or below this are blurry.
+            Defaults to the metric's entry in `blur.DEFAULT_THRESHOLDS`.
+        on_progress (Callable, optional): Called with the running
+            `FrameStats` and seconds elapsed, every `progress_interval`
+            seconds (like ffmpeg's `-progress`).
+
+    Returns:
+        FrameStats: How many frames were read, dropped and written
+    """
+    output_format = output_format or OutputFormat()
+    stats = FrameStats()
+    temporal = dedup == "temporal"
+    seen = TemporalIndex(max_distance) if temporal else NearDuplicateIndex(max_distance)
+
+    # Seconds spent per stage, handed to the profiler (if any) at the end;
+    # decoding is whatever's left of the `extract` stage
+    timings = {"hash": 0.0, "blur": 0.0, "write": 0.0}
+    clock = time.perf_counter
+    start = clock()
+    reported = start
+
+    def write(frame):
+        stats.written += 1
+        out = Path(output_dir).joinpath(
+            f"{file_name}-{stats.written:04d}.{output_format.ext}"
+        )
+        t = clock()
+        output_format.write(out, frame)
+        timings["write"] += clock() - t
+        stats.bytes += os.path.getsize(out)
+
+    def write_picks(picks):
+        for (_, frame, score) in picks:
+            if remove_blurry and is_blurry(score, blur_metric, blur_thresh):
+                stats.blurry += 1
+            else:
+                write(frame)
+
+    # Picking the best of each shot replaces the per-frame dedup and blur cut
+    shots = None
+    if best_per_shot:
+        shots = ShotSelector(best_per_shot, max_distance, blur_metric, analysis_width)
+    remove_blurry_each = remove_blurry and shots is None
+
+    for frame in read_frames(cmd, size):
+        stats.read += 1
+
+        if on_progress is not None and clock() - reported >= progress_interval:
+            reported = clock()
+            on_progress(stats, reported - start)
+
+        if shots is not None:
+            t = clock()
+            h = dhash(frame)
+            timings["hash"] += clock() - t
+            write_picks(shots.push(stats.read, frame, h))
+            continue
+
+        if deduplicate:
+            t = clock()
+            h = dhash(frame)
+            duplicate = seen.find(h) is not None
+            if not (duplicate or temporal):
+                seen.add(h, stats.read)
+            timings["hash"] += clock() - t
+            if duplicate:
+                stats.duplicates += 1
+                continue
+
+        if remove_blurry_each:
+            t = clock()
+            score = score_batch([frame], blur_metric, analysis_width)[0]
+            blurry = is_blurry(score, blur_metric, blur_thresh)
+            timings["blur"] += clock() - t
+            if blurry:
+                stats.blurry += 1
+                continue
+
+        write(frame)
+
+        if deduplicate and temporal:
+            # Compared against what was written, so a blurry first frame of
+            # a new shot doesn't hide the sharp ones after it
+            seen.add(h, stats.written)
+
+    if shots is not None:
+        write_picks(shots.flush())
+        stats.shots = shots.shots
+        # Every frame not picked counts as a duplicate within its shot
+        stats.duplicates = stats.read - stats.written - stats.blurry
+        timings["blur"] = shots.scoring_seconds
+
+    if deduplicate or shots is not None:
+        profiler.record(
+            "hash", timings["hash"], stats.read, frames=stats.read, rejected=stats.duplicates
+        )
+    if remove_blurry_each or shots is not None:
+        checked = stats.read if shots is not None else stats.read - stats.duplicates
+        profiler.record(
+            "blur", timings["blur"], checked, frames=checked, rejected=stats.blurry
+        )
+    profiler.record(
+        "write", timings["write"], stats.written, frames=stats.written, bytes=stats.bytes
+    )
+
+    if shots is not None:
+        logger.info(f"{stats.shots} shots, best {best_per_shot} kept from each")
+    logger.info(
+        f"{stats.read} frames read, {stats.duplicates} duplicates and "
+        f"{stats.blurry} blurry frames dropped, {stats.written} written"
+    )
+    return stats
@@ -1,40 +1,175 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator, Sequence
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
 # =========================================================================== #
 # ______________________      Get Video Files       _________________________ #
 # =========================================================================== #
-def get_video_file_paths(input_dir):
-    """From a directory, return a list of video file paths, sorted based
-    on commonly used video file exstensions.
+VIDEO_FILE_TYPES = (
+    ".avi",
+    ".mp4",
+    ".mkv",
+    ".webm",
+    ".mpeg",
+    ".ogg",
+    ".m4v",
+    ".wmv",
+    ".mov",
+    ".flv",
+)
+
+
+# Leading bytes of the containers above. ISO media (mp4/mov/m4v) and
+# MPEG-TS are checked in `sniff_video` as they don't start with a fixed
+# signature.
+MAGIC_BYTES = (
+    b"\x1aE\xdf\xa3",  # Matroska / WebM
+    b"RIFF",  # AVI
+    b"\x00\x00\x01\xba",  # MPEG program stream
+    b"\x00\x00\x01\xb3",  # MPEG elementary stream
+    b"OggS",  # Ogg
+    b"\x30\x26\xb2\x75\x8e\x66\xcf\x11",  # ASF / WMV
+    b"FLV",  # Flash video
+)
+ISO_BOXES = (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip", b"pnot")
+
+
+def sniff_video(path) -> bool:
+    """Check a file's first bytes for a known video container signature."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(512)
+    except OSError:
+        return False
+
+    if head[4:8] in ISO_BOXES:
+        return True
+    if head[:1] == b"G" and head[188:189] == b"G":
+        return True
+    return head.startswith(MAGIC_BYTES)
+
+
+def _matches(rel_path, patterns) -> bool:
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(fnmatch(rel_path, p) or fnmatch(name, p) for p in patterns)
+
+
+def is_included(rel_path, include: Sequence[str] = (), exclude: Sequence[str] = ()) -> bool:
+    """Whether a video file passes the `include`/`exclude` globs (see
+    `iter_video_files`).
+    """
+    if include and not _matches(rel_path, include):
+        return False
+    return not (exclude and _matches(rel_path, exclude))
+
+
+def iter_video_files(
+    input_dir,
+    recursive=True,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = (),
+    sniff=False,
+) -> Iterator[Path]:
+    """Yield video files under `input_dir` as they're found.
+
+    Walks with `os.scandir`, which gets the file type from the directory
+    listing itself, so a deep tree (or a slow network mount) starts
+    yielding after its first folder instead of after a full walk. Each
+    folder's entries are sorted, so the same tree always comes out in the
+    same order (see `walk_order`) whatever order the filesystem lists it
+    in. Symlinked folders aren't followed.
 
     Args:
-        input_dir (Path): The folder in which we'll search for videos.
+        input_dir (Path): The folder to search.
+        recursive (bool, optional): Search sub-folders too. Defaults to True.
+        include (Sequence[str], optional): Glob patterns; if given, files must
+            match one. Matched against the path relative to `input_dir`,
+            and against the bare name.
+        exclude (Sequence[str], optional): Glob patterns for files, and
+            folders to skip entirely.
+        sniff (bool, optional): Also require a known container signature in
+            the file's first bytes. Defaults to False.
 
-    Returns:
-        List: Video file paths found in directory
+    Yields:
+        Path: Each video file, a folder's own videos (by name) before its
+        sub-folders'
     """
+    stack = [(str(input_dir), "")]
+
+    while stack:
+        (folder, rel) = stack.pop()
+        try:
+            it = os.scandir(folder)
+        except OSError as err:
+            logger.warning(f"Skipping unreadable folder {folder}: {err}")
+            continue
+
+        subfolders = []
+        with it:
+            yield from _scan(it, rel, subfolders, recursive, include, exclude, sniff)
+
+        # Popped in reverse, so sub-folders are walked in name order
+        stack.extend(reversed(subfolders))
+
+
+def _scan(entries, rel, subfolders, recursive, include, exclude, sniff):
+    for entry in sorted(entries, key=lambda e: e.name):
+        rel_path = f"{rel}{entry.name}"
+
+        if entry.is_dir(follow_symlinks=False):
+            if recursive and not _matches(rel_path, exclude):
+                subfolders.append((entry.path, rel_path + "/"))
+            continue
+
+        if not entry.is_file():
+            continue
+        if not entry.name.lower().endswith(VIDEO_FILE_TYPES):
+            continue
+        if not is_included(rel_path, include, exclude):
+            continue
+        if sniff and not sniff_video(entry.path):
+            logger.debug(f"Skipping {rel_path}, not a recognised video container")
+            continue
+
+        yield Path(entry.path)
+
 
-    # Get all files in folders and sub-folders
-    # files = get_all_files_in_dir(input_dir)
+def walk_order(path):
+    """Sort key putting videos in the order `iter_video_files` finds them:
+    a folder's own files by name, then each sub-folder's, by name.
 
-    VIDEO_FILE_TYPES = (
-        ".avi",
-        ".mp4",
-        ".mkv",
-        ".webm",
-        ".mpeg",
-        ".ogg",
-        ".m4v",
-        ".wmv",
-        ".mov",
-        ".flv",
-    )
+    Args:
+        path (Path): A video file.
 
-    video_files = []
+    Returns:
+        Tuple: The key
+    """
+    parts = Path(path).parts
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
 
-    entries = input_dir.iterdir()
-    # entries = sorted(entries, key=lambda entry: entry.is_file())
 
-    for f in entries:
-        if f.suffix in VIDEO_FILE_TYPES:
-            video_files.append(f)
+def get_video_file_paths(input_dir):
+    """From a directory, return a list of the video file paths directly
+    inside it (see `iter_video_files` to search sub-folders, filter, and
+    stream the results).
+
+    Args:
+        input_dir (Path): The folder in which we'll search for videos.
 
-    return video_files
+    Returns:
+        List: Video file paths found in directory
+    """
+    return list(iter_video_files(input_dir, recursive=False))
@@ -0,0 +1,224 @@
+"""Batched difference hashing (dhash) for whole stacks of frames.
+
+Based on the single-image `dhash` from: https://www.pyimagesearch.com/2020/04/20/detect-and-remove-duplicate-images-from-a-dataset-for-deep-learning/
+
+Hashes are packed into `uint64` words, `ceil(hash_size ** 2 / 64)` per
+image, with bit `i` of the hash being the `i`-th gradient of the
+flattened thumbnail. For the default `hash_size=8` that is one word per
+image, holding the very same number the old per-image `dhash` returned.
+"""
+import cv2
+import numpy as np
+
+
+# Popcount for every byte value, for NumPy versions without `bitwise_count`
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def dhash_thumbnail(image, hash_size=8):
+    """Shrink a BGR (or already grayscale) image to a `(hash_size, hash_size + 1)`
+    grayscale thumbnail, ready to stack for `dhash_batch`.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # adding a single column (width) so we can compute the horizontal gradient
+    return cv2.resize(image, (hash_size + 1, hash_size))
+
+
+def dhash_batch(thumbnails) -> np.ndarray:
+    """Hash a stack of grayscale thumbnails in one go.
+
+    Args:
+        thumbnails (np.ndarray): `(N, hash_size, hash_size + 1)` array.
+
+    Returns:
+        np.ndarray: `(N, words)` array of `uint64` hashes
+    """
+    thumbnails = np.asarray(thumbnails)
+    (n, rows, cols) = thumbnails.shape
+    if cols != rows + 1:
+        raise ValueError(
+            f"Expected thumbnails shaped (N, hash_size, hash_size + 1), got {thumbnails.shape}"
+        )
+
+    # compute the (relative) horizontal gradient between adjacent
+    # column pixels, for every thumbnail at once
+    bits = (thumbnails[:, :, 1:] > thumbnails[:, :, :-1]).reshape(n, -1)
+
+    # pad up to a whole number of 64-bit words
+    words = -(-bits.shape[1] // 64)
+    bits = np.pad(bits, ((0, 0), (0, words * 64 - bits.shape[1])))
+
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    return packed.view("<u8").astype(np.uint64, copy=False)
+
+
+def dhash_images(images, hash_size=8) -> np.ndarray:
+    """Thumbnail and hash a sequence of images, see `dhash_batch`."""
+    thumbnails = [dhash_thumbnail(image, hash_size) for image in images]
+    if not thumbnails:
+        return np.empty((0, -(-hash_size * hash_size // 64)), dtype=np.uint64)
+
+    return dhash_batch(np.stack(thumbnails))
+
+
+def hash_to_int(words) -> int:
+    """Join one image's `uint64` words back into a single Python int."""
+    return sum(int(w) << (64 * i) for (i, w) in enumerate(np.atleast_1d(words)))
+
+
+def popcount(a) -> np.ndarray:
+    """Count the set bits in each element of a `uint64` array."""
+    a = np.asarray(a, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a)
+
+    as_bytes = a.reshape(a.shape + (1,)).view(np.uint8)
+    return _POPCOUNT[as_bytes].sum(axis=-1)
+
+
+def hamming(hashes, h) -> np.ndarray:
+    """Hamming distance from every row of `hashes` to the hash `h`.
+
+    Args:
+        hashes (np.ndarray): `(N, words)` array from `dhash_batch`.
+        h (np.ndarray): `(words,)` array, a single hash.
+
+    Returns:
+        np.ndarray: `(N,)` array of distances
+    """
+    return popcount(np.bitwise_xor(hashes, h)).sum(axis=-1)
+
+
+# =========================================================================== #
+# ______________________    Near-Duplicate Index    _________________________ #
+# =========================================================================== #
+def hamming_int(a: int, b: int) -> int:
+    """Hamming distance between two hashes held as Python ints."""
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """A Burkhard-Keller tree over integer hashes, for radius queries.
+
+    Every child sits under the edge labelled with its distance to the
+    parent, so the triangle inequality lets a query for everything within
+    `r` of `h` skip any edge outside `d - r .. d + r`. For small radii that
+    visits a tiny part of the tree, instead of comparing against every hash.
+    """
+
+    def __init__(self):
+        # Each node is `[hash, item, {distance: child}]`
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, h: int, item=None) -> None:
+        node = [h, item, {}]
+        self._size += 1
+
+        if self._root is None:
+            self._root = node
+            return
+
+        current = self._root
+        while True:
+            d = hamming_int(h, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def search(self, h: int, radius: int):
+        """Return `(distance, hash, item)` for every entry within `radius`."""
+        found = []
+        if self._root is None:
+            return found
+
+        stack = [self._root]
+        while stack:
+            (node_hash, item, children) = stack.pop()
+            d = hamming_int(h, node_hash)
+            if d <= radius:
+                found.append((d, node_hash, item))
+
+            for (edge, child) in children.items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+
+        return found
+
+
+class NearDuplicateIndex:
+    """Finds a previously added hash within `max_distance` bits of a new one.
+
+    With `max_distance=0` this is just a dict lookup, which is the old
+    exact-match behaviour; anything larger goes through a `BKTree`.
+    """
+
+    def __init__(self, max_distance=0):
+        self.max_distance = max_distance
+        self._exact = {}
+        self._tree = BKTree()
+
+    def __len__(self):
+        return len(self._exact)
+
+    def add(self, h, item=None) -> None:
+        h = hash_to_int(h) if isinstance(h, np.ndarray) else int(h)
+        if h in self._exact:
+            return
+
+        self._exact[h] = item
+        if self.max_distance > 0:
+            self._tree.add(h, item)
+
+    def find(self, h):
+        """Return the item of the closest match, or None if nothing is close enough."""
+        h = hash_to_int(h) if isinstance(h, np.ndarray) else int(h)
+
+        if h in self._exact:
+            return self._exact[h]
+
+        if self.max_distance > 0:
+            matches = self._tree.search(h, self.max_distance)
+            if matches:
+                return min(matches, key=lambda m: m[0])[2]
+
+        return None
+
+
+class TemporalIndex:
+    """Like `NearDuplicateIndex`, but only remembers the last hash added.
+
+    A frame is a duplicate when it's within `max_distance` bits of the
+    last frame kept, so a static stretch (a slide, an idle screen) keeps
+    one frame, while a scene that comes back later is kept again. Memory
+    stays constant however long the video is.
+    """
+
+    def __init__(self, max_distance=0):
+        self.max_distance = max_distance
+        self._last = None
+
+    def __len__(self):
+        return 0 if self._last is None else 1
+
+    def add(self, h, item=None) -> None:
+        h = hash_to_int(h) if isinstance(h, np.ndarray) else int(h)
+        self._last = (h, item)
+
+    def find(self, h):
+        """Return the last item, if `h` is close enough to it, else None."""
+        if self._last is None:
+            return None
+
+        h = hash_to_int(h) if isinstance(h, np.ndarray) else int(h)
+        (last, item) = self._last
+        if hamming_int(h, last) <= self.max_distance:
+            return item
+        return None
@@ -4,6 +4,10 @@
 # ======            ====== #
 # ======  Built-in  ====== #
 # ======            ====== #
+import inspect
+from contextlib import nullcontext
+from dataclasses import asdict
+from glob import escape as glob_escape
 from pathlib import Path, PurePath
 from typing import List
 from pprint import pprint
@@ -11,30 +15,52 @@ from pprint import pprint
 # ======            ====== #
 # ======    Local   ====== #
 # ======            ====== #
+from . import metrics, profiler, runner
+from .formats import OutputFormat
+from .probe import probe
+from .resume import ExtractState
 from .timer import Timer
+from .tuning import load_profile
 
 # ======            ====== #
 # ======    PyPi    ====== #
 # ======            ====== #
 import subprocess
 from loguru import logger
-from pymediainfo import MediaInfo
 from yaspin import yaspin, Spinner
 
 # =========================================================================== #
 # ______________________       Get Media Info       _________________________ #
 # =========================================================================== #
 def get_video_info(video, audio=False):
-    for track in MediaInfo.parse(video).tracks:
-        if track.track_type == "Video":
-            logger.info(f"Video Bit rate: {track.bit_rate}")
-            logger.info(f"Video Frame rate: {track.frame_rate}")
-            logger.info(f"Video Format: {track.format}")
-            logger.info(f"Video Duration: {track.other_duration[4]}")
-        elif track.track_type == "Audio":
-            if audio:
-                logger.info("Audio Track data:")
-                pprint(track.to_data())
+    info = probe(video)
+    logger.info(f"Video Bit rate: {info.bit_rate}")
+    logger.info(f"Video Frame rate: {info.fps}")
+    logger.info(f"Video Format: {info.codec}")
+    logger.info(f"Video Size: {info.width}x{info.height}")
+    logger.info(f"Video Keyframe interval: {info.keyframe_interval}")
+    logger.info(f"Video Duration: {info.duration}s")
+    if audio:
+        for track in info.audio:
+            logger.info("Audio Track data:")
+            pprint(track)
+
+
+def get_video_duration(video):
+    """Return the video's duration in seconds, or None if it isn't known."""
+    return probe(video).duration
+
+
+def get_video_size(video):
+    """Return the (width, height) ffmpeg will decode the video at.
+
+    ffmpeg auto-rotates on decode, so rotated videos have their width and
+    height swapped.
+    """
+    size = probe(video).size
+    if size is None:
+        raise ValueError(f"No video track found in {video}")
+    return size
 
 
 # =========================================================================== #
@@ -85,6 +111,7 @@ def make_output_dirs(fileName):
 # =========================================================================== #
 # ______________________ Subprocess > Shell Command   _______________________ #
 # =========================================================================== #
+STRATEGIES = ("all", "fps", "decimate", "scene", "keyframes")
 
 
 class ffmpegCommander:
@@ -103,6 +130,27 @@ class ffmpegCommander:
         strip_audio=True,
         strip_subtitles=True,
         verbose=False,
+        name=None,
+        spinner=True,
+        exit_on_error=True,
+        on_progress=None,
+        in_memory=False,
+        max_distance=0,
+        dedup="global",
+        best_per_shot=None,
+        blur_metric="fft",
+        blur_thresh=None,
+        analysis_width=None,
+        output_format=None,
+        strategy=None,
+        fps=1.0,
+        scene_threshold=0.3,
+        min_gap=0.0,
+        keyframe_step=1,
+        segment=None,
+        thread_profile=None,
+        resume=False,
+        overwrite=False,
     ) -> None:
         self.i = input
         self.o = output
@@ -111,9 +159,99 @@ class ffmpegCommander:
         self.s_s = strip_subtitles
         self.verbose = verbose
 
-        # Seek start
-        if ss:
-            self._seek_start(ss_h, ss_m, ss_s, ss_mi)
+        # Output folder/file name, defaults to the video filename (minus the extension)
+        self.name = name or PurePath(self.i).stem
+
+        # Batch runs turn these off: no spinner per thread, and errors are
+        # raised to the caller rather than exiting the whole program
+        self.spinner = spinner
+        self.exit_on_error = exit_on_error
+
+        # Optional callback, handed each `runner.FFmpegProgress` update
+        self.on_progress = on_progress
+
+        # Stream raw frames to Python and only write the ones worth keeping
+        self.in_memory = in_memory
+        self.max_distance = max_distance
+        self.blur_metric = blur_metric
+        self.blur_thresh = blur_thresh
+        self.analysis_width = analysis_width
+
+        # "temporal" dedup (against the last frame kept, in constant
+        # memory) runs in the frame stream even without `in_memory`
+        self.dedup = dedup
+
+        # Keep only the sharpest N frames of each shot, see `frames.ShotSelector`
+        self.best_per_shot = best_per_shot
+
+        # Image format and encoder settings, see `formats.OutputFormat`
+        self.format = output_format or OutputFormat()
+
+        # Frames go through Python, rather than straight to disk from ffmpeg
+        self.piped = (
+            in_memory
+            or dedup == "temporal"
+            or best_per_shot is not None
+            or self.format.needs_pipe
+        )
+
+        # How frames are picked: every frame ("all"), a fixed rate ("fps"),
+        # dropping near-identical frames ("decimate"), one frame per
+        # visual change ("scene"), or only decoding keyframes ("keyframes").
+        # `decimate=True` is the old spelling of "decimate".
+        self.strategy = strategy or ("decimate" if decimate else "all")
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {self.strategy!r}, pick from {STRATEGIES}")
+        self.fps = fps
+        self.scene_threshold = scene_threshold
+        self.min_gap = min_gap
+        self.keyframe_step = keyframe_step
+
+        # Seek start (applied on the input side, in `_set_input`)
+        self.ss = (ss_h, ss_m, ss_s, ss_mi) if ss else None
+
+        # One slice of the timeline, when a video is split up by `segments.py`
+        self.segment = segment
+
+        # Workers/threads from `screenshooter --calibrate`, see `tuning.py`
+        self.thread_profile = thread_profile or load_profile()
+
+        # Pick up (or skip) videos an earlier run extracted, or start over,
+        # when the output folder already exists; see `resume.ExtractState`
+        self.resume = resume
+        self.overwrite = overwrite
+        self.options = extract_options(
+            strategy=strategy,
+            decimate=decimate,
+            fps=fps,
+            scene_threshold=scene_threshold,
+            min_gap=min_gap,
+            keyframe_step=keyframe_step,
+            ss=ss,
+            ss_h=ss_h,
+            ss_m=ss_m,
+            ss_s=ss_s,
+            ss_mi=ss_mi,
+            in_memory=in_memory,
+            max_distance=max_distance,
+            dedup=dedup,
+            best_per_shot=best_per_shot,
+            blur_metric=blur_metric,
+            blur_thresh=blur_thresh,
+            analysis_width=analysis_width,
+            output_format=self.format,
+        )
+        self.state = None
+        self.resume_point = None
+        self.skipped = False
+
+        # Resumable runs journal each frame's timestamp as ffmpeg writes it
+        # (frames piped through Python, and segments, restart instead)
+        self.journaled = (
+            resume
+            and segment is None
+            and not self.piped
+        )
 
         # Function timer, just some FYI
         self.timer = Timer()
@@ -122,16 +260,32 @@ class ffmpegCommander:
         self.cmd: List[str] = ["ffmpeg"]
 
         # Do the thing...
-        self._cmd_builder()
+        with profiler.stage(self.name):
+            self._cmd_builder()
 
     def _cmd_builder(self):
+        # Output folder, and whether an earlier run already did (some of) the work
+        self._prepare_output()
+        if self.skipped:
+            return
+
         # Input
         self._set_input()
 
         # Filters
-        if self.d:
+        windowed = self.segment is not None or self.journaled
+        if (
+            self.strategy not in ("all", "keyframes")
+            or self.keyframe_step > 1
+            or windowed
+        ):
             self._append_video_filters()
 
+        if self.strategy == "keyframes" or (windowed and self.strategy != "scene"):
+            # Pass timestamps straight through, instead of duplicating
+            # frames to fill gaps (between keyframes, or before a segment)
+            self.cmd.extend(["-vsync", "passthrough"])
+
         # Flags
         if self.s_a:
             # -an = strip out audio (may be unnecessary)
@@ -145,9 +299,46 @@ class ffmpegCommander:
         self._append_output()
 
     def _seek_start(self, hours, mins, secs, mils):
+        # `mils` are the digits after the decimal point: 5 is `.5`, half a second
         self.cmd.extend(["-ss", f"{hours}:{mins}:{secs}.{mils}"])
 
+    def _set_window_input(self, seek, until=None):
+        """Seek to `seek` and read up to `until` seconds, keeping the
+        original timestamps for a window `select` to cut on (see
+        `segments.Segment` and `resume.ResumePoint`).
+        """
+        seek = round(max(0.0, seek), 3)
+        self.cmd.extend(["-ss", f"{seek:.3f}"])
+
+        if until is not None:
+            self.cmd.extend(["-t", f"{until - seek:.3f}"])
+
+        self.cmd.extend(["-copyts", "-start_at_zero"])
+
     def _set_input(self):
+        if self.segment is not None:
+            end = self.segment.end
+            self._set_window_input(
+                self.segment.seek, None if end is None else end + self.segment.margin
+            )
+        elif self.resume_point is not None:
+            # A second of run-up, so stateful filters settle before the cut
+            self._set_window_input(self.resume_point.seconds - 1.0)
+        else:
+            if self.ss:
+                self._seek_start(*self.ss)
+            if self.journaled:
+                # The same timestamps a resumed run will see
+                self.cmd.extend(["-copyts", "-start_at_zero"])
+
+        if self.strategy == "keyframes":
+            # -skip_frame nokey = the decoder skips everything but keyframes,
+            # so the rest are never decoded at all
+            self.cmd.extend(["-skip_frame", "nokey"])
+
+        if self.thread_profile is not None:
+            self.cmd.extend(self.thread_profile.input_args())
+
         # -i = input
         # input path as string
         self.cmd.extend(["-i", str(self.i)])
@@ -163,9 +354,124 @@ class ffmpegCommander:
         video and audio respectively).
         ======================================================================
         """
-        # Decimate
-        logger.debug("Adding Video Filter: Decimate")
-        self.cmd.extend(["-vf", "mpdecimate,setpts=N/FRAME_RATE/TB"])
+        filters = []
+
+        if self.strategy == "fps":
+            # Fixed-rate sampling
+            logger.debug(f"Adding Video Filter: fps={self.fps}")
+            filters.append(f"fps={self.fps}")
+
+        elif self.strategy == "decimate":
+            # Decimate
+            logger.debug("Adding Video Filter: Decimate")
+            filters.extend(["mpdecimate", "setpts=N/FRAME_RATE/TB"])
+
+        elif self.strategy == "keyframes":
+            # Only keyframes reach the filter, so `n` counts keyframes
+            logger.debug(f"Adding Video Filter: every {self.keyframe_step} keyframes")
+            filters.append(f"select='not(mod(n,{self.keyframe_step}))'")
+
+        elif self.strategy == "scene":
+            logger.debug(f"Adding Video Filter: Scene change > {self.scene_threshold}")
+            filters.append(f"select='{self._scene_expr()}'")
+
+        # Keep only this segment's frames (or those after where an earlier
+        # run stopped), and journal what's written, before `setpts`
+        # rewrites the timestamps
+        cut = []
+        if self.segment is not None:
+            cut.append(self.segment.window())
+        elif self.resume_point is not None:
+            cut.append(f"select='gt(pts,{self.resume_point.pts})'")
+        if self.journaled:
+            cut.append(self.state.journal_filter())
+
+        at = len(filters)
+        if "setpts=N/FRAME_RATE/TB" in filters:
+            at = filters.index("setpts=N/FRAME_RATE/TB")
+        filters[at:at] = cut
+
+        self.cmd.extend(["-vf", ",".join(filters)])
+
+        if self.strategy == "scene":
+            # Only emit the selected frames, rather than duplicating them
+            # to fill a constant frame rate
+            self.cmd.extend(["-vsync", "vfr"])
+
+    def _scene_expr(self):
+        """The `select` expression for the scene strategy.
+
+        Picks the first frame, then every frame whose scene-change score
+        beats the threshold, as long as at least `min_gap` seconds have
+        passed since the last pick.
+        """
+        expr = f"gt(scene,{self.scene_threshold})"
+        if self.min_gap:
+            expr += f"*(isnan(prev_selected_t)+gte(t-prev_selected_t,{self.min_gap}))"
+
+        return f"eq(n,0)+{expr}"
+
+    def _prepare_output(self):
+        """Make the video's output folder, and decide what to do if an
+        earlier run already made it: with `resume`, skip a finished video
+        or continue a partial one; with `overwrite`, start over.
+        """
+        # Make output directory, using the name of the video file
+        new_dir = self.o.joinpath(self.name)
+
+        try:
+            # Segments of one video all share its (already made) folder
+            Path.mkdir(
+                new_dir,
+                exist_ok=self.segment is not None or self.resume or self.overwrite,
+            )
+            self.o = new_dir
+
+        except FileNotFoundError as e:
+            logger.error("A missing parent folder - problem in the path.")
+            if not self.exit_on_error:
+                raise
+            exit(e)
+
+        except FileExistsError as e:
+            logger.error(f"{new_dir} already exists, use --resume or --overwrite")
+            if not self.exit_on_error:
+                raise
+            exit(e)
+
+        # `segments.run_segments` keeps the state for the whole video
+        if self.segment is not None:
+            return
+
+        self.state = ExtractState(self.o, self.name, self.format.ext)
+
+        if self.resume and self.state.is_complete(self.i, self.options):
+            logger.info(f"{self.name} was already extracted, skipping")
+            self.skipped = True
+            return
+
+        if self.resume and self.journaled and self.state.matches(self.i, self.options):
+            self.resume_point = self.state.resume_point()
+        else:
+            self.state.clear()
+
+        self.state.begin(self.i, self.options)
+
+    @property
+    def _part(self) -> int:
+        """Which part of the video this is, for `metrics` (segment or 0)."""
+        return self.segment.index if self.segment is not None else 0
+
+    def _output_bytes(self) -> int:
+        """Bytes of this run's frames on disk (for the profiler)."""
+        return sum(
+            p.stat().st_size
+            for p in self.o.glob(f"{glob_escape(self.file_name)}-*.{self.format.ext}")
+        )
+
+    def _finish(self):
+        if self.state is not None:
+            self.state.finish(len(self.state.frame_files()))
 
     def _append_output(self):
         """=====================    OUTPUT     ===============================
@@ -178,34 +484,36 @@ class ffmpegCommander:
         Note the `%04d` is a variable ffmpeg uses to indicate an
         incraminting number with 4 integers, such as:
             `Image-0001.png', `Image-0002.png`, etc.
+        (or `.jpg`, `.webp`, `.npy`, depending on the output format)
         ======================================================================
         """
-        # Get the video filename (minus the extension)
-        file_name = PurePath(self.i).stem
+        file_name = self.name
 
-        # Make output directory, using the name of the video file
-        new_dir = self.o.joinpath(file_name)
+        if self.segment is not None:
+            # Renumbered into one sequence once every segment is done
+            file_name = self.segment.prefix(file_name)
+        self.file_name = file_name
 
-        try:
-            Path.mkdir(new_dir)
-            self.o = self.o.joinpath(file_name)
+        if self.piped:
+            # Raw frames go to a pipe, and we write the images ourselves
+            # (with OpenCV and numpy, only loaded when frames are piped)
+            from .frames import raw_output_args
 
-        except FileNotFoundError as e:
-            logger.error("A missing parent folder - problem in the path.")
-            exit(e)
+            self.cmd.extend(raw_output_args())
+            self.send_frames()
+            return
 
-        # except FileExistsError as e:
-        #     logger.debug("The output folder already exists")
+        # Encoder settings
+        self.cmd.extend(self.format.ffmpeg_args())
+        if self.thread_profile is not None:
+            self.cmd.extend(self.thread_profile.output_args())
 
-        #     if self.overwrite:
-        #         Path.mkdir(new_dir, exist_ok=True)
-        #         output_dir = output_dir.joinpath(fileName)
-        #     else:
-        #         logger.info("Exiting...")
-        #         exit(e)
+        if self.resume_point is not None:
+            # Carry on numbering after the frames already there
+            self.cmd.extend(["-start_number", str(self.resume_point.frames + 1)])
 
         # Convert Path to string
-        output_str = str(self.o.joinpath(f"{file_name}-%04d.png"))
+        output_str = str(self.o.joinpath(f"{file_name}-%04d.{self.format.ext}"))
 
         # Append it...
         self.cmd.append(output_str)
@@ -213,11 +521,76 @@ class ffmpegCommander:
         # And send it...
         self.send()
 
-    def send(self):
-        """Sends command to the shell via `subprocess`
+    def send_frames(self):
+        """Runs the in-memory pipeline: ffmpeg decodes to a pipe and only
+        frames that survive dedup and the blur check are encoded.
+        """
+        from .frames import extract_frames
+
+        logger.debug(f"Sending raw frame command: {self.cmd}")
+        self.timer.start()
+
+        try:
+            size = get_video_size(self.i)
+            live = metrics.active()
+
+            def on_frames(stats, elapsed):
+                # No realtime speed here: frames arrive already filtered
+                live.progress(
+                    self.name,
+                    self._part,
+                    stats.read / elapsed if elapsed else 0.0,
+                    frames=stats.read,
+                    kept=stats.written,
+                    duplicates=stats.duplicates,
+                    blurry=stats.blurry,
+                    bytes=stats.bytes,
+                )
+
+            with profiler.stage("extract") as counts:
+                self.stats = extract_frames(
+                    self.cmd,
+                    size,
+                    self.o,
+                    self.file_name,
+                    deduplicate=self.in_memory or self.dedup == "temporal",
+                    remove_blurry=self.in_memory,
+                    max_distance=self.max_distance,
+                    dedup=self.dedup,
+                    best_per_shot=self.best_per_shot,
+                    blur_metric=self.blur_metric,
+                    blur_thresh=self.blur_thresh,
+                    analysis_width=self.analysis_width,
+                    output_format=self.format,
+                    on_progress=on_frames if live is not None else None,
+                )
+                if counts is not None:
+                    counts["frames"] += self.stats.read
+                if live is not None:
+                    live.part_done(
+                        self.name,
+                        self._part,
+                        frames=self.stats.read,
+                        kept=self.stats.written,
+                        duplicates=self.stats.duplicates,
+                        blurry=self.stats.blurry,
+                        bytes=self.stats.bytes,
+                    )
+
+            self.timer.stop()
+            self._finish()
+            logger.info("✨🌟  Complete! ⭐️✨\n")
 
-        Args:
-            cmd (List[str]): [description]
+        except subprocess.CalledProcessError as err:
+            self.timer.stop()
+            logger.error("🎃    ‼️ Error in your subprocess command‼️")
+            if not self.exit_on_error:
+                raise
+            exit(err)
+
+    def send(self):
+        """Sends command to ffmpeg via the async `runner`, streaming its
+        progress into the spinner (and `on_progress`) as it goes.
         """
 
         logger.debug(f"Sending subprocess command: {self.cmd}")
@@ -229,40 +602,97 @@ class ffmpegCommander:
                 ["😸", ". 😹", ".. 😼", "... 😻", ".... 😾", "..... 😿", "...... 😽", "....... 🙀"], 500
             )
 
-            with yaspin(sp, text="Cats at work!!!"):  # cats consuming code :)
-                completed = subprocess.run(
-                    self.cmd,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True,
-                    shell=False,
-                )
-
-            if completed.returncode == 0:
-                logger.info("Capture complete...")
-                logger.info("Initiating cleanup... ")
-                # FileCleanup(dataset=output_dir)
-                # Turned off FileCleanup temporarily
+            with yaspin(sp, text="Cats at work!!!") if self.spinner else nullcontext() as spin:  # cats consuming code :)
+
+                def on_progress(progress):
+                    if spin is not None:
+                        spin.text = (
+                            f"Cats at work!!! frame {progress.frame} | "
+                            f"{progress.fps:0.1f} fps | {progress.speed:0.2f}x | "
+                            f"{progress.out_time.split('.')[0]}"
+                        )
+                    if self.on_progress is not None:
+                        self.on_progress(progress)
+                    if live is not None:
+                        live.progress(
+                            self.name,
+                            self._part,
+                            progress.fps,
+                            progress.speed,
+                            frames=progress.frame,
+                            kept=progress.frame,
+                        )
+
+                live = metrics.active()
+                with profiler.stage("extract") as counts:
+                    completed = runner.run(self.cmd, on_progress=on_progress)
+
+                    frames = completed.progress.frame
+                    if counts is not None or live is not None:
+                        # ffmpeg's `total_size` doesn't count image2 output
+                        written = self._output_bytes()
+                    if counts is not None:
+                        counts["frames"] += frames
+                        counts["bytes"] += written
+                    if live is not None:
+                        live.part_done(
+                            self.name, self._part, frames=frames, kept=frames, bytes=written
+                        )
+
+            logger.info("Capture complete...")
+            logger.info("Initiating cleanup... ")
+            # FileCleanup(dataset=output_dir)
+            # Turned off FileCleanup temporarily
 
-                self.timer.stop()
-                logger.info("✨🌟  Complete! ⭐️✨\n")
-            else:
-                self.timer.stop()
-                logger.info(f"🎃 Return code: {completed.returncode}\n")
+            self.timer.stop()
+            self._finish()
+            logger.info("✨🌟  Complete! ⭐️✨\n")
 
             if self.verbose:
-                self.timer.stop()
-                logger.info(f"Bytes in stdout: {len(completed.stdout)}")
-                _stdout = completed.stdout.decode("utf-8")
-                logger.info(f"stdout: {_stdout}")
-
-                _stderr = completed.stderr.decode("utf-8")
-                logger.info(f"stderr: {_stderr}")
+                logger.info(f"Frames written: {completed.progress.frame}")
+                _stderr = "\n".join(completed.stderr_tail)
+                logger.info(f"stderr (tail): {_stderr}")
 
         except subprocess.CalledProcessError as err:
             self.timer.stop()
             logger.error("🎃    ‼️ Error in your subprocess command‼️")
+            if not self.exit_on_error:
+                raise
             exit(err)
 
         return
+
+
+def extract_options(**kwargs):
+    """The `ffmpegCommander` options a video's frames depend on, with its
+    defaults filled in. An earlier run's frames are only reused (or the
+    video skipped) when these match.
+    """
+    bound = inspect.signature(ffmpegCommander).bind_partial(None, None, **kwargs)
+    bound.apply_defaults()
+    args = bound.arguments
+
+    start = [args["ss_h"], args["ss_m"], args["ss_s"], args["ss_mi"]]
+    return {
+        "strategy": args["strategy"] or ("decimate" if args["decimate"] else "all"),
+        "fps": args["fps"],
+        "scene_threshold": args["scene_threshold"],
+        "min_gap": args["min_gap"],
+        "keyframe_step": args["keyframe_step"],
+        "start": start if args["ss"] else None,
+        "in_memory": args["in_memory"],
+        "max_distance": args["max_distance"],
+        "dedup": args["dedup"],
+        "best_per_shot": args["best_per_shot"],
+        "blur_metric": args["blur_metric"],
+        "blur_thresh": args["blur_thresh"],
+        "analysis_width": args["analysis_width"],
+        "format": asdict(args["output_format"] or OutputFormat()),
+    }
+
+
+def seek_seconds(hours=0, mins=0, secs=0, mils=0) -> float:
+    """The `ss_*` start position in seconds, read the way `-ss` reads it
+    (see `ffmpegCommander._seek_start`).
+    """
+    return hours * 3600 + mins * 60 + secs + float(f"0.{mils}")
@@ -0,0 +1,313 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# =========================================================================== #
+# ______________________       Video Metrics        _________________________ #
+# =========================================================================== #
+STATES = ("queued", "running", "done", "failed")
+COUNTS = ("frames", "bytes", "kept", "duplicates", "blurry")
+
+
+@dataclass
+class VideoMetrics:
+    """Live throughput numbers for one video in a batch.
+
+    A video runs as one part, or one per segment side by side. Each
+    running part reports its own totals; a finished part's are folded
+    into `done`.
+
+    Attributes:
+        name: The video's output name (unique within a batch).
+        state: One of `STATES`.
+        done: `COUNTS` totals of finished parts: frames processed (decoded
+            in memory, or output by ffmpeg's own filters), bytes and
+            frames written (`kept`), and frames rejected in memory
+            (`duplicates`, `blurry`).
+        parts: Each running part's `COUNTS`, plus its `fps` and `speed`.
+        elapsed: Seconds from start to finish.
+        updated: Wall-clock time of the last progress, for stall alerts.
+    """
+
+    name: str
+    state: str = "queued"
+    done: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(COUNTS, 0))
+    parts: Dict[int, Dict] = field(default_factory=dict)
+    elapsed: float = 0.0
+    updated: float = 0.0
+
+    def total(self, key) -> float:
+        return self.done.get(key, 0) + sum(p.get(key, 0) for p in self.parts.values())
+
+    @property
+    def fps(self) -> float:
+        if self.parts:
+            return self.total("fps")
+        # Once done, the average
+        return self.done["frames"] / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def speed(self) -> float:
+        return self.total("speed") if self.parts else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "video": self.name,
+            "state": self.state,
+            **{key: self.total(key) for key in COUNTS},
+            "fps": round(self.fps, 3),
+            "speed": round(self.speed, 3),
+            "elapsed": round(self.elapsed, 3),
+            "updated": round(self.updated, 3),
+        }
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Collects per-video throughput and queue depth for a batch, and
+    exports it while the batch runs.
+
+    `textfile` is rewritten (atomically, so a scrape never sees half a
+    file) in the Prometheus text format for node-exporter's textfile
+    collector, at most every `interval` seconds, and whenever a video
+    changes state. `jsonl` gets one JSON object per event: a video queued,
+    started, progressed or finished.
+
+    Finished videos are dropped `retention` seconds after they finish, so
+    a long-running `--watch` doesn't export an ever-growing set of series;
+    the `videos` gauge still counts them.
+
+    Args:
+        textfile (Path, optional): A `*.prom` file in the collector's folder.
+        jsonl (Path, optional): A JSON-lines file to append events to.
+        interval (float, optional): Minimum seconds between textfile
+            rewrites on progress alone. Defaults to 5.
+        retention (float, optional): Seconds to keep exporting a finished
+            video. Defaults to an hour.
+    """
+
+    def __init__(
+        self, textfile=None, jsonl=None, interval=5.0, retention=3600.0, clock=time.time
+    ):
+        self.textfile = Path(textfile) if textfile else None
+        self.interval = interval
+        self.retention = retention
+        self.clock = clock
+        self.videos: Dict[str, VideoMetrics] = {}
+        # Finished videos dropped after `retention`, by state
+        self.retired: Dict[str, int] = Counter()
+        self._lock = threading.Lock()
+        self._written = 0.0
+        self._stream = Path(jsonl).open("a", encoding="utf-8") if jsonl else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _video(self, name) -> VideoMetrics:
+        if name not in self.videos:
+            self.videos[name] = VideoMetrics(name, updated=self.clock())
+        return self.videos[name]
+
+    def queue_depth(self) -> int:
+        return sum(v.state == "queued" for v in self.videos.values())
+
+    def _prune(self, now) -> None:
+        # Called with the lock held
+        for video in list(self.videos.values()):
+            if video.state in ("done", "failed") and now - video.updated > self.retention:
+                del self.videos[video.name]
+                self.retired[video.state] += 1
+
+    # ======  Events  ====== #
+    def queued(self, name) -> None:
+        with self._lock:
+            self._video(name)
+            self._emit("queued", name, force=True)
+
+    def started(self, name) -> None:
+        with self._lock:
+            video = self._video(name)
+            video.state = "running"
+            video.updated = self.clock()
+            self._emit("started", name, force=True)
+
+    def progress(self, name, part=0, fps=0.0, speed=0.0, **counts) -> None:
+        """A running part's latest `COUNTS` totals, fps and speed."""
+        with self._lock:
+            video = self._video(name)
+            video.state = "running"
+            video.parts[part] = dict(counts, fps=fps, speed=speed)
+            video.updated = self.clock()
+            self._emit("progress", name)
+
+    def part_done(self, name, part=0, **counts) -> None:
+        """A part's final `COUNTS`, replacing its live numbers."""
+        with self._lock:
+            video = self._video(name)
+            video.parts.pop(part, None)
+            for (key, value) in counts.items():
+                video.done[key] += value
+            video.updated = self.clock()
+
+    def finished(self, name, ok=True, elapsed=0.0) -> None:
+        with self._lock:
+            video = self._video(name)
+            video.state = "done" if ok else "failed"
+            video.elapsed = elapsed
+            # Parts that never reported as done (a failure) count as they were
+            for part in video.parts.values():
+                for key in COUNTS:
+                    video.done[key] += part.get(key, 0)
+            video.parts.clear()
+            video.updated = self.clock()
+            self._emit("finished", name, force=True)
+
+    # ======  Export  ====== #
+    def _emit(self, event, name, force=False) -> None:
+        # Called with the lock held
+        now = self.clock()
+        self._prune(now)
+        if self._stream is not None:
+            line = {"ts": round(now, 3), "event": event, **self.videos[name].as_dict()}
+            line["queue_depth"] = self.queue_depth()
+            self._stream.write(json.dumps(line) + "\n")
+            self._stream.flush()
+
+        if self.textfile is not None and (force or now - self._written >= self.interval):
+            self._write_textfile(now)
+
+    def prometheus(self, now=None) -> str:
+        """Every metric, in the Prometheus text exposition format."""
+        videos = list(self.videos.values())
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append(f"# HELP screenshooter_{name} {help}")
+            lines.append(f"# TYPE screenshooter_{name} {kind}")
+            for (labels, value) in samples:
+                text = ",".join(f'{k}="{_label(v)}"' for (k, v) in labels.items())
+                lines.append(f"screenshooter_{name}{{{text}}} {value}")
+
+        def per_video(value):
+            return [({"video": v.name}, value(v)) for v in videos]
+
+        metric(
+            "frames_total",
+            "counter",
+            # ffmpeg writing frames itself only reports what its filters output
+            "Frames processed (decoded in memory, or output by ffmpeg's filters).",
+            per_video(lambda v: v.total("frames")),
+        )
+        metric(
+            "fps",
+            "gauge",
+            "Frames per second (the average, once done).",
+            per_video(lambda v: round(v.fps, 3)),
+        )
+        metric(
+            "speed",
+            "gauge",
+            "Realtime speed factor while running.",
+            per_video(lambda v: round(v.speed, 3)),
+        )
+        metric(
+            "bytes_written_total",
+            "counter",
+            "Bytes of frames written.",
+            per_video(lambda v: v.total("bytes")),
+        )
+        metric(
+            "frames_kept_total", "counter", "Frames written.", per_video(lambda v: v.total("kept"))
+        )
+        metric(
+            "frames_rejected_total",
+            "counter",
+            "Frames dropped in memory, by reason.",
+            [({"video": v.name, "reason": "duplicate"}, v.total("duplicates")) for v in videos]
+            + [({"video": v.name, "reason": "blurry"}, v.total("blurry")) for v in videos],
+        )
+        metric(
+            "last_progress_timestamp_seconds",
+            "gauge",
+            "When the video last made progress; a stalled worker stops moving this.",
+            per_video(lambda v: round(v.updated, 3)),
+        )
+        metric(
+            "videos",
+            "gauge",
+            "Videos in the batch, by state.",
+            [
+                ({"state": s}, sum(v.state == s for v in videos) + self.retired[s])
+                for s in STATES
+            ],
+        )
+        lines.append("# HELP screenshooter_queue_depth Videos waiting for a worker.")
+        lines.append("# TYPE screenshooter_queue_depth gauge")
+        lines.append(f"screenshooter_queue_depth {self.queue_depth()}")
+        lines.append("# HELP screenshooter_last_update_timestamp_seconds When this file was written.")
+        lines.append("# TYPE screenshooter_last_update_timestamp_seconds gauge")
+        lines.append(f"screenshooter_last_update_timestamp_seconds {now or self.clock()}")
+
+        return "\n".join(lines) + "\n"
+
+    def _write_textfile(self, now) -> None:
+        # Write and rename, so the collector never reads a partial file
+        tmp = self.textfile.with_name(f".{self.textfile.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.prometheus(now))
+        os.replace(tmp, self.textfile)
+        self._written = now
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.textfile is not None:
+                now = self.clock()
+                self._prune(now)
+                self._write_textfile(now)
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+
+# =========================================================================== #
+# ______________________       Active Metrics       _________________________ #
+# =========================================================================== #
+# Like `profiler`, one collector serves the whole process
+_active: Optional[Metrics] = None
+
+
+def enable(metrics) -> Metrics:
+    global _active
+    _active = metrics
+    return _active
+
+
+def disable() -> Optional[Metrics]:
+    global _active
+    (metrics, _active) = (_active, None)
+    return metrics
+
+
+def active() -> Optional[Metrics]:
+    return _active
@@ -0,0 +1,235 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from . import profiler
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+from pymediainfo import MediaInfo
+
+
+# =========================================================================== #
+# ______________________         Media Probe        _________________________ #
+# =========================================================================== #
+@dataclass
+class MediaProbe:
+    """What we need to know about a video before extracting from it.
+
+    Attributes:
+        duration: Seconds.
+        fps: Frames per second (the average, for variable frame rate).
+        width, height: As ffmpeg decodes it, i.e. with `rotation` applied.
+        codec: The video format, e.g. `AVC`, `HEVC`.
+        keyframe_interval: Frames between keyframes (the GOP length), when
+            the container says.
+        frame_count: Frames in the video track, when the container says.
+        audio: Each audio track's MediaInfo data.
+    """
+
+    duration: Optional[float] = None
+    fps: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    codec: Optional[str] = None
+    keyframe_interval: Optional[int] = None
+    frame_count: Optional[int] = None
+    bit_rate: Optional[int] = None
+    rotation: int = 0
+    audio: List[Dict] = field(default_factory=list)
+
+    @property
+    def size(self) -> Optional[Tuple[int, int]]:
+        if self.width is None or self.height is None:
+            return None
+        return (self.width, self.height)
+
+    @property
+    def pixels(self) -> int:
+        return (self.width or 0) * (self.height or 0)
+
+
+def _number(value, kind=float):
+    try:
+        return kind(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse(video) -> MediaProbe:
+    """Read `video`'s container with MediaInfo (uncached; see `probe`)."""
+    result = MediaProbe()
+    general_duration = None
+
+    for track in MediaInfo.parse(str(video)).tracks:
+        if track.track_type == "General":
+            general_duration = _number(track.duration)
+        elif track.track_type == "Video" and result.width is None:
+            result.duration = _number(track.duration)
+            result.fps = _number(track.frame_rate)
+            result.width = _number(track.width, int)
+            result.height = _number(track.height, int)
+            result.codec = track.format
+            result.frame_count = _number(track.frame_count, int)
+            result.bit_rate = _number(track.bit_rate, int)
+            result.rotation = _number(track.rotation, int) or 0
+
+            # e.g. "M=4, N=50": N frames from one keyframe to the next. x264
+            # (and x265) files usually leave that out, but record the
+            # encoder's "keyint=50" in its settings
+            gop = re.search(r"N=(\d+)", str(track.format_settings__gop or ""))
+            if gop is None:
+                gop = re.search(r"\bkeyint=(\d+)", str(track.encoding_settings or ""))
+            result.keyframe_interval = int(gop.group(1)) if gop else None
+        elif track.track_type == "Audio":
+            result.audio.append(track.to_data())
+
+    # ffmpeg auto-rotates on decode
+    if result.rotation % 180 == 90 and result.size:
+        (result.width, result.height) = (result.height, result.width)
+
+    duration = result.duration or general_duration
+    result.duration = duration / 1000 if duration else None
+
+    return result
+
+
+# =========================================================================== #
+# ______________________         Probe Cache        _________________________ #
+# =========================================================================== #
+PROBE_CACHE_PATH = Path.home().joinpath(".screenshooter-probe.sqlite")
+
+# Bumped whenever `parse` learns something new, so older results are re-probed
+PROBE_VERSION = 2
+
+
+def fingerprint(path, chunk=1 << 16) -> str:
+    """Identify a file by size, mtime and a hash of its first and last `chunk` bytes.
+
+    Reading just the ends keeps this cheap for multi-GB videos, while
+    still telling apart files that happen to share a size and mtime.
+    Renamed or moved files keep their fingerprint.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as f:
+        digest.update(f.read(chunk))
+        if stat.st_size > chunk:
+            f.seek(max(chunk, stat.st_size - chunk))
+            digest.update(f.read(chunk))
+
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+
+class ProbeCache:
+    """`MediaProbe` results kept in SQLite, keyed by `fingerprint`.
+
+    Lookups are also memoized per path (while its size and mtime hold), so
+    repeated calls in one run don't even re-read the file's ends. Safe to
+    share between threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get("SCREENSHOOTER_PROBE_CACHE", PROBE_CACHE_PATH))
+        self._lock = threading.Lock()
+        self._memo = {}
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS probe (fingerprint TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def probe(self, video) -> MediaProbe:
+        stat = os.stat(video)
+        memo_key = (str(Path(video).resolve()), stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            if memo_key in self._memo:
+                return self._memo[memo_key]
+
+        key = f"{PROBE_VERSION}:{fingerprint(video)}"
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM probe WHERE fingerprint = ?", (key,)
+            ).fetchone()
+
+        if row is not None:
+            result = MediaProbe(**json.loads(row[0]))
+        else:
+            logger.debug(f"Probing {video}")
+            result = parse(video)
+            profiler.count(parsed=1)
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO probe VALUES (?, ?)",
+                    (key, json.dumps(asdict(result), default=str)),
+                )
+                self._db.commit()
+
+        with self._lock:
+            self._memo[memo_key] = result
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def probe(video, cache=True) -> MediaProbe:
+    """Return `video`'s `MediaProbe`, from the shared on-disk cache if possible.
+
+    Args:
+        video (Path): The video file.
+        cache (bool, optional): Use the cache. Defaults to True.
+    """
+    with profiler.stage("probe"):
+        return _probe(video, cache)
+
+
+def _probe(video, cache):
+    global _default_cache
+
+    if not cache:
+        return parse(video)
+
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = ProbeCache()
+            except sqlite3.Error as err:
+                logger.warning(f"Probe cache unavailable, probing uncached: {err}")
+                _default_cache = False
+
+    if _default_cache is False:
+        return parse(video)
+    return _default_cache.probe(video)
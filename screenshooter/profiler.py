@@ -0,0 +1,256 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+
+# =========================================================================== #
+# ______________________       Stage Profiler       _________________________ #
+# =========================================================================== #
+# The stages the pipeline reports (a video's name is the root above them)
+STAGES = ("probe", "extract", "hash", "blur", "sort", "write")
+
+# Spans kept for `save_trace`; past this the oldest are dropped, so a
+# long `--watch --profile` run holds its latest spans, not all of them
+MAX_EVENTS = 100_000
+
+
+@dataclass
+class StageStats:
+    """Everything recorded for one stage path, e.g. `clip/extract/hash`.
+
+    Attributes:
+        seconds: Total wall time spent in the stage.
+        calls: How many times it ran.
+        counters: Summed counters, e.g. `frames`, `bytes`.
+    """
+
+    seconds: float = 0.0
+    calls: int = 0
+    counters: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def add(self, seconds, calls=1, **counters) -> None:
+        self.seconds += seconds
+        self.calls += calls
+        for (key, value) in counters.items():
+            self.counters[key] += value
+
+
+class Profiler:
+    """Times nested, named stages across a batch, on any number of threads.
+
+    Stages nest per thread: a `stage("extract")` opened inside
+    `stage("clip")` is recorded as `clip/extract`. Each one is kept twice:
+    summed per path for `summary`, and as a span for `save_trace` (the
+    latest `max_events` of them). Hot loops that can't afford a context
+    manager per frame time themselves and hand the totals to `record`.
+    A video done with can be taken out of the per-path stats with `drain`.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.stages: Dict[str, StageStats] = defaultdict(StageStats)
+        self.events: Deque[Dict] = deque(maxlen=max_events)
+        self.dropped = 0
+        # Totals per stage name of the paths `drain` has taken out
+        self.drained: Dict[str, StageStats] = defaultdict(StageStats)
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def path(self) -> str:
+        """The current thread's open stage path, e.g. `clip/extract`."""
+        return "/".join(name for (name, _) in self._stack())
+
+    @contextmanager
+    def stage(self, name, parent=None, **counters):
+        """Time the body as stage `name`, nested under whatever stage this
+        thread (or `parent`, a `path()` from another thread) has open.
+        """
+        stack = self._stack()
+        base = self.path() if parent is None else parent
+        path = f"{base}/{name}" if base else name
+
+        counts = defaultdict(int, counters)
+        stack.append((name, counts))
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.stages[path].add(elapsed, **counts)
+                if len(self.events) == self.events.maxlen:
+                    self.dropped += 1
+                self.events.append(
+                    {
+                        "name": name,
+                        "cat": path.split("/", 1)[0],
+                        "ph": "X",
+                        "ts": (start - self.origin) * 1e6,
+                        "dur": elapsed * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": dict(counts, path=path),
+                    }
+                )
+
+    def count(self, **counters) -> None:
+        """Add to the counters of this thread's innermost open stage."""
+        stack = self._stack()
+        if stack:
+            counts = stack[-1][1]
+            for (key, value) in counters.items():
+                counts[key] += value
+
+    def record(self, name, seconds, calls=1, parent=None, **counters) -> None:
+        """Add time spent in stage `name` without a span, e.g. a frame
+        loop's total hashing time, under this thread's open stage.
+        """
+        base = self.path() if parent is None else parent
+        path = f"{base}/{name}" if base else name
+        with self._lock:
+            self.stages[path].add(seconds, calls, **counters)
+
+    def summary(self) -> Dict:
+        """Per-path stats (with time not spent in child stages as
+        `self_seconds`), and totals per stage name across the batch,
+        drained videos included.
+        """
+        with self._lock:
+            stages = {p: s for (p, s) in sorted(self.stages.items())}
+            drained = {n: s for (n, s) in self.drained.items()}
+
+        return _summarize(stages, drained, time.perf_counter() - self.origin)
+
+    def drain(self, root) -> Dict:
+        """Take the stages under `root` (e.g. a finished video's name) out
+        of the per-path stats, and return their `summary`. They still
+        count towards the totals of later summaries.
+        """
+        prefix = f"{root}/"
+        with self._lock:
+            stages = {
+                p: self.stages.pop(p)
+                for p in sorted(self.stages)
+                if p == root or p.startswith(prefix)
+            }
+            for (path, stats) in stages.items():
+                name = path.rsplit("/", 1)[-1]
+                if name in STAGES:
+                    self.drained[name].add(stats.seconds, stats.calls, **stats.counters)
+
+        wall = stages[root].seconds if root in stages else 0.0
+        return _summarize(stages, {}, wall)
+
+    def save_json(self, path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.summary(), indent=2))
+        return path
+
+    def save_trace(self, path) -> Path:
+        """Write the spans in Chrome's trace event format, for
+        `chrome://tracing` or https://ui.perfetto.dev.
+        """
+        with self._lock:
+            trace = {
+                "traceEvents": list(self.events),
+                "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped},
+            }
+
+        path = Path(path)
+        path.write_text(json.dumps(trace))
+        return path
+
+
+def _summarize(stages, drained, wall) -> Dict:
+    # `Profiler.summary` of some stage paths, plus totals already drained
+    children = defaultdict(float)
+    for (path, stats) in stages.items():
+        if "/" in path:
+            children[path.rsplit("/", 1)[0]] += stats.seconds
+
+    totals: Dict[str, StageStats] = defaultdict(StageStats)
+    for (name, stats) in drained.items():
+        totals[name].add(stats.seconds, stats.calls, **stats.counters)
+    for (path, stats) in stages.items():
+        name = path.rsplit("/", 1)[-1]
+        if name in STAGES:
+            totals[name].add(stats.seconds, stats.calls, **stats.counters)
+
+    def as_dict(stats, path=None):
+        data = {
+            "seconds": round(stats.seconds, 6),
+            "calls": stats.calls,
+            "counters": dict(stats.counters),
+        }
+        if path is not None:
+            data["self_seconds"] = round(max(0.0, stats.seconds - children[path]), 6)
+        return data
+
+    return {
+        "wall_seconds": round(wall, 6),
+        "stages": {p: as_dict(s, p) for (p, s) in stages.items()},
+        "totals": {n: as_dict(totals[n]) for n in STAGES if n in totals},
+    }
+
+
+# =========================================================================== #
+# ______________________      Active Profiler       _________________________ #
+# =========================================================================== #
+# Like the logger, one profiler serves the whole process, so stages can be
+# reported from anywhere without passing it down every call
+_active: Optional[Profiler] = None
+
+
+def enable(profiler=None) -> Profiler:
+    global _active
+    _active = profiler or Profiler()
+    return _active
+
+
+def disable() -> Optional[Profiler]:
+    global _active
+    (profiler, _active) = (_active, None)
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    return _active
+
+
+def stage(name, **counters):
+    """`Profiler.stage` on the active profiler; a no-op when profiling is off.
+
+    Yields the stage's counters (a dict to add to), or None when off.
+    """
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name, **counters)
+
+
+def count(**counters) -> None:
+    if _active is not None:
+        _active.count(**counters)
+
+
+def record(name, seconds, calls=1, parent=None, **counters) -> None:
+    if _active is not None:
+        _active.record(name, seconds, calls, parent, **counters)
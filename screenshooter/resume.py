@@ -0,0 +1,215 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from .probe import fingerprint
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________      Extraction State      _________________________ #
+# =========================================================================== #
+@dataclass
+class ResumePoint:
+    """Where a partial extraction picks up again.
+
+    Attributes:
+        frames: Frames already on disk (the next one is `frames + 1`).
+        pts: The last kept frame's timestamp, in the filter's time base.
+        seconds: The same timestamp in seconds, for seeking.
+    """
+
+    frames: int
+    pts: int
+    seconds: float
+
+
+def escape_filter_value(text) -> str:
+    """Escape `text` for use as a filter option value inside `-vf`.
+
+    ffmpeg unescapes twice: once for the filtergraph, then once for the
+    option value.
+    """
+
+    def escape(t, chars):
+        return "".join("\\" + c if c in chars else c for c in t)
+
+    return escape(escape(str(text), "\\':"), "\\'[],;")
+
+
+class ExtractState:
+    """Tracks one video's extraction in its output folder, so an
+    interrupted batch can pick up where it stopped.
+
+    `MANIFEST` records which video and options the folder belongs to, and
+    whether extraction finished. While ffmpeg runs, a `metadata` filter
+    prints every written frame's timestamp to `JOURNAL`; timestamps of
+    frames kept from earlier (interrupted) runs are moved to `KEPT`.
+    """
+
+    MANIFEST = ".screenshooter-extract.json"
+    JOURNAL = ".screenshooter-frames.txt"
+    KEPT = ".screenshooter-frames.kept"
+
+    def __init__(self, folder, name, ext="png"):
+        self.folder = Path(folder)
+        self.name = name
+        self.ext = ext
+        self.manifest = self.folder.joinpath(self.MANIFEST)
+        self.journal = self.folder.joinpath(self.JOURNAL)
+        self.kept = self.folder.joinpath(self.KEPT)
+
+    def load(self) -> Optional[Dict]:
+        try:
+            return json.loads(self.manifest.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, data) -> None:
+        tmp = self.manifest.with_name(self.manifest.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, self.manifest)
+
+    @staticmethod
+    def _fingerprint(video) -> Optional[str]:
+        # A missing or unreadable video fails in ffmpeg, with a better error
+        try:
+            return fingerprint(video)
+        except OSError:
+            return None
+
+    def matches(self, video, options) -> bool:
+        """The folder was made from this very file, with these options."""
+        data = self.load()
+        return (
+            data is not None
+            and data.get("fingerprint") == self._fingerprint(video)
+            and data.get("options") == options
+        )
+
+    def is_complete(self, video, options) -> bool:
+        return self.matches(video, options) and self.load().get("complete", False)
+
+    def begin(self, video, options) -> None:
+        self._write(
+            {
+                "video": str(video),
+                "fingerprint": self._fingerprint(video),
+                "options": options,
+                "complete": False,
+            }
+        )
+
+    def finish(self, frames=None) -> None:
+        data = self.load() or {}
+        data.update(complete=True, frames=frames)
+        self._write(data)
+        for path in (self.journal, self.kept):
+            if path.exists():
+                path.unlink()
+
+    def frame_files(self) -> List[Tuple[int, Path]]:
+        """`(number, path)` of every `{name}-NNNN.{ext}` frame, in order."""
+        pattern = re.compile(rf"^{re.escape(self.name)}-(\d+)\.{re.escape(self.ext)}$")
+
+        frames = []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                match = pattern.match(entry.name)
+                if match:
+                    frames.append((int(match.group(1)), Path(entry.path)))
+        return sorted(frames)
+
+    def clear(self) -> None:
+        """Remove every frame and state file, for a fresh start."""
+        for (_, path) in self.frame_files():
+            path.unlink()
+        for path in (self.manifest, self.journal, self.kept):
+            if path.exists():
+                path.unlink()
+
+    def _timestamps(self) -> List[Tuple[int, float]]:
+        """`(pts, seconds)` per written frame: kept ones, then this run's."""
+        stamps = []
+        if self.kept.exists():
+            for line in self.kept.read_text().splitlines():
+                (pts, seconds) = line.split()
+                stamps.append((int(pts), float(seconds)))
+
+        if self.journal.exists():
+            # `frame:0    pts:51200   pts_time:4`, then the frame's metadata
+            for match in re.finditer(
+                r"^frame:\d+\s+pts:(-?\d+)\s+pts_time:(\S+)$",
+                self.journal.read_text(errors="replace"),
+                re.MULTILINE,
+            ):
+                stamps.append((int(match.group(1)), float(match.group(2))))
+
+        return stamps
+
+    def resume_point(self) -> Optional[ResumePoint]:
+        """Work out how much of an interrupted extraction can be kept.
+
+        Frames are kept up to the shorter of the numbered run on disk and
+        the timestamp journal, less the last one (which may have been cut
+        off mid-write). Anything after that is deleted, and the kept
+        timestamps are saved for the next interruption.
+
+        Returns:
+            ResumePoint: or None if nothing can be kept
+        """
+        files = self.frame_files()
+        stamps = self._timestamps()
+
+        contiguous = 0
+        for (n, _) in files:
+            if n != contiguous + 1:
+                break
+            contiguous = n
+
+        keep = min(contiguous, len(stamps)) - 1
+        for (n, path) in files:
+            if n > keep:
+                path.unlink()
+
+        if keep <= 0:
+            for path in (self.journal, self.kept):
+                if path.exists():
+                    path.unlink()
+            return None
+
+        stamps = stamps[:keep]
+        self.kept.write_text("".join(f"{pts} {seconds!r}\n" for (pts, seconds) in stamps))
+        if self.journal.exists():
+            self.journal.unlink()
+
+        (pts, seconds) = stamps[-1]
+        logger.info(f"Resuming {self.folder.name} after frame {keep} ({seconds:0.3f}s)")
+        return ResumePoint(keep, pts, seconds)
+
+    def journal_filter(self) -> str:
+        """Filters that print each frame's timestamp to `JOURNAL`.
+
+        `metadata=print` only prints frames carrying some metadata, so
+        every frame is tagged first.
+        """
+        return (
+            "metadata=mode=add:key=screenshooter:value=1,"
+            f"metadata=mode=print:direct=1:file={escape_filter_value(self.journal)}"
+        )
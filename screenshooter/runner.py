@@ -0,0 +1,217 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import asyncio
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________       FFmpeg Progress      _________________________ #
+# =========================================================================== #
+@dataclass
+class FFmpegProgress:
+    """The latest block of ffmpeg's `-progress` key/value stream.
+
+    ffmpeg writes a block of `key=value` lines every half second or so,
+    ending each block with `progress=continue` (or `progress=end`).
+    """
+
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0
+    out_time: str = "00:00:00.000000"
+    out_time_us: int = 0
+    total_size: int = 0
+    progress: str = "continue"
+
+    @property
+    def out_seconds(self) -> float:
+        return self.out_time_us / 1_000_000
+
+    def update(self, key: str, value: str) -> None:
+        """Apply one `key=value` line, ignoring keys we don't track."""
+        value = value.strip()
+        try:
+            if key == "frame":
+                self.frame = int(value)
+            elif key == "fps":
+                self.fps = float(value)
+            elif key == "speed":
+                # e.g. `1.52x`, or `N/A` before the first frame
+                self.speed = float(value.rstrip("x"))
+            elif key == "out_time":
+                self.out_time = value
+            elif key == "out_time_us":
+                self.out_time_us = int(value)
+            elif key == "total_size":
+                self.total_size = int(value)
+            elif key == "progress":
+                self.progress = value
+        except ValueError:
+            # ffmpeg reports `N/A` until it has something to say
+            pass
+
+
+@dataclass
+class FFmpegResult:
+    returncode: int
+    progress: FFmpegProgress
+    stderr_tail: List[str] = field(default_factory=list)
+
+
+class FFmpegError(subprocess.CalledProcessError):
+    """ffmpeg exited non-zero; carries the last lines of its stderr."""
+
+    def __init__(self, returncode, cmd, stderr_tail):
+        super().__init__(returncode, cmd, stderr="\n".join(stderr_tail))
+        self.stderr_tail = list(stderr_tail)
+
+    def __str__(self):
+        text = super().__str__()
+        if self.stderr_tail:
+            text += "\n" + "\n".join(self.stderr_tail)
+        return text
+
+
+# =========================================================================== #
+# ______________________        Async Runner        _________________________ #
+# =========================================================================== #
+def progress_cmd(cmd: List[str]) -> List[str]:
+    """Ask ffmpeg for the machine-readable progress stream on stdout.
+
+    `-hide_banner` and `-nostats` drop the version banner and the
+    carriage-return stats line from stderr, which leaves stderr with
+    nothing but real log lines.
+    """
+    return [
+        cmd[0],
+        "-hide_banner",
+        "-nostdin",
+        "-progress",
+        "pipe:1",
+        "-nostats",
+        *cmd[1:],
+    ]
+
+
+async def _read_progress(stream, progress, on_progress):
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+
+        key, _, value = line.decode("utf-8", "replace").partition("=")
+        progress.update(key.strip(), value)
+
+        # `progress=...` closes each block
+        if key.strip() == "progress" and on_progress is not None:
+            on_progress(progress)
+
+
+async def _read_stderr(stream, tail):
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        tail.append(line.decode("utf-8", "replace").rstrip())
+
+
+async def run_ffmpeg(
+    cmd: List[str],
+    on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+    tail_lines: int = 50,
+) -> FFmpegResult:
+    """Run ffmpeg, streaming its progress instead of buffering its output.
+
+    Stdout carries the `-progress` stream, which is parsed line by line and
+    handed to `on_progress` after every block. Stderr is kept in a ring
+    buffer of `tail_lines` lines, so memory stays flat however long the
+    input is, and a crash still shows the last thing ffmpeg said.
+
+    Args:
+        cmd (List[str]): The ffmpeg command, as built by `ffmpegCommander`.
+        on_progress (Callable, optional): Called with the live `FFmpegProgress`.
+        tail_lines (int, optional): How much stderr to keep. Defaults to 50.
+
+    Raises:
+        FFmpegError: ffmpeg exited with a non-zero return code
+
+    Returns:
+        FFmpegResult: Return code, final progress and the stderr tail
+    """
+    cmd = progress_cmd(cmd)
+    progress = FFmpegProgress()
+    tail = deque(maxlen=tail_lines)
+
+    logger.debug(f"Starting ffmpeg: {cmd}")
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        await asyncio.gather(
+            _read_progress(proc.stdout, progress, on_progress),
+            _read_stderr(proc.stderr, tail),
+        )
+        returncode = await proc.wait()
+    except asyncio.CancelledError:
+        # Don't leave an orphaned ffmpeg behind
+        proc.kill()
+        await proc.wait()
+        raise
+
+    if returncode != 0:
+        raise FFmpegError(returncode, cmd, tail)
+
+    return FFmpegResult(returncode, progress, list(tail))
+
+
+# One event loop, on its own thread, supervises every ffmpeg a process starts
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The shared runner loop, started on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="ffmpeg-runner", daemon=True
+            ).start()
+    return _loop
+
+
+def run(cmd, on_progress=None, tail_lines=50) -> FFmpegResult:
+    """Blocking wrapper around `run_ffmpeg` for synchronous callers.
+
+    Every call is scheduled on the shared `event_loop`, so however many
+    batch workers call this at once, one loop reads all of their ffmpeg
+    children's progress and stderr while the workers just wait on the
+    result. `on_progress` is called from the loop's thread.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        run_ffmpeg(cmd, on_progress, tail_lines), event_loop()
+    )
+    try:
+        return future.result()
+    except BaseException:
+        # e.g. Ctrl+C in the waiting thread: cancelling kills the ffmpeg
+        future.cancel()
+        raise
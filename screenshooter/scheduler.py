@@ -0,0 +1,184 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from .probe import probe
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________          Job Costs         _________________________ #
+# =========================================================================== #
+# Rough bytes of RAM per decoded pixel for one extraction: ffmpeg keeps up
+# to ~16 reference frames plus a frame per decoder/encoder thread in
+# flight, at 1.5 bytes per pixel (yuv420p)
+MEMORY_PER_PIXEL = 48
+
+
+@dataclass
+class Job:
+    """One video to extract, with what it's expected to cost.
+
+    Attributes:
+        cost: Seconds × pixels per frame, proportional to decode work.
+        memory: Estimated peak bytes of RAM while it runs.
+    """
+
+    video: Path
+    cost: float = 0.0
+    memory: int = 0
+
+
+def estimate(video, segments=1) -> Job:
+    """Cost a video from its (cached) probe; unreadable videos cost nothing."""
+    try:
+        info = probe(video)
+    except Exception as err:
+        logger.debug(f"Couldn't probe {video}: {err}")
+        return Job(Path(video))
+
+    # Segments run side by side, each with its own decoder
+    return Job(
+        Path(video),
+        cost=(info.duration or 0.0) * info.pixels,
+        memory=info.pixels * MEMORY_PER_PIXEL * max(1, segments),
+    )
+
+
+def plan(videos: Iterable[Path], segments=1) -> List[Job]:
+    """Return a `Job` per video, most expensive first.
+
+    Starting the longest jobs first (LPT scheduling) means the batch
+    doesn't end with one long video running alone after the rest finish.
+    """
+    jobs = [estimate(v, segments) for v in videos]
+    return sorted(jobs, key=lambda j: j.cost, reverse=True)
+
+
+def default_memory_budget() -> Optional[int]:
+    """Half of physical RAM, or None (no limit) if it can't be read."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+# =========================================================================== #
+# ______________________          Dispatch          _________________________ #
+# =========================================================================== #
+def dispatch(
+    jobs: Iterable[Job], fn: Callable, workers=1, memory_budget=None, window=0.0
+) -> Iterator[Tuple[Job, object]]:
+    """Run `fn(job)` for every job on `workers` threads, yielding
+    `(job, result)` as each finishes.
+
+    Jobs start most expensive first, but only while their estimated memory
+    fits in what's left of `memory_budget`. When the next job doesn't fit,
+    a smaller one may start in its place so workers don't sit idle. A job
+    bigger than the whole budget still runs, on its own.
+
+    `jobs` can be a lazy iterable (e.g. `estimate` over a folder still
+    being walked): it's drained on a background thread, and the first jobs
+    start as soon as they're found, or, with a `window`, once that many
+    seconds have passed (or everything's found), so the first jobs are
+    picked from all found by then. Jobs found later are slotted into the
+    queue by cost, so a pre-sorted list (see `plan`) runs in list order.
+    """
+    found: "queue.Queue[Job]" = queue.Queue()
+    feeding = threading.Event()
+    feeding.set()
+    errors = []
+
+    def feed():
+        try:
+            for job in jobs:
+                found.put(job)
+        except BaseException as err:
+            errors.append(err)
+        finally:
+            feeding.clear()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    pending: List[Job] = []
+    running = {}
+    in_use = 0
+    start_after = time.monotonic() + window
+
+    def collect(block):
+        try:
+            job = found.get(block=block, timeout=0.1 if block else None)
+        except queue.Empty:
+            return
+        while True:
+            # Most expensive first; equal costs keep their order
+            at = len(pending)
+            while at > 0 and pending[at - 1].cost < job.cost:
+                at -= 1
+            pending.insert(at, job)
+            try:
+                job = found.get_nowait()
+            except queue.Empty:
+                return
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            collect(block=False)
+            if feeding.is_set() and time.monotonic() < start_after:
+                # Still inside the discovery window: keep gathering
+                collect(block=True)
+                continue
+            if not (pending or running):
+                if not feeding.is_set() and found.empty():
+                    break
+                # Nothing to do until the next job is found
+                collect(block=True)
+                continue
+
+            for job in list(pending):
+                if len(running) >= workers:
+                    break
+                fits = memory_budget is None or in_use + job.memory <= memory_budget
+                if running and not fits:
+                    continue
+
+                pending.remove(job)
+                running[pool.submit(fn, job)] = job
+                in_use += job.memory
+
+            if pending and len(running) < workers:
+                logger.debug(
+                    f"Holding {len(pending)} jobs back, {in_use / 2**20:0.0f} MiB "
+                    f"of {memory_budget / 2**20:0.0f} MiB budget in use"
+                )
+
+            # While jobs are still being found, wake up now and then for them
+            timeout = 0.1 if feeding.is_set() else None
+            (done, _) = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                in_use -= job.memory
+                yield (job, future.result())
+
+    feeder.join()
+    if errors:
+        raise errors[0]
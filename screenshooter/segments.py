@@ -0,0 +1,197 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from glob import escape as glob_escape
+from pathlib import Path, PurePath
+from typing import List, Optional
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from . import profiler
+from .formats import OutputFormat
+from .main import extract_options, ffmpegCommander, get_video_duration, seek_seconds
+from .resume import ExtractState
+from .tuning import load_profile
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________          Segments          _________________________ #
+# =========================================================================== #
+@dataclass(frozen=True)
+class Segment:
+    """One `[start, end)` slice of a video's timeline, in seconds.
+
+    Each segment's ffmpeg seeks `margin` seconds before `start` and reads
+    `margin` seconds past `end`, keeping the original timestamps
+    (`-copyts -start_at_zero`). A `select` on those timestamps then keeps
+    exactly the frames inside `[start, end)`. Because the ranges are
+    half-open and back to back, every frame lands in exactly one segment,
+    and the margin lets filters that look at earlier frames (`fps`,
+    scene detection, `mpdecimate`) see what they would in a single run.
+    """
+
+    index: int
+    start: float
+    end: Optional[float] = None
+    margin: float = 1.0
+
+    @property
+    def seek(self) -> float:
+        return max(0.0, self.start - self.margin)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """How long to read from `seek`, or None to read to the end."""
+        if self.end is None:
+            return None
+        return self.end + self.margin - self.seek
+
+    def window(self) -> str:
+        """The `select` filter that keeps only this segment's frames."""
+        expr = f"gte(t,{self.start:.6f})"
+        if self.end is not None:
+            expr += f"*lt(t,{self.end:.6f})"
+        return f"select='{expr}'"
+
+    def prefix(self, name) -> str:
+        return f"{name}-seg{self.index:03d}"
+
+
+def split_timeline(duration: float, count: int, margin=1.0, start=0.0) -> List[Segment]:
+    """Split the `start` to `duration` seconds of a video into `count`
+    equal, back-to-back segments.
+
+    The last segment is left open-ended, so nothing past a slightly short
+    probed duration is lost.
+    """
+    count = max(1, count)
+    step = (duration - start) / count
+
+    segments = []
+    for i in range(count):
+        end = None if i == count - 1 else round(start + step * (i + 1), 6)
+        segments.append(Segment(i, round(start + step * i, 6), end, margin))
+
+    return segments
+
+
+def renumber(folder, name, segments: List[Segment], ext="png") -> int:
+    """Rename every segment's frames into one contiguous `{name}-%04d` run.
+
+    Returns:
+        int: The number of frames
+    """
+    folder = Path(folder)
+    n = 0
+
+    for segment in segments:
+        pattern = re.compile(rf"^{re.escape(segment.prefix(name))}-(\d+)\.{ext}$")
+
+        frames = []
+        for entry in os.scandir(folder):
+            match = pattern.match(entry.name)
+            if match:
+                frames.append((int(match.group(1)), entry.path))
+
+        for (_, path) in sorted(frames):
+            n += 1
+            os.replace(path, folder.joinpath(f"{name}-{n:04d}.{ext}"))
+
+    return n
+
+
+def run_segments(video, output_dir, segments=2, name=None, **kwargs) -> Path:
+    """Extract one video as `segments` ffmpeg processes running side by side.
+
+    The timeline is split with `split_timeline`, every segment runs as its
+    own `ffmpegCommander` (writing `{name}-segNNN-%04d` frames into the
+    video's folder), and once all are done the frames are renumbered into
+    the usual contiguous `{name}-%04d` sequence.
+
+    A seek start (`ss`) is honoured by splitting only the timeline after
+    it. Note that `--min-gap` (scene) and `--keyframe-step` count from the
+    start of each segment, and the in-memory dedup only compares frames
+    within a segment. With `resume`, a finished video is skipped, but a
+    partial one starts over.
+
+    Args:
+        video (Path): The video to extract.
+        output_dir (Path): Parent folder for the video's output folder.
+        segments (int, optional): How many segments. Defaults to 2.
+        name (str, optional): Output folder/file name. Defaults to the video's stem.
+        **kwargs: Passed through to `ffmpegCommander`.
+
+    Returns:
+        Path: The video's output folder
+    """
+    name = name or PurePath(video).stem
+    duration = get_video_duration(video)
+
+    start = 0.0
+    if kwargs.get("ss"):
+        start = seek_seconds(*(kwargs.get(k, 0) for k in ("ss_h", "ss_m", "ss_s", "ss_mi")))
+
+    if segments <= 1 or not duration or start >= duration:
+        commander = ffmpegCommander(video, output_dir, name=name, **kwargs)
+        return commander.o
+
+    # The segments share this folder, so it's made (or refused) once, up front
+    new_dir = Path(output_dir).joinpath(name)
+    Path.mkdir(new_dir, exist_ok=kwargs.get("resume") or kwargs.get("overwrite"))
+
+    options = extract_options(**kwargs)
+    ext = (kwargs.get("output_format") or OutputFormat()).ext
+    state = ExtractState(new_dir, name, ext)
+
+    if kwargs.get("resume") and state.is_complete(video, options):
+        logger.info(f"{name} was already extracted, skipping")
+        return new_dir
+
+    state.clear()
+    for leftover in new_dir.glob(f"{glob_escape(name)}-seg*-*.{ext}"):
+        leftover.unlink()
+    state.begin(video, options)
+
+    parts = split_timeline(duration, segments, start=start)
+    logger.info(
+        f"Splitting {PurePath(video).name} ({duration - start:0.1f}s) into {len(parts)} segments"
+    )
+
+    kwargs.update(spinner=False, exit_on_error=False)
+
+    # The segments share the threads calibrated for one ffmpeg
+    thread_profile = kwargs.get("thread_profile") or load_profile()
+    if thread_profile is not None:
+        kwargs["thread_profile"] = thread_profile.split(len(parts))
+
+    def extract(segment):
+        return ffmpegCommander(video, output_dir, name=name, segment=segment, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+        futures = [pool.submit(extract, segment) for segment in parts]
+        errors = [f.exception() for f in futures if f.exception() is not None]
+
+    if errors:
+        raise errors[0]
+
+    with profiler.stage(name), profiler.stage("write") as counts:
+        frames = renumber(new_dir, name, parts, ext)
+        if counts is not None:
+            counts["frames"] += frames
+    state.finish(frames)
+    logger.info(f"{frames} frames from {len(parts)} segments")
+
+    return new_dir
@@ -0,0 +1,189 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import json
+import os
+from pathlib import Path
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________        File Sorter         _________________________ #
+# =========================================================================== #
+class FileSorter:
+    """Sorts images into sub-folders (`selects`, `rejects/blurry`, ...) of a
+    dataset with renames instead of copies, logging every move.
+
+    A rename within one filesystem is atomic and costs no I/O beyond the
+    directory entry, however big the file. In `preview` mode the images
+    are hardlinked into place instead, so nothing in the dataset moves.
+
+    Each decision is appended to a JSON-lines manifest *before* it is
+    carried out. If a run is interrupted, `resume()` finishes any move
+    that was logged but not done. Once a run completes, `complete()`
+    moves its entries to the `DONE` log, so a later run doesn't replay
+    them; `rollback()` (`screenshooter --rollback`) puts every file from
+    both logs back where it came from.
+    """
+
+    MANIFEST = ".screenshooter-manifest.jsonl"
+    DONE = ".screenshooter-manifest.done.jsonl"
+
+    def __init__(self, dataset, preview=False, cache=None):
+        self.dataset = Path(dataset)
+        self.preview = preview
+
+        # An `AnalysisCache` to keep pointing at files after they move
+        self.cache = cache
+
+        self.manifest = self.dataset.joinpath(self.MANIFEST)
+        self.done = self.dataset.joinpath(self.DONE)
+        self._log = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record(self, entry) -> None:
+        if self._log is None:
+            self._log = self.manifest.open("a", encoding="utf-8")
+
+        # Flushed per entry so a crash can't lose a decision; fsync'd on close
+        self._log.write(json.dumps(entry) + "\n")
+        self._log.flush()
+
+    def _entries(self, path=None):
+        path = path or self.manifest
+        if not path.exists():
+            return []
+
+        entries = []
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write
+                    logger.warning(f"Skipping unreadable manifest line: {line!r}")
+        return entries
+
+    def move(self, src, category) -> Path:
+        """Move (or in preview mode, link) `src` into `dataset/category/`.
+
+        A file an earlier preview already linked there counts as done: a
+        second preview leaves it be, and a real run just drops the
+        original name, so runs can be repeated.
+
+        Raises:
+            FileExistsError: Some other file is already at the destination
+
+        Returns:
+            Path: Where the file now lives
+        """
+        src = Path(src)
+        dst = self.dataset.joinpath(category, src.name)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+
+        if dst.exists():
+            if not os.path.samefile(src, dst):
+                raise FileExistsError(f"{dst} already exists")
+            if self.preview:
+                return dst
+
+        op = "link" if self.preview else "rename"
+        self._record({"op": op, "src": str(src), "dst": str(dst), "category": category})
+        self._apply(op, src, dst)
+
+        return dst
+
+    def _apply(self, op, src, dst) -> None:
+        if op == "link":
+            os.link(src, dst)
+        else:
+            if dst.exists():
+                # Hardlinked there by a preview (rename would do nothing)
+                os.unlink(src)
+            else:
+                os.replace(src, dst)
+            if self.cache is not None:
+                self.cache.rename(src, dst)
+
+    def resume(self) -> int:
+        """Finish any logged move that an interrupted run didn't get to.
+
+        Returns:
+            int: The number of moves completed
+        """
+        done = 0
+        for entry in self._entries():
+            (src, dst) = (Path(entry["src"]), Path(entry["dst"]))
+            if src.exists() and not dst.exists():
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                self._apply(entry["op"], src, dst)
+                done += 1
+
+        if done:
+            logger.info(f"Resumed {done} interrupted moves from {self.manifest}")
+        return done
+
+    def complete(self) -> None:
+        """Mark the run finished: its entries move to the `DONE` log, so
+        neither a later run nor `resume()` replays them.
+        """
+        self.close()
+        entries = self.manifest.read_text(encoding="utf-8") if self.manifest.exists() else ""
+        if not entries:
+            return
+
+        with self.done.open("a", encoding="utf-8") as f:
+            f.write(entries)
+            f.flush()
+            os.fsync(f.fileno())
+        self.manifest.unlink()
+
+    def rollback(self) -> int:
+        """Undo every logged move (completed runs' too), newest first, and
+        remove the logs.
+
+        Returns:
+            int: The number of files put back
+        """
+        self.close()
+
+        undone = 0
+        for entry in reversed(self._entries(self.done) + self._entries()):
+            (src, dst) = (Path(entry["src"]), Path(entry["dst"]))
+            if not dst.exists():
+                continue
+
+            if entry["op"] == "link":
+                dst.unlink()
+            elif not src.exists():
+                os.replace(dst, src)
+                if self.cache is not None:
+                    self.cache.rename(dst, src)
+            else:
+                continue
+            undone += 1
+
+        for path in (self.manifest, self.done):
+            if path.exists():
+                path.unlink()
+
+        logger.info(f"Rolled back {undone} moves in {self.dataset}")
+        return undone
+
+    def close(self) -> None:
+        if self._log is not None:
+            os.fsync(self._log.fileno())
+            self._log.close()
+            self._log = None
@@ -46,14 +46,13 @@ class Timer:
         elapsed_time = time.perf_counter() - self._start_time
         self._start_time = None
 
-        if elapsed_time > 60:
-            m = elapsed_time / 60
-            s = elapsed_time % 60
-            elapsed_time = f"{m}:{s}"
-
-        # Report elapsed time
+        # Report elapsed time (the float itself is what's kept and returned)
         if self.logger:
-            self.logger(self.text.format(elapsed_time))
+            message = self.text.format(elapsed_time)
+            if elapsed_time > 60:
+                (m, s) = divmod(elapsed_time, 60)
+                message += f" ({int(m)}:{s:06.3f})"
+            self.logger(message)
         if self.name:
             self.timers[self.name] += elapsed_time
 
@@ -0,0 +1,201 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import List, Optional
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________       Thread Profile       _________________________ #
+# =========================================================================== #
+PROFILE_PATH = Path.home().joinpath(".screenshooter-profile.json")
+
+
+@dataclass
+class ThreadProfile:
+    """How many extractions to run at once, and how many threads each
+    ffmpeg gets for decoding/encoding (`-threads`) and filtering
+    (`-filter_threads`).
+
+    ffmpeg sizes both thread pools to the whole machine by default, so
+    several extractions side by side oversubscribe the CPU. A profile
+    measured by `calibrate` splits the cores between them instead.
+
+    Attributes:
+        workers: Concurrent extractions (the default for `--jobs`).
+        threads: `-threads` per ffmpeg.
+        filter_threads: `-filter_threads` per ffmpeg.
+        cpus: `os.cpu_count()` when measured; a profile from another
+            machine (or VM size) is ignored.
+        speed: Seconds of video processed per second during calibration.
+    """
+
+    workers: int = 1
+    threads: int = 0
+    filter_threads: int = 0
+    cpus: int = 0
+    speed: float = 0.0
+
+    def input_args(self) -> List[str]:
+        """Decoder and filter options to put before ffmpeg's `-i` (0 = ffmpeg's default)."""
+        args = []
+        if self.threads:
+            args += ["-threads", str(self.threads)]
+        if self.filter_threads:
+            args += ["-filter_threads", str(self.filter_threads)]
+        return args
+
+    def output_args(self) -> List[str]:
+        """Encoder options to put before ffmpeg's output path."""
+        return ["-threads", str(self.threads)] if self.threads else []
+
+    def split(self, parts: int) -> "ThreadProfile":
+        """Each ffmpeg's share when one extraction runs as `parts` processes
+        side by side (see `segments.run_segments`), so together they use
+        what one ffmpeg was calibrated to.
+        """
+        parts = max(1, parts)
+        return replace(
+            self,
+            threads=self.threads and max(1, self.threads // parts),
+            filter_threads=self.filter_threads and max(1, self.filter_threads // parts),
+        )
+
+    def save(self, path=None) -> Path:
+        path = Path(path or profile_path())
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp, path)
+        return path
+
+
+def profile_path() -> Path:
+    """Where the profile lives: `$SCREENSHOOTER_PROFILE`, or `~/.screenshooter-profile.json`."""
+    return Path(os.environ.get("SCREENSHOOTER_PROFILE", PROFILE_PATH))
+
+
+def load_profile(path=None) -> Optional[ThreadProfile]:
+    """Return the saved profile, or None if there isn't a usable one for this host."""
+    path = Path(path or profile_path())
+
+    try:
+        profile = ThreadProfile(**json.loads(path.read_text()))
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError) as err:
+        logger.warning(f"Ignoring unreadable thread profile {path}: {err}")
+        return None
+
+    if profile.cpus != os.cpu_count():
+        logger.debug(f"Ignoring thread profile {path}, measured on {profile.cpus} CPUs")
+        return None
+
+    return profile
+
+
+# =========================================================================== #
+# ______________________         Calibration        _________________________ #
+# =========================================================================== #
+def candidates(cpus: int) -> List[ThreadProfile]:
+    """Worker/thread combinations worth timing on a `cpus`-core host.
+
+    Workers go up in powers of two; each worker gets either its fair share
+    of the cores or half of it, with filters given the same or one thread.
+    """
+    profiles = []
+    workers = 1
+    while workers <= cpus:
+        share = max(1, cpus // workers)
+        for threads in sorted({share, max(1, share // 2)}, reverse=True):
+            for filter_threads in sorted({threads, 1}, reverse=True):
+                profiles.append(ThreadProfile(workers, threads, filter_threads, cpus))
+        workers *= 2
+
+    return profiles
+
+
+def _trial(sample, profile, seconds, duration, **kwargs) -> float:
+    """Run `profile.workers` extractions of `seconds` each, side by side.
+
+    Every worker gets its own slice of the sample (wrapping around if the
+    sample is short), so they don't just share cached frames.
+
+    Returns:
+        float: Seconds of video processed per wall-clock second
+    """
+    from .main import ffmpegCommander
+    from .segments import Segment
+
+    scratch = Path(tempfile.mkdtemp(prefix="screenshooter-calibrate-"))
+    slices = max(1, int(duration // seconds))
+
+    def extract(worker):
+        start = (worker % slices) * seconds
+        segment = Segment(worker, start, start + seconds, margin=0.0)
+        ffmpegCommander(
+            sample,
+            scratch,
+            name=f"trial{worker}",
+            segment=segment,
+            thread_profile=profile,
+            spinner=False,
+            exit_on_error=False,
+            **kwargs,
+        )
+
+    try:
+        begin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=profile.workers) as pool:
+            list(pool.map(extract, range(profile.workers)))
+        elapsed = time.perf_counter() - begin
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return profile.workers * min(seconds, duration) / elapsed
+
+
+def calibrate(sample, seconds=5.0, cpus=None, **kwargs) -> ThreadProfile:
+    """Time every `candidates` combination on a sample video and return the fastest.
+
+    Args:
+        sample (Path): A representative input video.
+        seconds (float, optional): Length of video each worker extracts per trial. Defaults to 5.
+        cpus (int, optional): Cores to plan for. Defaults to `os.cpu_count()`.
+        **kwargs: Passed through to `ffmpegCommander` (strategy, format, ...),
+            so the trials measure the same work as a real run.
+
+    Returns:
+        ThreadProfile: The best combination, with its measured `speed`
+    """
+    from .main import get_video_duration
+
+    cpus = cpus or os.cpu_count() or 1
+    duration = get_video_duration(sample) or seconds
+    seconds = min(seconds, duration)
+
+    best = None
+    for profile in candidates(cpus):
+        profile.speed = _trial(sample, profile, seconds, duration, **kwargs)
+        logger.info(
+            f"workers={profile.workers} threads={profile.threads} "
+            f"filter_threads={profile.filter_threads}: {profile.speed:0.1f}x realtime"
+        )
+        if best is None or profile.speed > best.speed:
+            best = profile
+
+    return best
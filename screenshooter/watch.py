@@ -0,0 +1,315 @@
+# =========================================================================== #
+# _____________________________    Imports     ______________________________ #
+# =========================================================================== #
+# ======            ====== #
+# ======  Built-in  ====== #
+# ======            ====== #
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import threading
+import time
+from pathlib import Path, PurePath
+from typing import Dict, List, Optional, Tuple
+
+# ======            ====== #
+# ======    Local   ====== #
+# ======            ====== #
+from . import metrics, profiler
+from .batch import OutputNames, extract_video
+from .get_inputs import VIDEO_FILE_TYPES, is_included, sniff_video
+
+# ======            ====== #
+# ======    PyPi    ====== #
+# ======            ====== #
+from loguru import logger
+
+
+# =========================================================================== #
+# ______________________          Watchers          _________________________ #
+# =========================================================================== #
+def is_video(name) -> bool:
+    return PurePath(name).suffix.lower() in VIDEO_FILE_TYPES
+
+
+class PollingWatcher:
+    """Reports video files in a folder, by listing it every `interval` seconds."""
+
+    def __init__(self, folder, interval=1.0):
+        self.folder = Path(folder)
+        self.interval = interval
+
+    def wait(self, timeout) -> List[Path]:
+        time.sleep(min(timeout, self.interval))
+        with os.scandir(self.folder) as entries:
+            return [Path(e.path) for e in entries if e.is_file() and is_video(e.name)]
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Reports video files as they're written to, or moved into, a folder,
+    using Linux's inotify through ctypes (no extra dependency).
+
+    Raises:
+        OSError: inotify isn't available
+    """
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    # struct inotify_event: int wd; uint32 mask, cookie, len; char name[len]
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify isn't supported here")
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = self.IN_CREATE | self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(self.folder), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Can't watch {self.folder}")
+
+    def wait(self, timeout) -> List[Path]:
+        (ready, _, _) = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = set()
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            (_, _, _, length) = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if name and is_video(os.fsdecode(name)):
+                names.add(self.folder.joinpath(os.fsdecode(name)))
+
+        return sorted(names)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(folder, interval=1.0):
+    """An `InotifyWatcher` where possible, otherwise a `PollingWatcher`."""
+    try:
+        return InotifyWatcher(folder)
+    except OSError as err:
+        logger.info(f"Polling {folder} every {interval}s ({err})")
+        return PollingWatcher(folder, interval)
+
+
+# =========================================================================== #
+# ______________________        Settling Files      _________________________ #
+# =========================================================================== #
+class SettleTracker:
+    """Holds back files until they've stopped growing.
+
+    A file is ready once its size and mtime haven't changed for `settle`
+    seconds, so a recording that's still being copied in isn't picked up
+    half written. Each file is handed out once, unless it's replaced by
+    a different file (size or mtime) at the same path. Handed-out files
+    that have since been deleted are forgotten every `prune` seconds, so
+    a long-running watch doesn't remember every file it ever saw.
+    """
+
+    def __init__(self, settle=2.0, clock=time.monotonic, prune=60.0):
+        self.settle = settle
+        self.clock = clock
+        self.prune = prune
+        self._pending: Dict[Path, Tuple[Tuple[int, int], float]] = {}
+        self._seen: Dict[Path, Tuple[int, int]] = {}
+        self._pruned = clock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    @staticmethod
+    def _signature(path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def add(self, path) -> None:
+        path = Path(path)
+        if path in self._pending:
+            return
+        if path in self._seen:
+            if self._signature(path) == self._seen[path]:
+                return
+            # Replaced since it was handed out
+            del self._seen[path]
+        self._pending[path] = (None, self.clock())
+
+    def ready(self) -> List[Path]:
+        now = self.clock()
+        done = []
+
+        if now - self._pruned >= self.prune:
+            for path in [p for p in self._seen if not p.exists()]:
+                del self._seen[path]
+            self._pruned = now
+
+        for (path, (last, since)) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Deleted, or renamed away before it settled
+                del self._pending[path]
+                continue
+
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != last:
+                self._pending[path] = (current, now)
+            elif now - since >= self.settle:
+                del self._pending[path]
+                self._seen[path] = current
+                done.append(path)
+
+        return sorted(done)
+
+
+# =========================================================================== #
+# ______________________         Watch Mode         _________________________ #
+# =========================================================================== #
+def watch(
+    input_dir,
+    output_dir,
+    jobs=1,
+    settle=2.0,
+    interval=1.0,
+    stop: Optional[threading.Event] = None,
+    include=(),
+    exclude=(),
+    sniff=False,
+    **kwargs,
+):
+    """Extract every video that lands in `input_dir`, until interrupted.
+
+    Files already there when it starts are queued first. New ones are
+    queued once they've settled (see `SettleTracker`) and extracted by
+    `jobs` worker threads through `batch.extract_video`, the same path as
+    a normal batch. Runs `resume` by default, so restarting the watcher
+    skips videos it already finished. Files replaced at the same path are
+    extracted again.
+
+    Args:
+        input_dir (Path): Folder to watch.
+        output_dir (Path): Parent folder for the per-video output folders.
+        jobs (int, optional): Concurrent extractions. Defaults to 1.
+        settle (float, optional): Seconds a file must stop changing. Defaults to 2.
+        interval (float, optional): Polling interval, when inotify isn't available.
+        stop (threading.Event, optional): Set to stop watching.
+        include, exclude (Sequence[str], optional): File name globs, as for
+            `get_inputs.iter_video_files`.
+        sniff (bool, optional): Also require a known container signature,
+            checked once the file has settled.
+        **kwargs: Passed through to `extract_video`.
+    """
+    stop = stop or threading.Event()
+    kwargs.setdefault("resume", not kwargs.get("overwrite"))
+    kwargs.setdefault("spinner", False)
+
+    jobs_queue: "queue.Queue[Optional[Path]]" = queue.Queue()
+    output_name = OutputNames()
+
+    def worker():
+        while True:
+            video = jobs_queue.get()
+            if video is None:
+                return
+            name = output_name(video)
+            live = metrics.active()
+            if live is not None:
+                live.started(name)
+
+            result = extract_video(video, output_dir, name, **kwargs)
+
+            if live is not None:
+                live.finished(name, result.ok, result.elapsed)
+            status = "done" if result.ok else "failed"
+            logger.info(
+                f"{video.name} {status} in {result.elapsed:0.1f}s "
+                f"({jobs_queue.qsize()} queued)"
+            )
+            # The watcher runs indefinitely: report each video's stages and
+            # let them go, rather than keep every video's until it stops
+            if profiler.active() is not None:
+                totals = profiler.active().drain(name)["totals"]
+                stages = ", ".join(f"{n} {t['seconds']:0.2f}s" for (n, t) in totals.items())
+                logger.info(f"{video.name} profile: {stages}")
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, jobs))]
+    for thread in workers:
+        thread.start()
+
+    tracker = SettleTracker(settle)
+    watcher = make_watcher(input_dir, interval)
+    logger.info(f"Watching {input_dir} for new videos (Ctrl+C to stop)")
+
+    def track(path):
+        if is_included(Path(path).name, include, exclude):
+            tracker.add(path)
+
+    try:
+        with os.scandir(input_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and is_video(entry.name):
+                    track(entry.path)
+
+        while not stop.is_set():
+            # Wake at least every half second to check on settling files
+            for path in watcher.wait(0.5):
+                track(path)
+
+            for path in tracker.ready():
+                if sniff and not sniff_video(path):
+                    logger.debug(f"Skipping {path.name}, not a recognised video container")
+                    continue
+                logger.info(f"Queued {path.name}")
+                if metrics.active() is not None:
+                    metrics.active().queued(output_name(path))
+                jobs_queue.put(path)
+
+    except KeyboardInterrupt:
+        logger.info("Stopping, after the videos already started...")
+
+    finally:
+        watcher.close()
+        # Drop whatever hasn't started yet, then let running jobs finish
+        while not jobs_queue.empty():
+            try:
+                jobs_queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in workers:
+            jobs_queue.put(None)
+        for thread in workers:
+            thread.join()
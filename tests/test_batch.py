@@ -0,0 +1,75 @@
+"""
+Tests for `screenshooter.batch` module.
+"""
+from pathlib import Path
+
+
+class TestBatch(object):
+    def test_output_names_unique_stems(self):
+        from screenshooter.batch import output_names
+
+        videos = [Path("in/a.mp4"), Path("in/b.mov")]
+        assert output_names(videos) == {videos[0]: "a", videos[1]: "b"}
+
+    def test_output_names_colliding_stems(self):
+        from screenshooter.batch import output_names
+
+        videos = [Path("in/ep1.mkv"), Path("in/ep1.mp4"), Path("in/ep2.mp4")]
+        names = output_names(videos)
+
+        assert names[videos[0]] == "ep1"
+        assert names[videos[1]] == "ep1-mp4"
+        assert names[videos[2]] == "ep2"
+        assert len(set(names.values())) == len(videos)
+
+    def test_output_names_same_file_name_in_two_folders(self):
+        from screenshooter.batch import output_names
+
+        videos = [Path("x/ep.mp4"), Path("y/ep.mp4"), Path("y/ep.mkv")]
+        names = output_names(videos)
+
+        assert [names[v] for v in videos] == ["ep", "ep-mp4", "ep-mkv"]
+
+    def test_output_names_ignore_order(self, tmp_path, monkeypatch):
+        import os
+
+        from screenshooter.batch import OutputNames, output_names
+        from screenshooter.get_inputs import iter_video_files
+
+        for rel in ["ep.mp4", "a/ep.mp4", "a/ep.mkv", "b/ep.mp4", "b/c/ep.mp4"]:
+            tmp_path.joinpath(rel).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.joinpath(rel).touch()
+
+        def streamed():
+            names = OutputNames()
+            for video in iter_video_files(tmp_path):
+                names(video)
+            return names.names
+
+        class Reversed(list):
+            # The filesystem listing each folder the other way round
+            def __init__(self, path):
+                with scandir(path) as it:
+                    super().__init__(sorted(it, key=lambda e: e.name, reverse=True))
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                pass
+
+        first = streamed()
+        scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", Reversed)
+        assert streamed() == first
+        assert output_names(reversed(list(first))) == first
+        assert first[tmp_path.joinpath("ep.mp4")] == "ep"
+
+    def test_output_names_streamed(self):
+        from screenshooter.batch import OutputNames
+
+        names = OutputNames()
+        assert names(Path("a/ep1.mp4")) == "ep1"
+        assert names(Path("b/ep1.mp4")) == "ep1-mp4"
+        assert names(Path("c/ep1.mp4")) == "ep1-mp4-2"
+        assert names(Path("a/ep1.mp4")) == "ep1"
@@ -0,0 +1,43 @@
+"""
+Tests for `screenshooter.blur` module.
+"""
+import numpy as np
+import pytest
+
+
+class TestBlur(object):
+    @classmethod
+    def setup_class(cls):
+        import cv2
+
+        rng = np.random.default_rng(13)
+        noise = rng.integers(0, 256, size=(360, 640)).astype(np.uint8)
+        cls.sharp = cv2.GaussianBlur(noise, (0, 0), 1.0)
+        cls.blurry = cv2.GaussianBlur(noise, (0, 0), 6.0)
+
+    @pytest.mark.parametrize("metric", ["fft", "laplacian", "tenengrad"])
+    @pytest.mark.parametrize("analysis_width", [None, 320])
+    def test_sharp_beats_blurry(self, metric, analysis_width):
+        from screenshooter.blur import score_batch
+
+        scores = score_batch([self.sharp, self.blurry], metric, analysis_width)
+
+        assert scores.shape == (2,)
+        assert scores[0] > scores[1]
+
+    def test_batch_matches_single(self):
+        from screenshooter.blur import score_batch
+
+        batch = score_batch([self.sharp, self.blurry, self.sharp[:200]])
+        singles = [
+            score_batch([image])[0]
+            for image in (self.sharp, self.blurry, self.sharp[:200])
+        ]
+
+        assert np.allclose(batch, singles, rtol=1e-4)
+
+    def test_unknown_metric(self):
+        from screenshooter.blur import score_batch
+
+        with pytest.raises(ValueError):
+            score_batch([self.sharp], metric="nope")
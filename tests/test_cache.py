@@ -0,0 +1,48 @@
+"""
+Tests for `screenshooter.cache` module.
+"""
+import os
+
+
+class TestAnalysisCache(object):
+    def test_hit_and_stale(self, tmp_path):
+        from screenshooter.cache import AnalysisCache
+
+        image = tmp_path.joinpath("frame-0001.png")
+        image.write_bytes(b"not really a png")
+
+        with AnalysisCache.for_dataset(tmp_path) as cache:
+            assert cache.get(image, "dhash8") is None
+            cache.put(image, "dhash8", "ff00")
+            cache.put(image, "blur:fft:full", 12.5)
+            assert cache.get(image, "dhash8") == "ff00"
+            assert cache.get(image, "blur:fft:full") == 12.5
+
+        # Survives reopening
+        with AnalysisCache.for_dataset(tmp_path) as cache:
+            assert cache.get(image, "dhash8") == "ff00"
+
+            # A changed file is a miss
+            image.write_bytes(b"a different, longer file")
+            assert cache.get(image, "dhash8") is None
+
+    def test_get_or_compute_and_rename(self, tmp_path):
+        from screenshooter.cache import AnalysisCache
+
+        image = tmp_path.joinpath("frame-0001.png")
+        image.write_bytes(b"x")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 3.0
+
+        with AnalysisCache.for_dataset(tmp_path) as cache:
+            assert cache.get_or_compute(image, "blur", compute) == 3.0
+            assert cache.get_or_compute(image, "blur", compute) == 3.0
+            assert len(calls) == 1
+
+            moved = tmp_path.joinpath("moved.png")
+            os.replace(image, moved)
+            cache.rename(image, moved)
+            assert cache.get(moved, "blur") == 3.0
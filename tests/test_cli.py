@@ -0,0 +1,145 @@
+"""
+Tests for `screenshooter.cli` module.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must wait until a command actually runs
+HEAVY = ("cv2", "numpy", "pymediainfo", "loguru", "yaspin", "configobj", "sqlite3")
+
+# Total import time allowed for `--help` / `--version`, in microseconds
+IMPORT_BUDGET_US = 150_000
+
+
+def import_times(*args, cwd):
+    """Run the CLI under `-X importtime`, returning {module: cumulative µs}."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "screenshooter", *args],
+        cwd=cwd,
+        env={"PYTHONPATH": str(ROOT), "PATH": ""},
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        (_, cumulative, name) = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return (proc.stdout, times)
+
+
+class TestStartup(object):
+    @pytest.mark.parametrize("flag", ["--version", "--help"])
+    def test_fast_paths_stay_light(self, flag, tmp_path):
+        (out, times) = import_times(flag, cwd=tmp_path)
+
+        assert out
+        assert not [m for m in HEAVY if m in times]
+        # The CLI module, with click and everything it pulls in at import
+        assert times["screenshooter.cli"] < IMPORT_BUDGET_US
+        # The log file is only made once something is logged
+        assert not tmp_path.joinpath("screenshooter.log").exists()
+
+    def test_version(self, tmp_path):
+        (out, _) = import_times("--version", cwd=tmp_path)
+        assert out.startswith("Screenshooter Vers: ")
+
+
+class TestBatchOrder(object):
+    def test_longest_video_starts_first(self, tmp_path, monkeypatch):
+        from click.testing import CliRunner
+        from loguru import logger
+
+        from screenshooter import batch, scheduler
+        from screenshooter.batch import VideoResult
+        from screenshooter.cli import CLI
+        from screenshooter.probe import MediaProbe
+
+        minutes = {"short": 1, "long": 90, "medium": 20}
+        for name in minutes:
+            tmp_path.joinpath(f"{name}.mp4").write_bytes(b"")
+        tmp_path.joinpath("out").mkdir()
+
+        monkeypatch.setattr(
+            scheduler,
+            "probe",
+            lambda v: MediaProbe(duration=minutes[v.stem] * 60.0, width=640, height=360),
+        )
+        started = []
+
+        def extract_video(video, output_dir, name=None, **kwargs):
+            started.append(video.stem)
+            return VideoResult(video)
+
+        monkeypatch.setattr(batch, "extract_video", extract_video)
+        monkeypatch.chdir(tmp_path)
+
+        try:
+            result = CliRunner().invoke(
+                CLI, ["--input", str(tmp_path), "--output", "out", "--jobs", "1"]
+            )
+        finally:
+            logger.configure(handlers=[{"sink": sys.stderr}])
+
+        assert result.exit_code == 0, result.output
+        assert started == ["long", "medium", "short"]
+
+
+class TestWatchOptions(object):
+    @pytest.mark.parametrize("flag", [["--recursive"], ["--memory-budget", "512"]])
+    def test_unsupported_options_are_rejected(self, flag, tmp_path, monkeypatch):
+        from click.testing import CliRunner
+        from loguru import logger
+
+        from screenshooter.cli import CLI
+
+        monkeypatch.chdir(tmp_path)
+        try:
+            result = CliRunner().invoke(CLI, ["--watch", "--input", str(tmp_path), *flag])
+        finally:
+            logger.configure(handlers=[{"sink": sys.stderr}])
+
+        assert result.exit_code == 2
+        assert "--watch doesn't support" in result.output
+
+
+class TestRollback(object):
+    def test_rollback_puts_sorted_images_back(self, tmp_path, monkeypatch):
+        from click.testing import CliRunner
+        from loguru import logger
+
+        from screenshooter.cli import CLI
+        from screenshooter.sorter import FileSorter
+
+        frames = {}
+        for video in ["clip", "other"]:
+            folder = tmp_path.joinpath("out", video)
+            folder.mkdir(parents=True)
+            frames[video] = folder.joinpath(f"{video}-0001.png")
+            frames[video].write_bytes(b"frame")
+
+        with FileSorter(tmp_path.joinpath("out", "clip")) as sorter:
+            sorter.move(frames["clip"], "rejects/blurry")
+            sorter.complete()
+        with FileSorter(tmp_path.joinpath("out", "other")) as sorter:
+            # An interrupted run: logged, never completed
+            sorter.move(frames["other"], "selects")
+
+        monkeypatch.chdir(tmp_path)
+        try:
+            # No input folder needed just to undo a sort
+            result = CliRunner().invoke(CLI, ["--rollback", "--output", "out"])
+        finally:
+            logger.configure(handlers=[{"sink": sys.stderr}])
+
+        assert result.exit_code == 0, result.output
+        assert all(f.read_bytes() == b"frame" for f in frames.values())
+        assert not list(tmp_path.joinpath("out").rglob(".screenshooter-manifest*"))
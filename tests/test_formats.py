@@ -0,0 +1,46 @@
+"""
+Tests for `screenshooter.formats` module.
+"""
+import numpy as np
+import pytest
+
+
+class TestOutputFormat(object):
+    def test_ffmpeg_args(self):
+        from screenshooter.formats import OutputFormat
+
+        assert OutputFormat("png").ffmpeg_args() == ["-c:v", "png"]
+        assert OutputFormat("png", compression=1).ffmpeg_args()[-2:] == [
+            "-compression_level",
+            "1",
+        ]
+        assert OutputFormat("jpg", quality=100).ffmpeg_args()[-1] == "2"
+        assert OutputFormat("jpeg", quality=1).ffmpeg_args()[-1] == "31"
+        assert "1" in OutputFormat("webp", lossless=True).ffmpeg_args()
+
+    def test_npy_needs_pipe(self):
+        from screenshooter.formats import OutputFormat
+
+        assert OutputFormat("npy").needs_pipe
+        assert not OutputFormat("png").needs_pipe
+        with pytest.raises(ValueError):
+            OutputFormat("npy").ffmpeg_args()
+
+    def test_unknown_format(self):
+        from screenshooter.formats import OutputFormat
+
+        with pytest.raises(ValueError):
+            OutputFormat("gif")
+
+    @pytest.mark.parametrize("name", ["png", "jpg", "webp", "npy"])
+    def test_write(self, tmp_path, name):
+        from screenshooter.formats import OutputFormat
+
+        fmt = OutputFormat(name)
+        frame = np.zeros((24, 32, 3), dtype=np.uint8)
+        path = tmp_path.joinpath(f"video-0001.{fmt.ext}")
+
+        fmt.write(path, frame)
+
+        assert path.exists()
+        assert path.stat().st_size > 0
@@ -0,0 +1,157 @@
+"""
+Tests for `screenshooter.frames` module.
+"""
+import shutil
+import time
+
+import numpy as np
+import pytest
+
+from screenshooter.frames import raw_output_args, read_frames
+from screenshooter.runner import FFmpegError
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+
+def lavfi_cmd(size="320x240", rate=10, seconds=1, source="testsrc"):
+    return [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"{source}=size={size}:rate={rate}:duration={seconds}",
+        *raw_output_args(),
+    ]
+
+
+@needs_ffmpeg
+class TestReadFrames(object):
+    def test_decodes_every_frame(self):
+        # 230 KB frames can't come through the pipe in one read
+        frames = [f.copy() for f in read_frames(lavfi_cmd(), (320, 240))]
+
+        assert len(frames) == 10
+        assert frames[0].shape == (240, 320, 3)
+        assert frames[0].dtype == np.uint8
+        # testsrc moves, so every frame differs from the last
+        assert all(not np.array_equal(a, b) for (a, b) in zip(frames, frames[1:]))
+
+    def test_frames_share_one_buffer(self):
+        stream = read_frames(lavfi_cmd(), (320, 240))
+        first = next(stream)
+        second = next(stream)
+        stream.close()
+
+        assert first is second
+
+    def test_partial_last_frame_is_dropped(self):
+        # 10 frames of 32x24 are 23040 bytes: two whole 64x48 frames and a bit
+        frames = list(read_frames(lavfi_cmd(size="32x24"), (64, 48)))
+
+        assert len(frames) == 2
+
+    def test_stopping_early_kills_ffmpeg(self):
+        start = time.perf_counter()
+        # An hour of 720p: minutes of decoding if ffmpeg were left running
+        stream = read_frames(lavfi_cmd(size="1280x720", seconds=3600), (1280, 720))
+        for (i, _) in enumerate(stream):
+            if i == 2:
+                break
+        stream.close()
+
+        assert time.perf_counter() - start < 10
+
+    def test_ffmpeg_failure_raises(self, tmp_path):
+        cmd = ["ffmpeg", "-i", str(tmp_path.joinpath("missing.mp4")), *raw_output_args()]
+
+        with pytest.raises(FFmpegError) as err:
+            list(read_frames(cmd, (320, 240)))
+
+        assert err.value.returncode != 0
+        assert any("missing.mp4" in line for line in err.value.stderr_tail)
+
+
+class TestTemporalDedup(object):
+    def run(self, monkeypatch, tmp_path, dedup):
+        from screenshooter import frames
+
+        rng = np.random.default_rng(3)
+        (a, b) = rng.integers(0, 256, size=(2, 32, 48, 3), dtype=np.uint8)
+        # A static stretch, a change, then back to the first shot
+        stream = [a, a, a, b, b, a, a]
+        monkeypatch.setattr(frames, "read_frames", lambda cmd, size: iter(stream))
+
+        return frames.extract_frames(
+            [], (48, 32), tmp_path, "clip", remove_blurry=False, dedup=dedup
+        )
+
+    def test_keeps_each_change(self, monkeypatch, tmp_path):
+        stats = self.run(monkeypatch, tmp_path, "temporal")
+
+        assert (stats.read, stats.duplicates, stats.written) == (7, 4, 3)
+        assert len(list(tmp_path.glob("clip-*.png"))) == 3
+        assert stats.bytes == sum(p.stat().st_size for p in tmp_path.glob("clip-*.png"))
+
+    def test_global_drops_returning_shots(self, monkeypatch, tmp_path):
+        stats = self.run(monkeypatch, tmp_path, "global")
+
+        assert stats.written == 2
+
+
+class TestBestPerShot(object):
+    @staticmethod
+    def shot_frames(rng, reverse=False):
+        # A brightness ramp decides the dhash; noise on top only adds detail
+        ramp = np.tile(np.linspace(20, 230, 48), (32, 1))
+        if reverse:
+            ramp = ramp[:, ::-1]
+        flat = np.repeat(ramp[:, :, None], 3, axis=2).astype(np.uint8)
+        detailed = np.clip(flat + rng.integers(-5, 6, size=flat.shape), 0, 255).astype(np.uint8)
+        return (flat, detailed)
+
+    def test_selector_keeps_sharpest_per_shot(self):
+        from screenshooter.frames import ShotSelector
+
+        rng = np.random.default_rng(5)
+        (flat, detailed) = self.shot_frames(rng)
+        selector = ShotSelector(k=2, max_distance=1, blur_metric="laplacian", batch_size=2)
+
+        picks = []
+        for (i, (frame, h)) in enumerate([(flat, 0b0), (detailed, 0b1), (flat, 0b0)]):
+            picks += selector.push(i, frame, h)
+        assert picks == []
+
+        # A new shot closes the first, whose best two come back in order
+        picks = selector.push(3, detailed, 0b1111)
+        assert [index for (index, _, _) in picks] == [0, 1]
+        assert picks[1][2] > picks[0][2]
+
+        assert [index for (index, _, _) in selector.flush()] == [3]
+        assert selector.shots == 2
+
+    def test_extract_best_per_shot(self, monkeypatch, tmp_path):
+        import cv2
+        from screenshooter import frames
+
+        rng = np.random.default_rng(8)
+        (a_flat, a_detailed) = self.shot_frames(rng)
+        (b_flat, b_detailed) = self.shot_frames(rng, reverse=True)
+        stream = [a_flat, a_detailed, a_flat, b_flat, b_detailed, b_flat]
+        monkeypatch.setattr(frames, "read_frames", lambda cmd, size: iter(stream))
+
+        stats = frames.extract_frames(
+            [],
+            (48, 32),
+            tmp_path,
+            "clip",
+            remove_blurry=False,
+            best_per_shot=1,
+            blur_metric="laplacian",
+        )
+
+        assert (stats.shots, stats.written, stats.duplicates) == (2, 2, 4)
+        written = sorted(tmp_path.glob("clip-*.png"))
+        assert np.array_equal(cv2.imread(str(written[0])), a_detailed)
+        assert np.array_equal(cv2.imread(str(written[1])), b_detailed)
@@ -0,0 +1,71 @@
+"""
+Tests for `screenshooter.get_inputs` module.
+"""
+from pathlib import Path
+
+import pytest
+
+from screenshooter.get_inputs import get_video_file_paths, iter_video_files, sniff_video
+
+MP4_HEADER = b"\x00\x00\x00\x20ftypisom" + bytes(20)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    files = {
+        "a.mp4": MP4_HEADER,
+        "B.MOV": MP4_HEADER,
+        "notes.txt": b"hello",
+        "cam1/c.mkv": b"\x1a\x45\xdf\xa3" + bytes(20),
+        "cam1/deep/d.mp4": MP4_HEADER,
+        "cam2/e.mp4": MP4_HEADER,
+        "trash/f.mp4": MP4_HEADER,
+        "fake.mp4": b"not a video at all",
+    }
+    for (name, data) in files.items():
+        path = tmp_path.joinpath(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return tmp_path
+
+
+def found(root, **kwargs):
+    return sorted(p.relative_to(root).as_posix() for p in iter_video_files(root, **kwargs))
+
+
+class TestIterVideoFiles(object):
+    def test_recursive_and_case_insensitive(self, tree):
+        assert found(tree) == [
+            "B.MOV",
+            "a.mp4",
+            "cam1/c.mkv",
+            "cam1/deep/d.mp4",
+            "cam2/e.mp4",
+            "fake.mp4",
+            "trash/f.mp4",
+        ]
+
+    def test_non_recursive(self, tree):
+        assert found(tree, recursive=False) == ["B.MOV", "a.mp4", "fake.mp4"]
+        assert sorted(get_video_file_paths(tree)) == sorted(
+            iter_video_files(tree, recursive=False)
+        )
+
+    def test_include_and_exclude(self, tree):
+        assert found(tree, include=["cam*/*"]) == ["cam1/c.mkv", "cam1/deep/d.mp4", "cam2/e.mp4"]
+        # Excluded folders aren't walked at all
+        assert found(tree, exclude=["trash", "deep", "fake.*"]) == [
+            "B.MOV",
+            "a.mp4",
+            "cam1/c.mkv",
+            "cam2/e.mp4",
+        ]
+
+    def test_sniff(self, tree):
+        assert "fake.mp4" not in found(tree, sniff=True)
+        assert sniff_video(tree.joinpath("cam1/c.mkv"))
+        assert not sniff_video(tree.joinpath("notes.txt"))
+
+    def test_is_lazy(self, tree):
+        videos = iter_video_files(tree)
+        assert isinstance(next(videos), Path)
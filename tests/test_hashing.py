@@ -0,0 +1,103 @@
+"""
+Tests for `screenshooter.hashing` module.
+"""
+import numpy as np
+
+
+def legacy_dhash(gray, hash_size=8):
+    import cv2
+
+    resized = cv2.resize(gray, (hash_size + 1, hash_size))
+    diff = resized[:, 1:] > resized[:, :-1]
+    return sum([2 ** i for (i, v) in enumerate(diff.flatten()) if v])
+
+
+class TestHashing(object):
+    @classmethod
+    def setup_class(cls):
+        rng = np.random.default_rng(13)
+        cls.images = rng.integers(0, 256, size=(6, 48, 64, 3), dtype=np.uint8)
+
+    def test_matches_legacy_dhash(self):
+        import cv2
+        from screenshooter.hashing import dhash_images, hash_to_int
+
+        for hash_size in (8, 10, 16):
+            hashes = dhash_images(self.images, hash_size)
+            assert hashes.dtype == np.uint64
+            assert hashes.shape == (len(self.images), -(-hash_size ** 2 // 64))
+
+            for image, h in zip(self.images, hashes):
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                assert hash_to_int(h) == legacy_dhash(gray, hash_size)
+
+    def test_post_process_dhash(self):
+        import cv2
+        from screenshooter._post_process import dhash
+
+        gray = cv2.cvtColor(self.images[0], cv2.COLOR_BGR2GRAY)
+        assert dhash(self.images[0]) == legacy_dhash(gray)
+
+    def test_bad_thumbnail_shape(self):
+        import pytest
+        from screenshooter.hashing import dhash_batch
+
+        with pytest.raises(ValueError):
+            dhash_batch(np.zeros((2, 8, 8), dtype=np.uint8))
+
+    def test_hamming(self):
+        from screenshooter.hashing import hamming
+
+        hashes = np.array([[0], [1], [0xFF], [2 ** 64 - 1]], dtype=np.uint64)
+        distances = hamming(hashes, np.array([0], dtype=np.uint64))
+
+        assert distances.tolist() == [0, 1, 8, 64]
+
+    def test_bktree_matches_brute_force(self):
+        from screenshooter.hashing import BKTree, hamming_int
+
+        rng = np.random.default_rng(5)
+        hashes = [int(h) for h in rng.integers(0, 2 ** 63, size=500)]
+        # a few near neighbours of the first hash
+        hashes += [hashes[0] ^ 1, hashes[0] ^ 0b101, hashes[0] ^ 0xFF]
+
+        tree = BKTree()
+        for (i, h) in enumerate(hashes):
+            tree.add(h, i)
+        assert len(tree) == len(hashes)
+
+        for radius in (0, 3, 10):
+            found = sorted(item for (_, _, item) in tree.search(hashes[0], radius))
+            expected = [
+                i for (i, h) in enumerate(hashes) if hamming_int(h, hashes[0]) <= radius
+            ]
+            assert found == expected
+
+    def test_near_duplicate_index(self):
+        from screenshooter.hashing import NearDuplicateIndex
+
+        exact = NearDuplicateIndex(max_distance=0)
+        exact.add(0b1010, "first")
+        assert exact.find(0b1010) == "first"
+        assert exact.find(0b1011) is None
+
+        near = NearDuplicateIndex(max_distance=2)
+        near.add(0b1010, "first")
+        near.add(0b11110000, "second")
+        assert near.find(0b1011) == "first"
+        assert near.find(0b11110001) == "second"
+        assert near.find(0b0101) is None
+
+    def test_temporal_index(self):
+        from screenshooter.hashing import TemporalIndex
+
+        index = TemporalIndex(max_distance=1)
+        assert index.find(0b1010) is None
+
+        index.add(0b1010, "first")
+        assert index.find(0b1011) == "first"
+        index.add(0b11110000, "second")
+        # Only the last hash is remembered
+        assert index.find(0b1010) is None
+        assert index.find(0b11110001) == "second"
+        assert len(index) == 1
@@ -0,0 +1,181 @@
+"""
+Tests for `screenshooter.main` module.
+"""
+import pytest
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    """Build an `ffmpegCommander` command without running ffmpeg."""
+    from screenshooter.main import ffmpegCommander
+
+    monkeypatch.setattr(ffmpegCommander, "send", lambda self: None)
+    # Don't pick up a calibrated profile from the machine running the tests
+    monkeypatch.setenv("SCREENSHOOTER_PROFILE", str(tmp_path.joinpath("profile.json")))
+
+    def _build(**kwargs):
+        return ffmpegCommander(tmp_path.joinpath("video.mp4"), tmp_path, **kwargs)
+
+    return _build
+
+
+class TestCommandBuilder(object):
+    def test_default_dumps_every_frame(self, build, tmp_path):
+        commander = build()
+
+        assert "-vf" not in commander.cmd
+        assert commander.cmd[-1] == str(tmp_path.joinpath("video", "video-%04d.png"))
+
+    def test_decimate_flag(self, build):
+        commander = build(decimate=True)
+
+        assert commander.strategy == "decimate"
+        vf = commander.cmd[commander.cmd.index("-vf") + 1]
+        assert vf == "mpdecimate,setpts=N/FRAME_RATE/TB"
+
+    def test_fps_strategy(self, build):
+        commander = build(strategy="fps", fps=0.5)
+
+        assert commander.cmd[commander.cmd.index("-vf") + 1] == "fps=0.5"
+
+    def test_scene_strategy(self, build):
+        commander = build(strategy="scene", scene_threshold=0.4, min_gap=2)
+
+        vf = commander.cmd[commander.cmd.index("-vf") + 1]
+        assert vf.startswith("select='eq(n,0)+gt(scene,0.4)*")
+        assert "gte(t-prev_selected_t,2)" in vf
+        assert commander.cmd[commander.cmd.index("-vsync") + 1] == "vfr"
+
+    def test_unknown_strategy(self, build):
+        with pytest.raises(ValueError):
+            build(strategy="nope")
+
+    def test_keyframes_strategy(self, build):
+        commander = build(strategy="keyframes")
+
+        cmd = commander.cmd
+        assert cmd[cmd.index("-skip_frame") + 1] == "nokey"
+        assert cmd.index("-skip_frame") < cmd.index("-i")
+        assert cmd[cmd.index("-vsync") + 1] == "passthrough"
+        assert "-vf" not in cmd
+
+    def test_blur_threshold_reaches_the_frame_filter(self, build, monkeypatch):
+        from screenshooter import frames, main
+        from screenshooter.frames import FrameStats
+
+        seen = {}
+
+        def extract_frames(cmd, size, output_dir, file_name, **kwargs):
+            seen.update(kwargs)
+            return FrameStats()
+
+        monkeypatch.setattr(frames, "extract_frames", extract_frames)
+        monkeypatch.setattr(main, "get_video_size", lambda video: (64, 48))
+
+        commander = build(in_memory=True, blur_metric="laplacian", blur_thresh=12.5)
+
+        assert (seen["blur_metric"], seen["blur_thresh"]) == ("laplacian", 12.5)
+        assert commander.options["blur_thresh"] == 12.5
+
+    def test_keyframes_step(self, build):
+        commander = build(strategy="keyframes", keyframe_step=4)
+
+        assert commander.cmd[commander.cmd.index("-vf") + 1] == "select='not(mod(n,4))'"
+
+
+class TestSegments(object):
+    def test_seek_start(self, build):
+        from screenshooter.main import seek_seconds
+
+        commander = build(ss=True, ss_h=0, ss_m=1, ss_s=2, ss_mi=5)
+
+        # `ss_mi` are the digits after the point, as they always were
+        assert commander.cmd[commander.cmd.index("-ss") + 1] == "0:1:2.5"
+        assert commander.cmd.index("-ss") < commander.cmd.index("-i")
+        assert seek_seconds(0, 1, 2, 5) == 62.5
+
+    def test_segment_command(self, build):
+        from screenshooter.segments import Segment
+
+        commander = build(segment=Segment(1, 10.0, 20.0), strategy="decimate")
+        cmd = commander.cmd
+
+        assert cmd[cmd.index("-ss") + 1] == "9.000"
+        assert cmd[cmd.index("-t") + 1] == "12.000"
+        assert "-copyts" in cmd and "-start_at_zero" in cmd
+        assert cmd[cmd.index("-vf") + 1] == (
+            "mpdecimate,select='gte(t,10.000000)*lt(t,20.000000)',setpts=N/FRAME_RATE/TB"
+        )
+        assert cmd[cmd.index("-vsync") + 1] == "passthrough"
+        assert cmd[-1].endswith("video-seg001-%04d.png")
+
+    def test_split_timeline(self):
+        from screenshooter.segments import split_timeline
+
+        parts = split_timeline(9.0, 3)
+
+        assert [(p.start, p.end) for p in parts] == [(0.0, 3.0), (3.0, 6.0), (6.0, None)]
+        assert parts[0].seek == 0.0
+        assert parts[-1].window() == "select='gte(t,6.000000)'"
+
+    def test_split_timeline_from_start(self):
+        from screenshooter.segments import split_timeline
+
+        parts = split_timeline(10.0, 2, start=4.0)
+
+        assert [(p.start, p.end) for p in parts] == [(4.0, 7.0), (7.0, None)]
+        assert parts[0].seek == 3.0
+
+    def test_renumber(self, tmp_path):
+        from screenshooter.segments import renumber, split_timeline
+
+        parts = split_timeline(4.0, 2)
+        for (seg, count) in ((1, 2), (0, 3)):
+            for n in range(1, count + 1):
+                tmp_path.joinpath(f"v-seg{seg:03d}-{n:04d}.png").write_text(f"{seg}.{n}")
+
+        assert renumber(tmp_path, "v", parts) == 5
+        contents = [p.read_text() for p in sorted(tmp_path.glob("v-*.png"))]
+        assert contents == ["0.1", "0.2", "0.3", "1.1", "1.2"]
+
+
+class TestResume(object):
+    def test_existing_folder_needs_resume_or_overwrite(self, build, tmp_path):
+        tmp_path.joinpath("video").mkdir()
+
+        with pytest.raises(FileExistsError):
+            build(exit_on_error=False)
+
+    def test_resumable_run_journals_frames(self, build):
+        cmd = build(resume=True).cmd
+
+        assert "-copyts" in cmd
+        assert "metadata=mode=print" in cmd[cmd.index("-vf") + 1]
+        assert cmd[cmd.index("-vsync") + 1] == "passthrough"
+
+    def test_resumes_after_last_frame(self, build, tmp_path):
+        from screenshooter.main import extract_options
+        from screenshooter.resume import ExtractState
+
+        folder = tmp_path.joinpath("video")
+        folder.mkdir()
+        state = ExtractState(folder, "video")
+        state.begin(tmp_path.joinpath("video.mp4"), extract_options(strategy="fps", fps=2.0))
+        for n in range(1, 5):
+            folder.joinpath(f"video-{n:04d}.png").write_bytes(b"png")
+        state.kept.write_text("0 0.0\n1 0.5\n2 1.0\n3 1.5\n")
+
+        cmd = build(resume=True, strategy="fps", fps=2.0).cmd
+
+        assert cmd[cmd.index("-ss") + 1] == "0.000"
+        assert cmd[cmd.index("-vf") + 1].startswith("fps=2.0,select='gt(pts,2)',metadata")
+        assert cmd[cmd.index("-start_number") + 1] == "4"
+
+    def test_overwrite_clears_frames(self, build, tmp_path):
+        folder = tmp_path.joinpath("video")
+        folder.mkdir()
+        folder.joinpath("video-0001.png").write_bytes(b"png")
+
+        build(overwrite=True)
+
+        assert not folder.joinpath("video-0001.png").exists()
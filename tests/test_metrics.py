@@ -0,0 +1,92 @@
+"""
+Tests for `screenshooter.metrics` module.
+"""
+import json
+
+from screenshooter.metrics import Metrics
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetrics(object):
+    def test_segments_sum_and_fold_in(self):
+        m = Metrics(clock=Clock())
+        m.queued("a")
+        m.queued("b")
+        assert m.queue_depth() == 2
+
+        m.started("a")
+        m.progress("a", 0, 100.0, 2.0, frames=10, kept=10)
+        m.progress("a", 1, 50.0, 1.0, frames=5, kept=5)
+        video = m.videos["a"]
+        assert (video.total("frames"), video.fps, video.speed) == (15, 150.0, 3.0)
+        assert m.queue_depth() == 1
+
+        m.part_done("a", 0, frames=12, kept=12, bytes=1200)
+        m.progress("a", 1, 50.0, 1.0, frames=8, kept=8)
+        assert video.total("frames") == 20
+
+        m.finished("a", ok=True, elapsed=2.0)
+        assert video.as_dict()["frames"] == 20
+        assert video.as_dict()["bytes"] == 1200
+        assert video.fps == 10.0
+        assert video.speed == 0.0
+
+    def test_textfile(self, tmp_path):
+        clock = Clock()
+        path = tmp_path.joinpath("screenshooter.prom")
+        m = Metrics(textfile=path, interval=5.0, clock=clock)
+
+        m.queued('we"ird')
+        text = path.read_text()
+        assert 'screenshooter_frames_total{video="we\\"ird"} 0' in text
+        assert "screenshooter_queue_depth 1" in text
+
+        # Progress alone only rewrites the file every `interval` seconds
+        m.progress('we"ird', frames=7, duplicates=2)
+        assert "} 7" not in path.read_text()
+        clock.now += 5
+        m.progress('we"ird', frames=9, duplicates=2)
+        text = path.read_text()
+        assert 'screenshooter_frames_total{video="we\\"ird"} 9' in text
+        assert 'screenshooter_frames_rejected_total{video="we\\"ird",reason="duplicate"} 2' in text
+        assert 'screenshooter_videos{state="running"} 1' in text
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_jsonl(self, tmp_path):
+        path = tmp_path.joinpath("metrics.jsonl")
+        with Metrics(jsonl=path, clock=Clock()) as m:
+            m.queued("a")
+            m.started("a")
+            m.progress("a", fps=30.0, frames=3, kept=1, blurry=2)
+            m.finished("a", ok=False, elapsed=1.0)
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["event"] for line in lines] == ["queued", "started", "progress", "finished"]
+        assert lines[0]["queue_depth"] == 1
+        assert lines[2]["blurry"] == 2
+        assert lines[-1]["state"] == "failed"
+        assert lines[-1]["frames"] == 3
+
+    def test_finished_videos_are_retired(self, tmp_path):
+        clock = Clock()
+        path = tmp_path.joinpath("screenshooter.prom")
+        m = Metrics(textfile=path, retention=60.0, clock=clock)
+
+        for name in ("a", "b"):
+            m.started(name)
+            m.finished(name, ok=name == "a", elapsed=1.0)
+        clock.now += 61
+        m.queued("c")
+
+        assert list(m.videos) == ["c"]
+        text = path.read_text()
+        assert 'video="a"' not in text
+        assert 'screenshooter_videos{state="done"} 1' in text
+        assert 'screenshooter_videos{state="failed"} 1' in text
@@ -0,0 +1,57 @@
+"""
+Tests for `screenshooter._post_process` module.
+"""
+import numpy as np
+
+
+class TestFileCleanup(object):
+    def make_dataset(self, folder):
+        import cv2
+
+        rng = np.random.default_rng(13)
+        sharp_a = rng.integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+        sharp_b = rng.integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+        flat = np.full((120, 160, 3), 128, dtype=np.uint8)
+
+        frames = {
+            "video-0001.png": sharp_a,
+            "video-0002.png": sharp_a,
+            "video-0003.png": sharp_b,
+            "video-0004.png": flat,
+        }
+        for (name, image) in frames.items():
+            cv2.imwrite(str(folder.joinpath(name)), image)
+
+    def test_sorts_duplicates_and_blurry(self, tmp_path):
+        from screenshooter._post_process import FileCleanup
+
+        self.make_dataset(tmp_path)
+        cleanup = FileCleanup(tmp_path, workers=2)
+
+        assert len(cleanup.analysis) == 4
+        assert sorted(p.name for p in tmp_path.joinpath("selects").iterdir()) == [
+            "video-0001.png",
+            "video-0003.png",
+        ]
+        assert [p.name for p in tmp_path.joinpath("rejects", "duplicates").iterdir()] == [
+            "video-0002.png"
+        ]
+        assert [p.name for p in tmp_path.joinpath("rejects", "blurry").iterdir()] == [
+            "video-0004.png"
+        ]
+
+    def test_rerun_uses_cache(self, tmp_path, monkeypatch):
+        from screenshooter import _post_process
+        from screenshooter._post_process import FileCleanup
+
+        self.make_dataset(tmp_path)
+        FileCleanup(tmp_path, remove_blurry=False)
+
+        def no_reads(*args, **kwargs):
+            raise AssertionError("image was decoded again")
+
+        # The three frames left after dedup are all cached
+        monkeypatch.setattr(_post_process.cv2, "imread", no_reads)
+        cleanup = FileCleanup(tmp_path, remove_blurry=False)
+
+        assert len(cleanup.analysis) == 3
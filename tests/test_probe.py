@@ -0,0 +1,99 @@
+"""
+Tests for `screenshooter.probe` module.
+"""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from screenshooter import probe as probe_module
+from screenshooter.probe import MediaProbe, ProbeCache, fingerprint, parse
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Count real probes, returning a fixed result."""
+    seen = []
+
+    def parse(video):
+        seen.append(video)
+        return MediaProbe(duration=20.0, fps=25.0, width=640, height=360, keyframe_interval=50)
+
+    monkeypatch.setattr(probe_module, "parse", parse)
+    return seen
+
+
+class TestFingerprint(object):
+    def test_tracks_content_and_mtime(self, tmp_path):
+        a = tmp_path.joinpath("a.mp4")
+        a.write_bytes(b"x" * 200_000)
+        before = fingerprint(a)
+
+        # Same size and mtime, different bytes at the end
+        stat = os.stat(a)
+        a.write_bytes(b"x" * 199_999 + b"y")
+        os.utime(a, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert fingerprint(a) != before
+        assert fingerprint(a).startswith("200000:")
+
+
+class TestProbeCache(object):
+    def test_probes_once(self, tmp_path, calls):
+        video = tmp_path.joinpath("v.mp4")
+        video.write_bytes(b"video")
+
+        with ProbeCache(tmp_path.joinpath("probe.sqlite")) as cache:
+            first = cache.probe(video)
+            assert cache.probe(video) == first
+
+        # A fresh cache (a later run) reads it back from disk, even renamed
+        video.rename(tmp_path.joinpath("renamed.mp4"))
+        with ProbeCache(tmp_path.joinpath("probe.sqlite")) as cache:
+            again = cache.probe(tmp_path.joinpath("renamed.mp4"))
+
+        assert len(calls) == 1
+        assert again == first
+        assert again.size == (640, 360)
+
+    def test_changed_file_is_reprobed(self, tmp_path, calls):
+        video = tmp_path.joinpath("v.mp4")
+        video.write_bytes(b"video")
+
+        with ProbeCache(tmp_path.joinpath("probe.sqlite")) as cache:
+            cache.probe(video)
+            video.write_bytes(b"another video")
+            cache.probe(video)
+
+        assert len(calls) == 2
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+class TestParse(object):
+    def test_x264_keyframe_interval(self, tmp_path):
+        video = tmp_path.joinpath("x264.mp4")
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-loglevel",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                "testsrc=size=160x120:rate=25:duration=4",
+                "-c:v",
+                "libx264",
+                "-g",
+                "50",
+                "-pix_fmt",
+                "yuv420p",
+                str(video),
+            ],
+            check=True,
+        )
+
+        result = parse(video)
+
+        assert result.keyframe_interval == 50
+        assert (result.size, result.fps, result.duration) == ((160, 120), 25.0, 4.0)
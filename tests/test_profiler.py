@@ -0,0 +1,112 @@
+"""
+Tests for `screenshooter.profiler` and `screenshooter.timer` modules.
+"""
+import json
+import threading
+
+from screenshooter import profiler, timer
+from screenshooter.profiler import Profiler
+from screenshooter.timer import Timer
+
+
+class TestTimer(object):
+    def test_long_runs_stay_numeric(self, monkeypatch):
+        clock = iter([0.0, 125.5])
+        monkeypatch.setattr(timer.time, "perf_counter", lambda: next(clock))
+        messages = []
+
+        t = Timer(name="test_long_runs", logger=messages.append)
+        t.start()
+        elapsed = t.stop()
+
+        assert elapsed == 125.5
+        assert Timer.timers["test_long_runs"] == 125.5
+        assert messages == ["Elapsed time: 125.5000 seconds (2:05.500)"]
+
+
+class TestProfiler(object):
+    def test_nested_stages_and_counters(self):
+        p = Profiler()
+        with p.stage("clip"):
+            with p.stage("extract", frames=3) as counts:
+                counts["bytes"] += 100
+                p.count(frames=2)
+                p.record("hash", 0.5, 5, frames=5)
+            with p.stage("extract"):
+                pass
+
+        stages = p.summary()["stages"]
+        assert set(stages) == {"clip", "clip/extract", "clip/extract/hash"}
+        assert stages["clip/extract"]["calls"] == 2
+        assert stages["clip/extract"]["counters"] == {"frames": 5, "bytes": 100}
+        assert stages["clip/extract/hash"]["seconds"] == 0.5
+
+        totals = p.summary()["totals"]
+        assert set(totals) == {"extract", "hash"}
+        assert totals["hash"]["calls"] == 5
+
+    def test_threads_nest_separately(self):
+        p = Profiler()
+        with p.stage("a"):
+            parent = p.path()
+
+            def work():
+                with p.stage("probe"):
+                    pass
+                with p.stage("blur", parent=parent):
+                    pass
+
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+
+        assert set(p.summary()["stages"]) == {"a", "probe", "a/blur"}
+
+    def test_exports(self, tmp_path):
+        p = Profiler()
+        with p.stage("clip"), p.stage("write", frames=1):
+            pass
+
+        summary = json.loads(p.save_json(tmp_path.joinpath("p.json")).read_text())
+        assert summary["totals"]["write"]["counters"] == {"frames": 1}
+
+        trace = json.loads(p.save_trace(tmp_path.joinpath("p.trace.json")).read_text())
+        events = trace["traceEvents"]
+        assert [e["name"] for e in events] == ["write", "clip"]
+        assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+        assert events[0]["args"] == {"frames": 1, "path": "clip/write"}
+
+    def test_memory_stays_bounded(self, tmp_path):
+        p = Profiler(max_events=3)
+        for video in ["a", "b"]:
+            with p.stage(video), p.stage("extract", frames=2):
+                pass
+
+        # Stages aren't kept as `Timer`s, and only the latest spans are
+        assert not any(name.startswith(("a/", "b/")) for name in Timer.timers)
+        assert [e["args"]["path"] for e in p.events] == ["a", "b/extract", "b"]
+        trace = json.loads(p.save_trace(tmp_path.joinpath("p.trace.json")).read_text())
+        assert trace["otherData"] == {"dropped_events": 1}
+
+        drained = p.drain("a")
+        assert set(drained["stages"]) == {"a", "a/extract"}
+        assert drained["totals"]["extract"]["counters"] == {"frames": 2}
+        assert set(p.stages) == {"b", "b/extract"}
+        # A drained video still counts towards the run's totals
+        assert p.summary()["totals"]["extract"]["calls"] == 2
+        assert p.drain("a")["stages"] == {}
+
+    def test_module_functions_are_no_ops_when_off(self):
+        assert profiler.active() is None
+        with profiler.stage("extract") as counts:
+            profiler.count(frames=1)
+            profiler.record("hash", 1.0)
+        assert counts is None
+
+        p = profiler.enable()
+        try:
+            with profiler.stage("extract"):
+                profiler.count(frames=1)
+        finally:
+            assert profiler.disable() is p
+        assert p.summary()["stages"]["extract"]["counters"] == {"frames": 1}
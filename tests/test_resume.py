@@ -0,0 +1,75 @@
+"""
+Tests for `screenshooter.resume` module.
+"""
+import pytest
+
+from screenshooter.resume import ExtractState, escape_filter_value
+
+
+def journal(stamps):
+    return "".join(f"frame:{i}    pts:{pts}   pts_time:{t}\nscreenshooter=1\n" for (i, (pts, t)) in enumerate(stamps))
+
+
+@pytest.fixture
+def state(tmp_path):
+    return ExtractState(tmp_path, "clip")
+
+
+def write_frames(folder, count):
+    for n in range(1, count + 1):
+        folder.joinpath(f"clip-{n:04d}.png").write_bytes(b"png")
+
+
+class TestExtractState(object):
+    def test_resume_point_drops_the_last_frame(self, state, tmp_path):
+        write_frames(tmp_path, 5)
+        state.journal.write_text(journal([(i * 512, i * 0.04) for i in range(6)]))
+
+        point = state.resume_point()
+
+        # Five frames on disk, but the fifth may be cut off mid-write
+        assert (point.frames, point.pts, point.seconds) == (4, 3 * 512, 0.12)
+        assert [n for (n, _) in state.frame_files()] == [1, 2, 3, 4]
+        assert not state.journal.exists()
+
+    def test_journal_behind_the_frames(self, state, tmp_path):
+        write_frames(tmp_path, 5)
+        state.journal.write_text(journal([(0, 0.0), (512, 0.04), (1024, 0.08)]))
+
+        assert state.resume_point().frames == 2
+        assert len(state.frame_files()) == 2
+
+    def test_kept_stamps_carry_over(self, state, tmp_path):
+        write_frames(tmp_path, 4)
+        state.journal.write_text(journal([(i, i / 10) for i in range(4)]))
+        assert state.resume_point().frames == 3
+
+        # The next run writes frames 4-6, then is interrupted again
+        write_frames(tmp_path, 6)
+        state.journal.write_text(journal([(i, i / 10) for i in range(3, 6)]))
+
+        point = state.resume_point()
+        assert (point.frames, point.pts) == (5, 4)
+
+    def test_nothing_to_keep(self, state, tmp_path):
+        write_frames(tmp_path, 3)
+
+        assert state.resume_point() is None
+        assert state.frame_files() == []
+
+    def test_complete_only_for_same_video_and_options(self, state, tmp_path):
+        video = tmp_path.joinpath("clip.mp4")
+        video.write_bytes(b"video")
+
+        state.begin(video, {"strategy": "all"})
+        assert not state.is_complete(video, {"strategy": "all"})
+
+        state.finish(10)
+        assert state.is_complete(video, {"strategy": "all"})
+        assert not state.is_complete(video, {"strategy": "scene"})
+
+        video.write_bytes(b"a different video")
+        assert not state.is_complete(video, {"strategy": "all"})
+
+    def test_escape_filter_value(self):
+        assert escape_filter_value("/a:b,c/it's") == "/a\\\\:b\\,c/it\\\\\\'s"
@@ -0,0 +1,110 @@
+"""
+Tests for `screenshooter.runner` module.
+"""
+import asyncio
+import shutil
+
+import pytest
+
+
+class TestRunner(object):
+    def test_progress_block(self):
+        from screenshooter.runner import FFmpegProgress
+
+        progress = FFmpegProgress()
+        block = [
+            "frame=120",
+            "fps=59.94",
+            "out_time_us=4000000",
+            "out_time=00:00:04.000000",
+            "speed=1.52x",
+            "progress=continue",
+        ]
+        for line in block:
+            key, _, value = line.partition("=")
+            progress.update(key, value)
+
+        assert progress.frame == 120
+        assert progress.fps == 59.94
+        assert progress.speed == 1.52
+        assert progress.out_seconds == 4.0
+        assert progress.progress == "continue"
+
+    def test_progress_ignores_na(self):
+        from screenshooter.runner import FFmpegProgress
+
+        progress = FFmpegProgress()
+        progress.update("speed", "N/A")
+        progress.update("bitrate", "N/A")
+
+        assert progress.speed == 0.0
+
+    def test_progress_cmd(self):
+        from screenshooter.runner import progress_cmd
+
+        cmd = progress_cmd(["ffmpeg", "-i", "in.mp4", "out-%04d.png"])
+
+        assert cmd[0] == "ffmpeg"
+        assert cmd[cmd.index("-progress") + 1] == "pipe:1"
+        assert cmd[-3:] == ["-i", "in.mp4", "out-%04d.png"]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+class TestRunFFmpeg(object):
+    @staticmethod
+    def lavfi_cmd(output, seconds=2):
+        return [
+            "ffmpeg",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc=size=160x120:rate=25:duration={seconds}",
+            str(output),
+        ]
+
+    def test_progress_and_result(self, tmp_path):
+        from screenshooter.runner import run
+
+        updates = []
+        result = run(
+            self.lavfi_cmd(tmp_path.joinpath("out-%04d.png")),
+            on_progress=lambda p: updates.append((p.frame, p.progress)),
+        )
+
+        assert result.returncode == 0
+        assert result.progress.frame == 50
+        assert result.progress.progress == "end"
+        assert updates[-1] == (50, "end")
+        assert len(list(tmp_path.glob("out-*.png"))) == 50
+
+    def test_failure_keeps_stderr_tail(self, tmp_path):
+        from screenshooter.runner import FFmpegError, run
+
+        cmd = ["ffmpeg", "-i", str(tmp_path.joinpath("missing.mp4")), "out.png"]
+        with pytest.raises(FFmpegError) as err:
+            run(cmd, tail_lines=3)
+
+        assert err.value.returncode != 0
+        assert 0 < len(err.value.stderr_tail) <= 3
+        assert "missing.mp4" in str(err.value)
+
+    def test_concurrent_runs_share_one_loop(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from screenshooter import runner
+
+        loops = set()
+
+        def extract(i):
+            folder = tmp_path.joinpath(str(i))
+            folder.mkdir()
+            return runner.run(
+                self.lavfi_cmd(folder.joinpath("%04d.png"), seconds=1),
+                on_progress=lambda p: loops.add(id(asyncio.get_running_loop())),
+            )
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(extract, range(4)))
+
+        assert [r.progress.frame for r in results] == [25] * 4
+        assert loops == {id(runner.event_loop())}
@@ -0,0 +1,85 @@
+"""
+Tests for `screenshooter.scheduler` module.
+"""
+import threading
+import time
+from pathlib import Path
+
+from screenshooter import scheduler
+from screenshooter.probe import MediaProbe
+from screenshooter.scheduler import Job, dispatch, plan
+
+
+class TestPlan(object):
+    def test_longest_first(self, monkeypatch):
+        probes = {
+            "short-4k.mp4": MediaProbe(duration=10, width=3840, height=2160),
+            "long-sd.mp4": MediaProbe(duration=3600, width=640, height=360),
+            "mid-hd.mp4": MediaProbe(duration=600, width=1920, height=1080),
+        }
+        monkeypatch.setattr(scheduler, "probe", lambda v: probes[Path(v).name])
+
+        jobs = plan([Path(name) for name in probes])
+
+        assert [j.video.name for j in jobs] == ["mid-hd.mp4", "long-sd.mp4", "short-4k.mp4"]
+        assert jobs[0].memory == 1920 * 1080 * scheduler.MEMORY_PER_PIXEL
+
+    def test_unreadable_video_goes_last(self, monkeypatch):
+        def probe(video):
+            if Path(video).name == "bad.mp4":
+                raise OSError("unreadable")
+            return MediaProbe(duration=1, width=2, height=2)
+
+        monkeypatch.setattr(scheduler, "probe", probe)
+
+        jobs = plan([Path("bad.mp4"), Path("good.mp4")])
+        assert [j.video.name for j in jobs] == ["good.mp4", "bad.mp4"]
+
+
+class TestDispatch(object):
+    def run(self, jobs, workers, budget):
+        lock = threading.Lock()
+        state = {"memory": 0, "peak": 0}
+
+        def fn(job):
+            with lock:
+                state["memory"] += job.memory
+                state["peak"] = max(state["peak"], state["memory"])
+            time.sleep(0.02)
+            with lock:
+                state["memory"] -= job.memory
+            return job.video
+
+        done = [result for (_, result) in dispatch(jobs, fn, workers, budget)]
+        return (done, state["peak"])
+
+    def test_memory_budget_caps_concurrency(self):
+        jobs = [Job(Path(f"4k-{i}"), memory=60) for i in range(3)]
+        jobs += [Job(Path(f"sd-{i}"), memory=10) for i in range(4)]
+
+        (done, peak) = self.run(jobs, workers=4, budget=130)
+
+        assert sorted(done) == sorted(j.video for j in jobs)
+        assert peak <= 130
+
+    def test_oversized_job_runs_alone(self):
+        (done, peak) = self.run([Job(Path("8k"), memory=500)], workers=2, budget=100)
+
+        assert done == [Path("8k")]
+        assert peak == 500
+
+    def test_streamed_jobs_start_before_discovery_ends(self):
+        started = threading.Event()
+
+        def found():
+            yield Job(Path("first"), memory=1)
+            # The first job must be running before the rest are found
+            assert started.wait(5)
+            yield Job(Path("second"), memory=1)
+
+        def fn(job):
+            started.set()
+            return job.video
+
+        done = [result for (_, result) in dispatch(found(), fn, workers=1)]
+        assert done == [Path("first"), Path("second")]
@@ -0,0 +1,125 @@
+"""
+Tests for `screenshooter.sorter` module.
+"""
+import json
+
+
+def make_frames(folder, count=3):
+    frames = []
+    for i in range(1, count + 1):
+        frame = folder.joinpath(f"video-{i:04d}.png")
+        frame.write_bytes(f"frame {i}".encode())
+        frames.append(frame)
+    return frames
+
+
+class TestFileSorter(object):
+    def test_move_and_rollback(self, tmp_path):
+        from screenshooter.sorter import FileSorter
+
+        frames = make_frames(tmp_path)
+
+        with FileSorter(tmp_path) as sorter:
+            dst = sorter.move(frames[0], "selects")
+            sorter.move(frames[1], "rejects/blurry")
+
+        assert dst == tmp_path.joinpath("selects", "video-0001.png")
+        assert dst.read_bytes() == b"frame 1"
+        assert not frames[0].exists()
+        assert tmp_path.joinpath("rejects", "blurry", "video-0002.png").exists()
+
+        undone = FileSorter(tmp_path).rollback()
+
+        assert undone == 2
+        assert all(f.exists() for f in frames)
+        assert not dst.exists()
+        assert not tmp_path.joinpath(FileSorter.MANIFEST).exists()
+
+    def test_preview_links(self, tmp_path):
+        from screenshooter.sorter import FileSorter
+
+        frames = make_frames(tmp_path, 1)
+
+        with FileSorter(tmp_path, preview=True) as sorter:
+            dst = sorter.move(frames[0], "selects")
+
+        assert frames[0].exists()
+        assert dst.samefile(frames[0])
+
+        FileSorter(tmp_path).rollback()
+        assert frames[0].exists()
+        assert not dst.exists()
+
+    def test_resume_finishes_logged_moves(self, tmp_path):
+        from screenshooter.sorter import FileSorter
+
+        frames = make_frames(tmp_path, 2)
+        dst = tmp_path.joinpath("selects", frames[1].name)
+
+        # Simulate a crash between logging a decision and acting on it
+        with tmp_path.joinpath(FileSorter.MANIFEST).open("w") as f:
+            entry = {"op": "rename", "src": str(frames[1]), "dst": str(dst)}
+            f.write(json.dumps(entry) + "\n")
+            f.write('{"op": "rena')
+
+        assert FileSorter(tmp_path).resume() == 1
+        assert dst.exists()
+        assert not frames[1].exists()
+        assert frames[0].exists()
+
+    def test_refuses_to_overwrite(self, tmp_path):
+        import pytest
+        from screenshooter.sorter import FileSorter
+
+        frames = make_frames(tmp_path, 1)
+        tmp_path.joinpath("selects").mkdir()
+        tmp_path.joinpath("selects", frames[0].name).write_bytes(b"older")
+
+        with FileSorter(tmp_path) as sorter:
+            with pytest.raises(FileExistsError):
+                sorter.move(frames[0], "selects")
+
+    def test_completed_runs_are_not_replayed(self, tmp_path):
+        from screenshooter.sorter import FileSorter
+
+        frames = make_frames(tmp_path, 2)
+
+        with FileSorter(tmp_path) as sorter:
+            sorter.move(frames[0], "selects")
+            sorter.complete()
+
+        assert not tmp_path.joinpath(FileSorter.MANIFEST).exists()
+        # A new frame with the same name, e.g. from re-extracting the video
+        frames[0].write_bytes(b"new frame 1")
+        assert FileSorter(tmp_path).resume() == 0
+        assert frames[0].read_bytes() == b"new frame 1"
+
+        # Rollback still covers the completed run
+        with FileSorter(tmp_path) as sorter:
+            sorter.move(frames[1], "selects")
+        frames[0].unlink()
+        assert FileSorter(tmp_path).rollback() == 2
+        assert [f.read_bytes() for f in frames] == [b"frame 1", b"frame 2"]
+        assert not tmp_path.joinpath(FileSorter.DONE).exists()
+
+    def test_preview_rerun(self, tmp_path):
+        from screenshooter.sorter import FileSorter
+
+        frames = make_frames(tmp_path, 1)
+
+        for _ in range(2):
+            with FileSorter(tmp_path, preview=True) as sorter:
+                dst = sorter.move(frames[0], "selects")
+                sorter.complete()
+        assert dst.samefile(frames[0])
+
+        # Then for real: the preview's link stays, the original name goes
+        with FileSorter(tmp_path) as sorter:
+            sorter.move(frames[0], "selects")
+            sorter.complete()
+        assert dst.read_bytes() == b"frame 1"
+        assert not frames[0].exists()
+
+        assert FileSorter(tmp_path).rollback() == 1
+        assert frames[0].read_bytes() == b"frame 1"
+        assert not dst.exists()
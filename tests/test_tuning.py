@@ -0,0 +1,43 @@
+"""
+Tests for `screenshooter.tuning` module.
+"""
+import os
+
+from screenshooter.tuning import ThreadProfile, candidates, load_profile
+
+
+class TestThreadProfile(object):
+    def test_round_trip(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SCREENSHOOTER_PROFILE", str(tmp_path.joinpath("p.json")))
+        ThreadProfile(3, 2, 1, os.cpu_count(), 12.5).save()
+
+        assert load_profile() == ThreadProfile(3, 2, 1, os.cpu_count(), 12.5)
+
+    def test_other_host_is_ignored(self, tmp_path):
+        path = ThreadProfile(2, 4, 4, (os.cpu_count() or 1) + 1).save(tmp_path.joinpath("p.json"))
+
+        assert load_profile(path) is None
+        assert load_profile(tmp_path.joinpath("missing.json")) is None
+
+    def test_candidates_split_the_cores(self):
+        profiles = candidates(8)
+
+        assert {p.workers for p in profiles} == {1, 2, 4, 8}
+        assert all(p.workers * p.threads <= 8 for p in profiles)
+        assert ThreadProfile(2, 4, 4, 8) in profiles
+
+    def test_commander_args(self, tmp_path, monkeypatch):
+        from screenshooter.main import ffmpegCommander
+
+        monkeypatch.setattr(ffmpegCommander, "send", lambda self: None)
+        commander = ffmpegCommander(
+            tmp_path.joinpath("video.mp4"), tmp_path, thread_profile=ThreadProfile(2, 3, 1)
+        )
+        cmd = commander.cmd
+
+        assert cmd[: cmd.index("-i")][-4:] == ["-threads", "3", "-filter_threads", "1"]
+        assert cmd[-3:-1] == ["-threads", "3"]
+
+    def test_split_between_segments(self):
+        assert ThreadProfile(2, 8, 4, 16).split(3) == ThreadProfile(2, 2, 1, 16)
+        assert ThreadProfile(2, 2, 0, 16).split(4) == ThreadProfile(2, 1, 0, 16)
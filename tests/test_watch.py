@@ -0,0 +1,170 @@
+"""
+Tests for `screenshooter.watch` module.
+"""
+import threading
+import time
+
+import pytest
+
+from screenshooter import watch as watch_module
+from screenshooter.batch import VideoResult
+from screenshooter.watch import InotifyWatcher, PollingWatcher, SettleTracker
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSettleTracker(object):
+    def test_waits_until_the_file_stops_growing(self, tmp_path):
+        clock = FakeClock()
+        tracker = SettleTracker(settle=2.0, clock=clock)
+        video = tmp_path.joinpath("rec.mp4")
+        video.write_bytes(b"a")
+
+        tracker.add(video)
+        assert tracker.ready() == []
+
+        clock.now = 1.5
+        video.write_bytes(b"ab")
+        assert tracker.ready() == []
+
+        clock.now = 3.0
+        assert tracker.ready() == []
+
+        clock.now = 3.5
+        assert tracker.ready() == [video]
+
+        # Handed out once only
+        tracker.add(video)
+        clock.now = 10.0
+        assert tracker.ready() == []
+
+    def test_replaced_file_comes_back(self, tmp_path):
+        clock = FakeClock()
+        tracker = SettleTracker(settle=1.0, clock=clock, prune=5.0)
+        video = tmp_path.joinpath("rec.mp4")
+        video.write_bytes(b"take 1")
+
+        tracker.add(video)
+        tracker.ready()
+        clock.now = 1.0
+        assert tracker.ready() == [video]
+
+        video.unlink()
+        video.write_bytes(b"take two")
+        tracker.add(video)
+        tracker.ready()
+        clock.now = 2.0
+        assert tracker.ready() == [video]
+
+        # Deleted files are forgotten at the next prune
+        video.unlink()
+        clock.now = 10.0
+        tracker.ready()
+        assert tracker._seen == {}
+
+    def test_forgets_deleted_files(self, tmp_path):
+        tracker = SettleTracker(settle=0)
+        tracker.add(tmp_path.joinpath("gone.mp4"))
+
+        assert tracker.ready() == []
+        assert len(tracker) == 0
+
+
+class TestWatchers(object):
+    def test_inotify_reports_moved_in_videos(self, tmp_path):
+        try:
+            watcher = InotifyWatcher(tmp_path)
+        except OSError:
+            pytest.skip("inotify isn't available")
+
+        tmp_path.joinpath("notes.txt").write_text("not a video")
+        tmp_path.joinpath(".partial").write_bytes(b"video")
+        tmp_path.joinpath(".partial").rename(tmp_path.joinpath("Clip.MOV"))
+
+        try:
+            assert watcher.wait(1.0) == [tmp_path.joinpath("Clip.MOV")]
+        finally:
+            watcher.close()
+
+    def test_polling(self, tmp_path):
+        tmp_path.joinpath("a.mp4").write_bytes(b"video")
+        tmp_path.joinpath("b.txt").write_text("text")
+
+        assert PollingWatcher(tmp_path, interval=0).wait(0) == [tmp_path.joinpath("a.mp4")]
+
+
+class TestWatch(object):
+    def test_queues_existing_and_new_videos(self, tmp_path, monkeypatch):
+        (inbox, outbox) = (tmp_path.joinpath("in"), tmp_path.joinpath("out"))
+        inbox.mkdir()
+        outbox.mkdir()
+        inbox.joinpath("old.mp4").write_bytes(b"video")
+
+        extracted = []
+
+        def extract_video(video, output_dir, name=None, **kwargs):
+            extracted.append((video.name, name, kwargs["resume"]))
+            return VideoResult(video=video)
+
+        monkeypatch.setattr(watch_module, "extract_video", extract_video)
+
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=watch_module.watch,
+            args=(inbox, outbox),
+            kwargs=dict(settle=0.1, interval=0.1, stop=stop),
+        )
+        thread.start()
+        try:
+            time.sleep(0.3)
+            inbox.joinpath("new.mkv").write_bytes(b"video")
+            deadline = time.monotonic() + 5
+            while len(extracted) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert sorted(extracted) == [("new.mkv", "new", True), ("old.mp4", "old", True)]
+
+    def test_filters_new_videos(self, tmp_path, monkeypatch):
+        (inbox, outbox) = (tmp_path.joinpath("in"), tmp_path.joinpath("out"))
+        inbox.mkdir()
+        outbox.mkdir()
+        inbox.joinpath("keep.mp4").write_bytes(b"\0\0\0\x18ftypisom")
+        inbox.joinpath("skip-draft.mp4").write_bytes(b"\0\0\0\x18ftypisom")
+        inbox.joinpath("fake.mp4").write_bytes(b"not a video at all")
+
+        extracted = []
+
+        def extract_video(video, output_dir, name=None, **kwargs):
+            extracted.append(video.name)
+            return VideoResult(video=video)
+
+        monkeypatch.setattr(watch_module, "extract_video", extract_video)
+
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=watch_module.watch,
+            args=(inbox, outbox),
+            kwargs=dict(
+                settle=0.1, interval=0.1, stop=stop, exclude=("*-draft.*",), sniff=True
+            ),
+        )
+        thread.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not extracted and time.monotonic() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.3)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert extracted == ["keep.mp4"]